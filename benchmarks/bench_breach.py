@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Breach check benchmark
+Builds breach indexes from a synthetic SHA-1 corpus (random hashes plus a
+sample of the benchmark vault's passwords), with and without the Bloom
+filter, then times single lookups and a full check of a generated vault.
+Peak memory is reported so the build and the check can be seen to stay
+bounded as the corpus grows.
+
+Usage: python benchmarks/bench_breach.py [--corpus N] [--entries N] [--lookups N]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.breach_service import BreachIndex, build_index, check_vault, DEFAULT_BITS_PER_ENTRY
+from services.database_service import DatabaseService
+from services.encryption_service import EncryptionService
+from vault_generator import BENCHMARK_PASSWORD, CACHE_DIR, generate_vault
+
+# Share of the vault's passwords planted in the corpus
+BREACHED_SHARE = 0.05
+
+def write_corpus(path: str, count: int, planted):
+    rng = random.Random(42)
+    with open(path, 'w') as corpus:
+        for _ in range(count):
+            corpus.write(f"{rng.randbytes(20).hex().upper()}:{rng.randint(1, 1000)}\n")
+        for password in planted:
+            corpus.write(f"{hashlib.sha1(password.encode()).hexdigest().upper()}:1\n")
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=int, default=1000000, help="random hashes in the corpus")
+    parser.add_argument("--entries", type=int, default=10000, help="vault size for the full check")
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+    
+    vault = generate_vault(args.entries, verbose=True)
+    encryption_service = EncryptionService(BENCHMARK_PASSWORD, DatabaseService.read_kdf_iterations(vault))
+    with DatabaseService(db_path=vault, encryption_service=encryption_service) as db_service:
+        sample = random.Random(1).sample(range(args.entries), int(args.entries * BREACHED_SHARE))
+        passwords = [entry.password for entry in db_service.get_all_entries()]
+        planted = {passwords[i] for i in sample}
+        
+        corpus_path = os.path.join(CACHE_DIR, f"breach-corpus-{args.corpus}.txt")
+        write_corpus(corpus_path, args.corpus, planted)
+        print(f"corpus of {args.corpus + len(planted):,} hashes "
+              f"({os.path.getsize(corpus_path) / 1e6:.0f} MB), {len(planted)} planted vault passwords")
+        
+        for bits_per_entry in (DEFAULT_BITS_PER_ENTRY, 0):
+            label = f"bloom {bits_per_entry} bits/entry" if bits_per_entry else "no bloom"
+            index_path = os.path.join(CACHE_DIR, f"breach-{args.corpus}-{bits_per_entry}.idx")
+            start = time.perf_counter()
+            count = build_index(corpus_path, index_path, bits_per_entry)
+            build_seconds = time.perf_counter() - start
+            print(f"\n{label}")
+            print(f"  build                {build_seconds:8.2f} s  ({count / build_seconds:,.0f} hashes/s, "
+                  f"{os.path.getsize(index_path) / 1e6:.0f} MB)")
+            
+            with BreachIndex(index_path) as index:
+                rng = random.Random(7)
+                misses = [rng.randbytes(20) for _ in range(args.lookups)]
+                start = time.perf_counter()
+                false_positives = sum(map(index.contains_digest, misses))
+                miss_seconds = time.perf_counter() - start
+                print(f"  lookup (miss)        {miss_seconds / args.lookups * 1e6:8.2f} us  "
+                      f"(bloom rejected {index.bloom_rejections / args.lookups:.1%})")
+                assert false_positives == 0
+                
+                hits = [hashlib.sha1(password.encode()).digest() for password in planted]
+                start = time.perf_counter()
+                assert all(map(index.contains_digest, hits))
+                print(f"  lookup (hit)         {(time.perf_counter() - start) / len(hits) * 1e6:8.2f} us")
+                
+                start = time.perf_counter()
+                breached = check_vault(db_service, index)
+                print(f"  check {args.entries} entries {time.perf_counter() - start:8.2f} s  "
+                      f"({len(breached)} breached)")
+    
+    print(f"\npeak RSS {peak_rss_mb():.0f} MB")
+
+if __name__ == "__main__":
+    main()
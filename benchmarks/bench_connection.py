@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Connection benchmark
+Compares save/delete throughput of the persistent WAL connection used by
+DatabaseService against the previous connect-per-call behaviour. Both run
+DatabaseService.save_entry/delete_entry, change log rows included; only
+the connection handling differs.
+
+Usage: python benchmarks/bench_connection.py [--ops N]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.password_entry import PasswordEntry
+from services.database_service import DatabaseService
+
+class ClosingConnection(sqlite3.Connection):
+    """Commits or rolls back like any connection at the end of a with block, then closes."""
+    
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            return super().__exit__(exc_type, exc, tb)
+        finally:
+            self.close()
+
+class ConnectPerCallService(DatabaseService):
+    """The pre-WAL behaviour: open, use and close a connection for every call.
+    
+    The schema is set up on one plain connection, without the WAL pragmas;
+    after that every use of self.connection opens a new one.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._conn.close()
+        self._conn = None
+    
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+    
+    @property
+    def connection(self):
+        if self._conn is not None:
+            return self._conn
+        return sqlite3.connect(self.db_path, factory=ClosingConnection)
+
+def run_ops(service, ops: int) -> float:
+    start = time.perf_counter()
+    for i in range(ops):
+        service.save_entry(PasswordEntry(website=f"site{i}.example", username=f"user{i}", password="hunter22"))
+    for entry_id in range(1, ops + 1):
+        service.delete_entry(entry_id)
+    elapsed = time.perf_counter() - start
+    return (ops * 2) / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000, help="entries to save and then delete")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = ConnectPerCallService("benchmark-password", os.path.join(tmp, "per_call.db"))
+        per_call = run_ops(baseline, args.ops)
+        
+        with DatabaseService("benchmark-password", os.path.join(tmp, "persistent.db")) as service:
+            persistent = run_ops(service, args.ops)
+    
+    print(f"connect-per-call: {per_call:10.0f} ops/sec")
+    print(f"persistent + WAL: {persistent:10.0f} ops/sec")
+    print(f"speedup:          {persistent / per_call:10.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Edit queue benchmark
+Applies the same run of edits to copies of a generated vault, once through
+DatabaseService.save_entry/delete_entry (one transaction each, as the main
+window used to) and once through EditQueue, and reports how long the calls
+on the UI thread took and how long the queued edits took to write. Every
+entry is edited twice, so the queue writes each of them once.
+
+Usage: python benchmarks/bench_edits.py [--entries N] [--edits N]
+"""
+
+import argparse
+import copy
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.password_entry import PasswordEntry
+from services.database_service import DatabaseService
+from services.edit_queue import EditQueue
+from services.encryption_service import EncryptionService
+from vault_generator import BENCHMARK_PASSWORD, generate_vault
+
+def open_copy(vault: str, path: str) -> DatabaseService:
+    shutil.copy(vault, path)
+    iterations, salt = DatabaseService.read_kdf_params(path)
+    return DatabaseService(db_path=path, encryption_service=EncryptionService(BENCHMARK_PASSWORD, iterations,
+                                                                              salt=salt))
+
+def edit_script(db_service: DatabaseService, count: int, seed: int = 5):
+    # (kind, entry id or new entry, new password): updates twice over, some deletions and additions
+    rng = random.Random(seed)
+    ids = rng.sample(range(1, db_service.count_entries() + 1), count)
+    script = []
+    for i, entry_id in enumerate(ids):
+        if i % 4 == 3:
+            script.append(('delete', entry_id, None))
+        elif i % 4 == 2:
+            script.append(('add', PasswordEntry(website=f"new-{i}.example.com", password=f"new{i}"), None))
+        else:
+            script.append(('update', entry_id, f"first-{i}"))
+            script.append(('update', entry_id, f"second-{i}"))
+    return script
+
+def run_direct(db_service: DatabaseService, script) -> float:
+    start = time.perf_counter()
+    for kind, target, password in script:
+        if kind == 'add':
+            db_service.save_entry(copy.copy(target))
+        elif kind == 'delete':
+            db_service.delete_entry(target)
+        else:
+            entry = db_service.get_entry(target)
+            entry.password = password
+            db_service.save_entry(entry)
+    return time.perf_counter() - start
+
+def run_queued(db_service: DatabaseService, script):
+    # The entries are read up front, as the main window has them in memory
+    entries = {target: db_service.get_entry(target) for kind, target, _ in script if kind != 'add'}
+    queue = EditQueue(db_service, delay=60)
+    start = time.perf_counter()
+    for kind, target, password in script:
+        if kind == 'add':
+            queue.add(copy.copy(target))
+        elif kind == 'delete':
+            queue.delete(entries[target])
+        else:
+            entry = copy.copy(entries[target])
+            entry.password = password
+            queue.update(entries[target], entry)
+            entries[target] = entry
+    calls = time.perf_counter() - start
+    start = time.perf_counter()
+    assert queue.flush()
+    return calls, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--edits", type=int, default=200, help="entries touched")
+    args = parser.parse_args()
+    
+    vault = generate_vault(args.entries, verbose=True)
+    with tempfile.TemporaryDirectory() as folder:
+        with open_copy(vault, os.path.join(folder, "direct.db")) as db_service:
+            script = edit_script(db_service, args.edits)
+            before = db_service.connection.total_changes
+            direct = run_direct(db_service, script)
+            direct_rows = db_service.connection.total_changes - before
+            direct_result = sorted((entry.website, entry.password) for entry in db_service.iter_entries(lazy=False))
+        with open_copy(vault, os.path.join(folder, "queued.db")) as db_service:
+            before = db_service.connection.total_changes
+            calls, flush = run_queued(db_service, script)
+            queued_rows = db_service.connection.total_changes - before
+            queued_result = sorted((entry.website, entry.password) for entry in db_service.iter_entries(lazy=False))
+    assert direct_result == queued_result
+    
+    print(f"{len(script)} edits of {args.edits} entries in a vault of {args.entries}")
+    print(f"{'save_entry per edit':<22} {direct * 1e3:10.1f} ms on the UI thread  {direct_rows:>6} rows written")
+    print(f"{'EditQueue':<22} {calls * 1e3:10.1f} ms on the UI thread  {queued_rows:>6} rows written"
+          f"  (+{flush * 1e3:.1f} ms flush in the background)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark
+Bytes per entry held by MainWindow for the dataclass PasswordEntry with
+eagerly parsed timestamps and copied filter lists, against the slotted
+PasswordEntry with lazy timestamps and id-array EntryView filters. Also
+times building the entries and rendering list rows.
+
+Usage: python benchmarks/bench_memory.py [--entries N]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.password_entry import PasswordEntry
+from gui.entry_view import EntryView
+
+@dataclass
+class DataclassPasswordEntry:
+    # The model as it was before it was slotted
+    id: int = 0
+    website: str = ""
+    username: str = ""
+    email: str = ""
+    password: str = ""
+    notes: str = ""
+    date_created: datetime = None
+    date_modified: datetime = None
+    
+    def __post_init__(self):
+        if self.date_created is None:
+            self.date_created = datetime.now()
+        if self.date_modified is None:
+            self.date_modified = datetime.now()
+    
+    @property
+    def masked_password(self) -> str:
+        return '*' * len(self.password) if self.password else ''
+
+def make_rows(count: int):
+    # Row tuples as they come out of sqlite3, built before measuring
+    return [(i + 1, f"site{i}.example.com", f"user{i}", f"user{i}@mail.example.org", f"password-{i:06d}",
+             f"recovery codes {i} " * (i % 5), "2024-05-01T12:00:00.000000", "2024-06-01T08:30:00.000000")
+            for i in range(count)]
+
+def sort_key(entry):
+    return (entry.website, entry.id)
+
+def build_dataclass(rows):
+    entries = [DataclassPasswordEntry(id=row[0], website=row[1], username=row[2], email=row[3], password=row[4],
+                                      notes=row[5], date_created=datetime.fromisoformat(row[6]),
+                                      date_modified=datetime.fromisoformat(row[7]))
+               for row in rows]
+    entries_by_id = {entry.id: entry for entry in entries}
+    # MainWindow copied the list for the unfiltered view and for every search result
+    unfiltered = entries.copy()
+    searched = [entry for entry in entries if entry.id % 2]
+    return entries, entries_by_id, unfiltered, searched
+
+def build_slotted(rows):
+    entries = [PasswordEntry(id=row[0], website=row[1], username=row[2], email=row[3], password=row[4],
+                             notes=row[5], date_created=row[6], date_modified=row[7])
+               for row in rows]
+    entries_by_id = {entry.id: entry for entry in entries}
+    unfiltered = EntryView(entries, entries_by_id, sort_key)
+    searched = EntryView(entries, entries_by_id, sort_key, (entry.id for entry in entries if entry.id % 2))
+    return entries, entries_by_id, unfiltered, searched
+
+def render_dataclass(rows):
+    return [(e.website, e.username, e.email, e.masked_password,
+             e.notes[:50] + "..." if len(e.notes) > 50 else e.notes) for e in rows]
+
+def render_slotted(rows):
+    return [(e.website, e.username, e.email, e.masked_password, e.notes_preview) for e in rows]
+
+def measure(build, rows):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(rows)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+def time_render(render, view, passes: int = 20) -> float:
+    # The same 1000 rows redrawn repeatedly, as when scrolling back and forth
+    visible = [view[i] for i in range(min(1000, len(view)))]
+    start = time.perf_counter()
+    for _ in range(passes):
+        render(visible)
+    return (time.perf_counter() - start) / passes * 1e3
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000)
+    args = parser.parse_args()
+    
+    rows = make_rows(args.entries)
+    before, before_bytes, before_time = measure(build_dataclass, rows)
+    before_render = time_render(render_dataclass, before[3])
+    del before
+    after, after_bytes, after_time = measure(build_slotted, rows)
+    after_render = time_render(render_slotted, after[3])
+    
+    print(f"{args.entries} entries, unfiltered view plus a search matching half of them")
+    print(f"{'model':<34} {'bytes/entry':>12} {'build (s)':>10} {'render 1k (ms)':>15}")
+    print(f"{'dataclass + list copies':<34} {before_bytes / args.entries:>12.0f} {before_time:>10.2f} {before_render:>15.2f}")
+    print(f"{'__slots__ + EntryView':<34} {after_bytes / args.entries:>12.0f} {after_time:>10.2f} {after_render:>15.2f}")
+    print(f"memory saved: {1 - after_bytes / before_bytes:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Search benchmark
+Times the trigram SearchIndex against the linear scan MainWindow used to do,
+for substring, prefix and notes-only queries over synthetic entries.
+
+Usage: python benchmarks/bench_search.py [--entries N] [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.password_entry import PasswordEntry
+from services.search_index import SearchIndex
+
+QUERIES = [
+    ("substring", "mail4", {}),
+    ("substring", "user12345", {}),
+    ("substring", "ample", {}),
+    ("prefix", "site99", {"prefix": True}),
+    ("notes", "recovery code 77", {"fields": ("notes",)}),
+]
+
+def make_entries(count: int):
+    rng = random.Random(1234)
+    entries = []
+    for i in range(count):
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(6))
+        entries.append(PasswordEntry(
+            id=i + 1,
+            website=f"site{i}.{word}.example.com",
+            username=f"user{i}",
+            email=f"user{i}@mail{i % 50}.example.org",
+            password="not-used",
+            notes=f"recovery code {rng.randint(0, 9999)}" if i % 10 == 0 else ""
+        ))
+    return entries
+
+def linear_scan(entries, query: str):
+    # The pre-index MainWindow._on_search filter
+    query = query.lower()
+    return [entry for entry in entries
+            if (query in entry.website.lower() or
+                query in entry.username.lower() or
+                query in entry.email.lower())]
+
+def time_call(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    entries = make_entries(args.entries)
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.add_many(entries)
+    print(f"indexed {len(entries)} entries in {time.perf_counter() - start:.2f}s")
+    
+    print(f"{'kind':<10} {'query':<18} {'hits':>7} {'scan (us)':>12} {'index (us)':>12}")
+    for kind, query, options in QUERIES:
+        hits = len(index.search(query, **options))
+        scan = time_call(lambda: linear_scan(entries, query), max(1, args.repeat // 5))
+        indexed = time_call(lambda: index.search(query, **options), args.repeat)
+        print(f"{kind:<10} {query:<18} {hits:>7} {scan:>12.0f} {indexed:>12.1f}")
+
+if __name__ == "__main__":
+    main()
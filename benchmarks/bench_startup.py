@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark
+Measures what stands between launching the app and the login prompt:
+the import cost of the login path (from `python -X importtime`, so it
+includes every transitive module) against the full main window, the wall
+clock of a fresh interpreter importing each, and - when a display is
+available - the time until the login window has been drawn.
+
+Each measurement runs in a new interpreter, since a module is only
+imported once per process.
+
+Usage: python benchmarks/bench_startup.py [--repeat N] [--top N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, module imported before the first window is drawn)
+IMPORT_PATHS = (
+    ("login window", "gui.login_window"),
+    ("main window", "gui.main_window"),
+)
+
+# Draws the login window and exits; timed from outside, interpreter start included
+FIRST_FRAME_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+import tkinter as tk
+try:
+    from gui.login_window import LoginWindow
+    login_window = LoginWindow()
+    login_window.window.update()
+except tk.TclError as e:
+    print(e)
+    sys.exit(2)
+else:
+    login_window.window.destroy()
+"""
+
+def import_times(module: str) -> Tuple[int, List[Tuple[int, str]]]:
+    """Return the cumulative import time of `module` and its heaviest imports, in microseconds."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    total = next(cumulative for cumulative, name in rows if name.strip() == module)
+    heaviest = sorted(((cumulative, name.strip()) for cumulative, name in rows), reverse=True)
+    return total, heaviest
+
+def wall_clock(module: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def first_frame(repeat: int):
+    # Seconds from launching the interpreter to a drawn login window, or a reason it was skipped
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", FIRST_FRAME_SCRIPT.format(root=ROOT)], cwd=ROOT,
+                              capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if proc.returncode != 0:
+            return proc.stdout.strip() or proc.stderr.strip().splitlines()[-1]
+        samples.append(elapsed)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="heaviest imports to list per path")
+    args = parser.parse_args()
+    
+    baseline = wall_clock("sys", args.repeat)
+    print(f"bare interpreter                 {baseline * 1e3:8.1f} ms")
+    results: Dict[str, int] = {}
+    for label, module in IMPORT_PATHS:
+        total, heaviest = import_times(module)
+        results[label] = total
+        elapsed = wall_clock(module, args.repeat)
+        print(f"\n{label} ({module})")
+        print(f"  import time (-X importtime)    {total / 1e3:8.1f} ms")
+        print(f"  wall clock, fresh interpreter  {elapsed * 1e3:8.1f} ms (+{(elapsed - baseline) * 1e3:.1f} ms)")
+        for cumulative, name in heaviest[1:args.top + 1]:
+            print(f"    {cumulative / 1e3:8.1f} ms  {name}")
+    
+    print(f"\nlogin path imports {results['login window'] / max(results['main window'], 1):.0%} "
+          f"of the main window's import time")
+    drawn = first_frame(args.repeat)
+    if isinstance(drawn, float):
+        print(f"login window drawn after         {drawn * 1e3:8.1f} ms")
+    else:
+        print(f"login window drawn after         skipped: {drawn}; run under xvfb-run")
+
+if __name__ == "__main__":
+    main()
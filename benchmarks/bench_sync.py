@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Sync benchmark
+Copies a generated vault to two replica files, syncs them once (the first
+sync between two copies walks the whole change log), then makes a few
+edits, additions and deletions on each side and times the incremental sync.
+SQLite's total_changes counts the rows each side wrote, which should be
+the edited entries and their change log rows, whatever the vault size.
+
+Usage: python benchmarks/bench_sync.py [--entries N] [--edits N]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.password_entry import PasswordEntry
+from services.database_service import DatabaseService
+from services.encryption_service import EncryptionService
+from services.sync_service import LocalReplica, sync
+from vault_generator import BENCHMARK_PASSWORD, generate_vault
+
+def open_replica(path: str) -> DatabaseService:
+    iterations, salt = DatabaseService.read_kdf_params(path)
+    return DatabaseService(db_path=path, encryption_service=EncryptionService(BENCHMARK_PASSWORD, iterations,
+                                                                              salt=salt))
+
+def edit(db_service: DatabaseService, count: int, rng: random.Random, label: str):
+    # A third each of updates, deletions and new entries
+    ids = rng.sample(range(1, db_service.count_entries() + 1), count)
+    for i, entry_id in enumerate(ids):
+        entry = db_service.get_entry(entry_id, lazy=False)
+        if entry is None:
+            continue
+        if i % 3 == 0:
+            entry.password = f"{label}-changed-{i}"
+            db_service.save_entry(entry)
+        elif i % 3 == 1:
+            db_service.delete_entry(entry_id)
+        else:
+            db_service.save_entry(PasswordEntry(website=f"{label}-new-{i}.example.com", password=f"{label}{i}"))
+
+def timed_sync(a: DatabaseService, b: DatabaseService, label: str):
+    before = a.connection.total_changes, b.connection.total_changes
+    start = time.perf_counter()
+    received, sent = sync(LocalReplica(a), LocalReplica(b))
+    elapsed = time.perf_counter() - start
+    written = a.connection.total_changes - before[0] + b.connection.total_changes - before[1]
+    print(f"{label:<18} {elapsed * 1e3:10.1f} ms  {received:>7} received  {sent:>7} sent  {written:>7} rows written")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--edits", type=int, default=15, help="edits on each side before the second sync")
+    args = parser.parse_args()
+    
+    vault = generate_vault(args.entries, verbose=True)
+    with tempfile.TemporaryDirectory() as folder:
+        paths = [os.path.join(folder, name) for name in ("a.db", "b.db")]
+        for path in paths:
+            shutil.copy(vault, path)
+        with open_replica(paths[0]) as a, open_replica(paths[1]) as b:
+            timed_sync(a, b, "first sync")
+            timed_sync(a, b, "nothing changed")
+            rng = random.Random(3)
+            edit(a, args.edits, rng, "a")
+            edit(b, args.edits, rng, "b")
+            timed_sync(a, b, f"{args.edits} edits a side")
+            assert a.change_marker()[0] == b.change_marker()[0]
+
+if __name__ == "__main__":
+    main()
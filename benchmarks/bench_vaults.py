@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Multi-vault benchmark
+Unlocks several generated vaults one after another and then together
+through VaultSet.unlock, whose key derivations overlap on separate threads.
+A ticker thread counts how often it gets to run during a derivation: a KDF
+that holds the GIL starves it. Finally times a cross-vault search against
+searching each vault in turn and sorting the combined results.
+
+Usage: python benchmarks/bench_vaults.py [--vaults N] [--entries N]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.database_service import DatabaseService
+from services.unlock_service import UnlockTask
+from services.vault_set import VaultSet
+from vault_generator import BENCHMARK_PASSWORD, generate_vault
+
+def ticks_during(fn) -> int:
+    # Counts the ticker's iterations while fn runs on the main thread
+    ticks = 0
+    done = threading.Event()
+    
+    def tick():
+        nonlocal ticks
+        while not done.is_set():
+            ticks += 1
+            time.sleep(0.001)
+    
+    ticker = threading.Thread(target=tick, daemon=True)
+    ticker.start()
+    try:
+        fn()
+    finally:
+        done.set()
+        ticker.join()
+    return ticks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vaults", type=int, default=3)
+    parser.add_argument("--entries", type=int, default=10000)
+    args = parser.parse_args()
+    
+    paths = {f"vault{i}": generate_vault(args.entries, seed=i, verbose=True) for i in range(args.vaults)}
+    passwords = {name: BENCHMARK_PASSWORD for name in paths}
+    print(f"{os.cpu_count()} CPUs, {args.vaults} vaults of {args.entries} entries")
+    
+    start = time.perf_counter()
+    ticks = ticks_during(lambda: [UnlockTask(BENCHMARK_PASSWORD, path).result() for path in paths.values()])
+    sequential = time.perf_counter() - start
+    print(f"{'unlock one by one':<24} {sequential * 1e3:10.1f} ms  ({ticks} ticker runs)")
+    
+    start = time.perf_counter()
+    vault_set, errors = VaultSet.unlock(paths, passwords)
+    parallel = time.perf_counter() - start
+    assert not errors, errors
+    print(f"{'VaultSet.unlock':<24} {parallel * 1e3:10.1f} ms  {sequential / parallel:5.2f}x")
+    
+    with vault_set:
+        for query in ("mail", "bank", "zz-no-match"):
+            start = time.perf_counter()
+            combined = [(name, entry) for name, db_service in vault_set.vaults.items()
+                        for entry in db_service.query_entries(search=query)]
+            combined.sort(key=lambda item: (item[1].website, item[0], item[1].id))
+            loop = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            merged = vault_set.search(query)
+            elapsed = time.perf_counter() - start
+            assert [(name, entry.id) for name, entry in merged] == [(name, entry.id) for name, entry in combined]
+            print(f"search {query!r:<17} {elapsed * 1e3:10.1f} ms  (one by one {loop * 1e3:.1f} ms)  "
+                  f"{len(merged)} results")
+            
+            start = time.perf_counter()
+            vault_set.query_entries(search=query, limit=50)
+            print(f"{'  first 50':<24} {(time.perf_counter() - start) * 1e3:10.1f} ms")
+
+if __name__ == "__main__":
+    main()
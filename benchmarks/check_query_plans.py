@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Query plan check
+Builds a throwaway vault, runs ANALYZE and asks SQLite for the plan of every
+listing and query_entries() shape, failing if one stops using its index or
+falls back to a temporary B-tree sort over the whole table. Exits non-zero on a regression.
+
+Usage: python benchmarks/check_query_plans.py [--entries N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.database_service import (DatabaseService, SELECT_ALL_ENTRIES, SELECT_FIRST_PAGE,
+                                       SELECT_NEXT_PAGE, INSERT_ENTRY, SELECT_REUSED_PASSWORDS,
+                                       SELECT_DUPLICATE_LOGINS)
+from services.sync_service import SELECT_CHANGES
+
+SINCE = datetime(2024, 6, 1)
+
+# An equality filter may sort its few matching rows, and the report joins
+# sort only their (few) matches; nothing else may
+SORT_ALLOWED = {"username =", "reused passwords", "duplicate logins"}
+
+# (description, sql, params, index the plan must use)
+def plan_cases():
+    query = DatabaseService.build_entry_query
+    return [
+        ("first page", SELECT_FIRST_PAGE, (500,), 'idx_entries_website'),
+        ("next page", SELECT_NEXT_PAGE, ('site5', 42, 500), 'idx_entries_website'),
+        ("all entries", SELECT_ALL_ENTRIES, (), 'idx_entries_website'),
+        ("order by username", *query(order_by='username', limit=50), 'idx_entries_username'),
+        ("order by date_modified desc", *query(order_by='date_modified', descending=True, limit=50),
+         'idx_entries_date_modified'),
+        ("username =", *query(username='user7'), 'idx_entries_username'),
+        ("website prefix", *query(website_prefix='site1', limit=50), 'idx_entries_website'),
+        ("modified since", *query(modified_since=SINCE, order_by='date_modified'), 'idx_entries_date_modified'),
+        ("substring search, limited", *query(search='mail', limit=50), 'idx_entries_website'),
+        ("reused passwords", SELECT_REUSED_PASSWORDS, (), 'idx_entries_password_fingerprint'),
+        ("duplicate logins", SELECT_DUPLICATE_LOGINS, (), 'idx_entries_website_username'),
+        ("changes since", SELECT_CHANGES, (1000, 2000, 'replica', 'replica', 200), 'idx_entries_entry_uid'),
+    ]
+
+def populate(db_service: DatabaseService, count: int):
+    rng = random.Random(7)
+    rows = []
+    for i in range(count):
+        modified = SINCE + timedelta(minutes=rng.randint(-500000, 500000))
+        rows.append((f"site{rng.randint(0, count)}.example.com", f"user{rng.randint(0, count // 3)}",
+                     f"user{i}@mail.example.org", "ciphertext", "", modified.isoformat(), modified.isoformat(),
+                     rng.randrange(count).to_bytes(32, 'big'), f"uid{i}"))
+    with db_service.transaction() as conn:
+        conn.executemany(INSERT_ENTRY, rows)
+        conn.execute('ANALYZE')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=20000)
+    args = parser.parse_args()
+    
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        with DatabaseService(db_path=os.path.join(directory, "plans.db")) as db_service:
+            populate(db_service, args.entries)
+            for description, sql, params, index in plan_cases():
+                plan = ' | '.join(row[3] for row in db_service.connection.execute('EXPLAIN QUERY PLAN ' + sql, params))
+                ok = index in plan and ('TEMP B-TREE' not in plan or description in SORT_ALLOWED)
+                failures += not ok
+                print(f"{'ok ' if ok else 'BAD'} {description:<30} {plan}")
+    
+    print(f"{failures} regression(s)" if failures else "all plans use their indexes")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
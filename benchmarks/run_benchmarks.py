@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite
+Times every hot path against synthetic vaults (see vault_generator.py):
+unlock, vault open, full and paged loads, save/update/delete throughput,
+search index build and filtering, and Treeview population and scrolling.
+The Tk benchmarks need a display; run under `xvfb-run` on a headless box,
+otherwise they are reported as skipped.
+
+Results are written as JSON; --compare flags benchmarks that got slower
+than a previous results file, for checking a commit against its parent.
+
+Usage: python benchmarks/run_benchmarks.py [--sizes 1000,10000,100000] [--output FILE]
+                                           [--compare OLD.json] [--threshold 1.2]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from models.password_entry import PasswordEntry
+from services.database_service import DatabaseService
+from services.encryption_service import EncryptionService
+from services.search_index import SearchIndex
+from vault_generator import BENCHMARK_PASSWORD, generate_vault
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+SEARCH_QUERIES = ("user1", "example.org", "recovery code 12", "zq")
+
+WRITE_OPS = 200
+
+class Results:
+    def __init__(self):
+        self.records: List[Dict] = []
+    
+    def time(self, name: str, entries: int, fn: Callable[[], object], repeat: int,
+             ops: Optional[int] = None, setup: Optional[Callable[[], None]] = None):
+        samples = []
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        record = {"benchmark": name, "entries": entries, "repeat": repeat,
+                  "median_s": statistics.median(samples), "min_s": min(samples)}
+        if ops:
+            record["ops_per_s"] = ops / record["median_s"]
+        self._add(record)
+    
+    def skip(self, name: str, entries: int, reason: str):
+        self._add({"benchmark": name, "entries": entries, "skipped": reason})
+    
+    def _add(self, record: Dict):
+        self.records.append(record)
+        if "skipped" in record:
+            print(f"  {record['benchmark']:<28} skipped: {record['skipped']}")
+        else:
+            extra = f" ({record['ops_per_s']:,.0f} ops/s)" if "ops_per_s" in record else ""
+            print(f"  {record['benchmark']:<28} {record['median_s'] * 1e3:>10.2f} ms{extra}")
+
+def search_harness(entries: List[PasswordEntry]):
+    # A MainWindow without Tk: the real _search_rows/_row_values code over loaded entries
+    from gui.main_window import MainWindow
+    from gui.entry_view import EntryView
+    harness = MainWindow.__new__(MainWindow)
+    harness.entries = entries
+    harness._entries_by_id = {entry.id: entry for entry in entries}
+    harness.search_index = SearchIndex()
+    harness.search_index.add_many(entries)
+    harness.filtered_entries = EntryView(entries, harness._entries_by_id, harness._sort_key)
+    return harness
+
+def bench_unlock(results: Results, path: str, repeat: int):
+    iterations = DatabaseService.read_kdf_iterations(path)
+    results.time(f"unlock ({iterations} iter)", 0, lambda: EncryptionService(BENCHMARK_PASSWORD, iterations), repeat)
+    return EncryptionService(BENCHMARK_PASSWORD, iterations)
+
+def bench_vault(results: Results, size: int, path: str, encryption_service: EncryptionService, repeat: int):
+    # Large vaults get fewer rounds so a 1M run finishes in reasonable time
+    heavy = max(1, min(repeat, 100000 // size))
+    results.time("open vault", size, lambda: DatabaseService(db_path=path).close(), repeat)
+    
+    with DatabaseService(db_path=path, encryption_service=encryption_service) as db_service:
+        results.time("first page (500)", size, lambda: db_service.get_entries_page(500), repeat)
+        results.time("get_all_entries lazy", size, db_service.get_all_entries, heavy)
+        results.time("get_all_entries eager", size, lambda: db_service.get_all_entries(lazy=False), 1)
+        
+        saved: List[PasswordEntry] = []
+        
+        def save_all():
+            for i in range(WRITE_OPS):
+                entry = PasswordEntry(website=f"bench{i}.example.com", username="bench", password=f"pw{i}")
+                db_service.save_entry(entry)
+                saved.append(entry)
+        
+        def update_all():
+            for entry in saved:
+                entry.notes = "updated"
+                db_service.save_entry(entry)
+        
+        def delete_all():
+            for entry in saved:
+                db_service.delete_entry(entry.id)
+            saved.clear()
+        
+        # Each round starts from the same vault: setup removes what the previous round wrote
+        results.time("save_entry", size, save_all, repeat, ops=WRITE_OPS, setup=delete_all)
+        results.time("save_entry (update)", size, update_all, repeat, ops=WRITE_OPS)
+        results.time("delete_entry", size, delete_all, repeat, ops=WRITE_OPS,
+                     setup=lambda: (delete_all(), save_all()))
+        
+        entries = db_service.get_all_entries()
+    
+    harness = search_harness(entries)
+    results.time("search index build", size, lambda: SearchIndex().add_many(entries), heavy)
+    for query in SEARCH_QUERIES:
+        results.time(f"search '{query}'", size, lambda: harness._search_rows(query), repeat)
+    bench_tree(results, size, harness, repeat)
+
+def bench_tree(results: Results, size: int, harness, repeat: int):
+    import tkinter as tk
+    from tkinter import ttk
+    from gui.virtual_tree import VirtualTreeview
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        for name in ("refresh_tree", "scroll 100 steps"):
+            results.skip(name, size, f"no display ({e}); run under xvfb-run")
+        return
+    
+    try:
+        root.geometry("1000x600")
+        tree = ttk.Treeview(root, columns=("website", "username", "email", "password", "notes"),
+                            show="headings", selectmode="browse")
+        scrollbar = ttk.Scrollbar(root, orient=tk.VERTICAL)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        view = VirtualTreeview(tree, scrollbar, harness._row_values, lambda entry: str(entry.id),
+                               harness._filtered_index_of)
+        root.update()
+        
+        def refresh():
+            view.set_rows(harness.filtered_entries)
+            root.update_idletasks()
+        
+        def scroll():
+            step = max(1, len(harness.filtered_entries) // 100)
+            for i in range(100):
+                view._scroll_to(i * step)
+            root.update_idletasks()
+        
+        results.time("refresh_tree", size, refresh, repeat)
+        results.time("scroll 100 steps", size, scroll, repeat)
+    finally:
+        root.destroy()
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count()}
+
+def compare(records: List[Dict], baseline_path: str, threshold: float) -> int:
+    with open(baseline_path) as f:
+        baseline = {(r["benchmark"], r["entries"]): r for r in json.load(f)["results"] if "median_s" in r}
+    regressions = 0
+    print(f"\ncompared with {baseline_path} (slower than x{threshold} is flagged)")
+    for record in records:
+        old = baseline.get((record["benchmark"], record["entries"]))
+        if old is None or "median_s" not in record:
+            continue
+        ratio = record["median_s"] / old["median_s"]
+        flag = "SLOWER" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(f"  {record['benchmark']:<28} {record['entries']:>8} x{ratio:5.2f} {flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated vault sizes, e.g. 1000,10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args()
+    
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = Results()
+    encryption_service = None
+    for size in sizes:
+        print(f"vault of {size} entries")
+        path = generate_vault(size, verbose=True)
+        if encryption_service is None:
+            encryption_service = bench_unlock(results, path, min(args.repeat, 3))
+        bench_vault(results, size, path, encryption_service, args.repeat)
+    
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results.records}, f, indent=2)
+    print(f"\nresults written to {args.output}")
+    if args.compare:
+        return 1 if compare(results.records, args.compare, args.threshold) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
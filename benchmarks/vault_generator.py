@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Synthetic vault generator
+Builds reproducible vaults of any size through DatabaseService so the
+benchmarks run against the real schema, indexes and ciphertext format.
+Generated vaults are cached by size and seed; pass --force to rebuild.
+
+Usage: python benchmarks/vault_generator.py [--entries N] [--seed N] [--force]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.password_entry import PasswordEntry
+from services.database_service import DatabaseService
+from services.encryption_service import EncryptionService, DEFAULT_ITERATIONS
+
+BENCHMARK_PASSWORD = "benchmark-master-password"
+
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "password-manager-benchmarks")
+
+DOMAINS = ("example.com", "example.org", "mail.example.net", "shop.example.io", "bank.example.co.uk")
+
+def make_entries(count: int, seed: int = 0) -> Iterator[PasswordEntry]:
+    # Deterministic for a given seed; yields so a 1M vault is never held in memory
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    for i in range(count):
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+        created = start + timedelta(seconds=rng.randint(0, 4 * 365 * 86400))
+        yield PasswordEntry(
+            website=f"{word}{i}.{rng.choice(DOMAINS)}",
+            username=f"user{rng.randint(0, max(1, count // 4))}",
+            email=f"{word}@{rng.choice(DOMAINS)}",
+            password=''.join(rng.choice(string.ascii_letters + string.digits) for _ in range(rng.randint(12, 24))),
+            notes=f"recovery code {rng.randint(0, 999999)}" if i % 7 == 0 else "",
+            date_created=created,
+            date_modified=created + timedelta(days=rng.randint(0, 365)),
+        )
+
+def vault_path(count: int, seed: int = 0) -> str:
+    return os.path.join(CACHE_DIR, f"vault-{count}-seed{seed}.db")
+
+def generate_vault(count: int, seed: int = 0, path: Optional[str] = None, force: bool = False,
+                   iterations: int = DEFAULT_ITERATIONS, verbose: bool = False) -> str:
+    """Return the path of a vault holding `count` synthetic entries, building it if needed."""
+    path = path or vault_path(count, seed)
+    if not force and os.path.exists(path):
+        with DatabaseService(db_path=path) as db_service:
+            if db_service.count_entries() == count:
+                return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    
+    # Built under a temporary name so an interrupted run never leaves a short vault behind
+    tmp_path = path + ".building"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(tmp_path + suffix):
+            os.remove(tmp_path + suffix)
+    started = time.perf_counter()
+    
+    def report(done, elapsed):
+        if verbose:
+            print(f"\r  generating {count} entries: {done}/{count} ({done / max(elapsed, 1e-9):,.0f}/s)",
+                  end='', flush=True)
+    
+    encryption_service = EncryptionService(BENCHMARK_PASSWORD, iterations)
+    with DatabaseService(db_path=tmp_path, encryption_service=encryption_service) as db_service:
+        db_service.import_entries(make_entries(count, seed), progress=report)
+    os.replace(tmp_path, path)
+    if verbose:
+        print(f"\r  generated {count} entries in {time.perf_counter() - started:.1f}s -> {path}")
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="vault path (default: cached under the temp directory)")
+    parser.add_argument("--force", action="store_true", help="rebuild even if a cached vault exists")
+    args = parser.parse_args()
+    print(generate_vault(args.entries, args.seed, args.output, args.force, verbose=True))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Secure Password Manager - command line interface
+Scripted lookups and bulk operations without Tk. When an agent
+(`cli.py agent start`) holds the vault unlocked, list/get/search/add are
+answered by it instead of paying for the key derivation on every call.
+"""
+
+import sys
+import os
+import argparse
+import getpass
+import json
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.agent_service import AgentClient, VaultAgent, VaultSession, entry_to_dict
+from services.breach_service import BreachIndex, DEFAULT_BITS_PER_ENTRY, build_index, default_index_path
+from services.backup_service import export_archive, is_archive, iter_archive
+from services.database_service import DatabaseService, IMPORT_BATCH_SIZE, ORDER_COLUMNS
+from services.encryption_service import InvalidMasterPassword
+from services.import_service import iter_file
+from services.password_generator import (CHARACTER_CLASSES, DEFAULT_SYMBOLS, PassphrasePolicy,
+                                         PasswordPolicy)
+from services.rekey_service import VaultRekey
+from services.sync_service import LocalReplica, RemoteReplica, sync
+from services.unlock_service import UnlockTask
+from services.vault_registry import DEFAULT_VAULT, VaultRegistry
+from services.vault_set import VaultSet
+from services import instrumentation
+
+def open_vault(db_path=None) -> DatabaseService:
+    """Prompt for the master password and return an unlocked DatabaseService"""
+    db_path = db_path or DatabaseService.default_db_path()
+    master_password = getpass.getpass("Master password: ")
+    if not master_password:
+        raise SystemExit("A master password is required.")
+    if DatabaseService.read_kdf_iterations(db_path) is None:
+        # New vault: the password is set here, so make sure it was typed right
+        if getpass.getpass("Confirm master password: ") != master_password:
+            raise SystemExit("Passwords do not match.")
+    
+    encryption_service = UnlockTask(master_password, db_path).result()
+    return DatabaseService(db_path=db_path, encryption_service=encryption_service)
+
+def open_vaults(registry: VaultRegistry) -> VaultSet:
+    """Unlock every registered vault that exists, deriving the keys in parallel.
+    
+    One password is asked for and tried on all of them; vaults that reject
+    it are asked for their own.
+    """
+    paths = {name: path for name, path in registry.items() if os.path.exists(path)}
+    if not paths:
+        raise SystemExit("No vaults have been created yet.")
+    master_password = getpass.getpass("Master password: ")
+    vaults, errors = VaultSet.unlock(paths, dict.fromkeys(paths, master_password))
+    for name, error in errors.items():
+        if isinstance(error, InvalidMasterPassword):
+            password = getpass.getpass(f"Master password for {name}: ")
+            opened, failed = VaultSet.unlock({name: paths[name]}, {name: password})
+            error = failed.get(name)
+            if error is None:
+                vaults.add(name, opened.vaults[name])
+                continue
+        print(f"Skipping vault {name}: {error}")
+    return vaults
+
+def vault_request(args, op: str, **params):
+    """Run one request through the agent serving this vault, or unlock the vault for it"""
+    db_path = os.path.abspath(args.db or DatabaseService.default_db_path())
+    if not args.no_agent:
+        client = AgentClient(args.socket)
+        try:
+            try:
+                status = client.request('ping')
+            except OSError:
+                status = {}
+            if status.get('ok') and status['result'].get('vault') == db_path:
+                # Once sent, the request is never run again here: the agent may have carried it out
+                try:
+                    return unwrap(client.request(op, **params))
+                except OSError as e:
+                    raise SystemExit(f"Lost the connection to the agent: {e}")
+        finally:
+            client.close()
+    
+    with open_vault(db_path) as db_service:
+        return unwrap(VaultSession(db_service).handle(dict(params, op=op)))
+
+def unwrap(response: dict):
+    if not response.get('ok'):
+        raise RuntimeError(response.get('error', "Request failed"))
+    return response.get('result')
+
+def print_entries(entries, as_json: bool):
+    if as_json:
+        print(json.dumps(entries, indent=2))
+        return
+    for entry in entries:
+        # Results from several vaults say which one each entry is in
+        vault = f"{entry['vault']:<12} " if 'vault' in entry else ""
+        print(f"{vault}{entry['id']:>6}  {entry['website']:<32} {entry['username']:<20} {entry['email']}")
+    print(f"({len(entries)} entries)")
+
+def prompt_new_passphrase(prompt: str) -> str:
+    passphrase = getpass.getpass(f"{prompt}: ")
+    if not passphrase:
+        raise SystemExit("A passphrase is required.")
+    if getpass.getpass(f"Confirm {prompt[0].lower()}{prompt[1:]}: ") != passphrase:
+        raise SystemExit("Passphrases do not match.")
+    return passphrase
+
+def policy_from_args(args):
+    if args.words:
+        return PassphrasePolicy(args.words, args.separator, args.wordlist, args.capitalize)
+    required = [name.strip() for name in args.require.split(',') if name.strip()] if args.require else None
+    return PasswordPolicy(args.length, not args.no_lowercase, not args.no_uppercase, not args.no_digits,
+                          args.symbols, required, args.exclude_ambiguous, args.exclude)
+
+def cmd_list(args):
+    print_entries(vault_request(args, 'list', limit=args.limit, offset=args.offset, order_by=args.order_by,
+                                descending=args.descending), args.json)
+
+def cmd_search(args):
+    if args.all_vaults:
+        with open_vaults(VaultRegistry()) as vaults:
+            results = vaults.search(args.query, args.limit)
+            print_entries([dict(entry_to_dict(entry), vault=name) for name, entry in results], args.json)
+        return
+    print_entries(vault_request(args, 'search', query=args.query, limit=args.limit), args.json)
+
+def cmd_get(args):
+    entry = vault_request(args, 'get', name=args.name, password=args.password or args.json)
+    if args.json:
+        print(json.dumps(entry, indent=2))
+    elif args.password:
+        # Only the password, so it can be piped
+        print(entry['password'])
+    else:
+        for field in ('id', 'website', 'username', 'email', 'notes', 'date_modified'):
+            print(f"{field}: {entry[field]}")
+
+def cmd_add(args):
+    if args.generate:
+        password = policy_from_args(args).generate()[0]
+    elif args.password_stdin:
+        password = sys.stdin.readline().rstrip('\n')
+    else:
+        password = prompt_new_passphrase("Entry password")
+    entry = vault_request(args, 'add', website=args.website, username=args.username, email=args.email,
+                          notes=args.notes, password=password)
+    suffix = " with a generated password" if args.generate else ""
+    print(f"Added entry {entry['id']} for {entry['website']}{suffix}")
+
+def cmd_generate(args):
+    # Only the passwords go to stdout, so the output can be piped straight into provisioning
+    policy = policy_from_args(args)
+    passwords = policy.generate(args.count)
+    if args.json:
+        print(json.dumps({'policy': policy.describe(), 'entropy_bits': policy.entropy_bits(),
+                          'passwords': passwords}, indent=2))
+        return
+    print(f"{args.count} x {policy.describe()}", file=sys.stderr)
+    print('\n'.join(passwords))
+
+def cmd_report(args):
+    report = vault_request(args, 'report')
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for title, key in (("Reused passwords", 'reused_passwords'), ("Duplicate logins", 'duplicate_logins')):
+        print(f"{title}: {len(report[key])} group(s)")
+        for group in report[key]:
+            print("  " + ", ".join(f"{entry['website']} ({entry['username'] or 'no username'}, id {entry['id']})"
+                                   for entry in group))
+    if report['undecryptable']:
+        print(f"{report['undecryptable']} entries could not be decrypted and were left out.")
+
+def cmd_breach(args):
+    index_path = os.path.abspath(args.index or default_index_path())
+    if args.action == 'build':
+        if not args.corpus:
+            raise SystemExit("breach build needs the path of a SHA-1 hash list.")
+        
+        def report(stage, count):
+            print(f"\r  {stage:<6} {count:>15,} hashes", end='', flush=True)
+        
+        count = build_index(args.corpus, index_path, args.bits_per_entry, progress=report)
+        print(f"\nIndexed {count:,} breached password hashes into {index_path}")
+    elif args.action == 'test':
+        with BreachIndex(index_path) as index:
+            found = index.contains_password(getpass.getpass("Password to check: "))
+        print("Found in the breach list." if found else "Not found in the breach list.")
+        return 1 if found else 0
+    else:
+        if not os.path.exists(index_path):
+            raise SystemExit(f"No breach index at {index_path}; build one with 'cli.py breach build'.")
+        result = vault_request(args, 'breaches', index=index_path)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print_entries(result['breached'], False)
+            print(f"Checked {result['checked']} entries in {result['seconds']:.2f}s: "
+                  f"{len(result['breached'])} use a breached password.")
+        return 1 if result['breached'] else 0
+
+def cmd_agent(args):
+    if args.action == 'start':
+        db_service = open_vault(args.db)
+        agent = VaultAgent(db_service, args.socket, args.timeout)
+        print(f"Agent serving {db_service.db_path} on {agent.socket_path} (Ctrl+C to stop)")
+        try:
+            agent.run()
+        except KeyboardInterrupt:
+            pass
+        print("Agent stopped; vault locked.")
+        return
+    
+    with AgentClient(args.socket) as client:
+        try:
+            if args.action == 'stop':
+                unwrap(client.request('stop'))
+                print("Agent stopped.")
+            else:
+                status = unwrap(client.request('ping'))
+                print(f"Agent serving {status['vault']}: {status['entries']} entries, "
+                      f"up {status['uptime']:.0f}s")
+        except OSError:
+            raise SystemExit("No agent is running.")
+
+def cmd_import(args):
+    if not os.path.isfile(args.file):
+        raise SystemExit(f"No such file: {args.file}")
+    if is_archive(args.file):
+        entries = iter_archive(args.file, getpass.getpass("Archive passphrase: "))
+    else:
+        entries = iter_file(args.file, args.format)
+    
+    def report(imported, elapsed):
+        rate = imported / elapsed if elapsed else 0
+        print(f"\rImported {imported} entries ({rate:,.0f} entries/s)", end='', flush=True)
+    
+    with open_vault(args.db) as db_service:
+        try:
+            imported = db_service.import_entries(entries, batch_size=args.batch_size, progress=report)
+        finally:
+            print()
+    print(f"Done: {imported} entries imported into {db_service.db_path}")
+
+def cmd_export(args):
+    with open_vault(args.db) as db_service:
+        passphrase = prompt_new_passphrase("Archive passphrase")
+        try:
+            exported = export_archive(db_service, args.file, passphrase,
+                                      progress=lambda count: print(f"\rExported {count} entries", end='', flush=True))
+        finally:
+            print()
+    print(f"Done: {exported} entries written to {args.file}")
+
+def cmd_passwd(args):
+    with open_vault(args.db) as db_service:
+        new_password = prompt_new_passphrase("New master password")
+        rekey = VaultRekey(db_service, new_password)
+        try:
+            rekey.run(progress=lambda done, total: print(f"\rRe-encrypted {done}/{total} entries",
+                                                       end='', flush=True))
+        finally:
+            print()
+        if rekey.resumed:
+            print("Resumed an interrupted password change.")
+        db_service.attach_encryption_service(rekey.finish())
+    if rekey.failed_ids:
+        print(f"Warning: {len(rekey.failed_ids)} entries could not be decrypted and were left as they were "
+              f"(ids {', '.join(map(str, sorted(rekey.failed_ids)))}).")
+    print(f"Done: master password of {db_service.db_path} changed.")
+
+def cmd_sync(args):
+    if args.other is None and not args.agent:
+        raise SystemExit("Give the vault to sync with, or --agent for the one the agent serves.")
+    
+    def report(direction, count):
+        print(f"\r{direction.capitalize()} {count} changes", end='', flush=True)
+    
+    with open_vault(args.db) as db_service:
+        local = LocalReplica(db_service)
+        if args.agent:
+            with AgentClient(args.socket) as client:
+                try:
+                    received, sent = sync(local, RemoteReplica(client), progress=report)
+                except OSError:
+                    raise SystemExit("No agent is running.")
+                finally:
+                    print()
+        else:
+            print(f"Unlocking {args.other}")
+            with open_vault(args.other) as other_service:
+                remote = LocalReplica(other_service)
+                try:
+                    received, sent = sync(local, remote, progress=report)
+                finally:
+                    print()
+                local.failed_uids.extend(remote.failed_uids)
+    if local.failed_uids:
+        print(f"Warning: {len(local.failed_uids)} entries could not be decrypted and were not sent.")
+    print(f"Done: {received} changes received, {sent} sent.")
+
+def cmd_vaults(args):
+    registry = VaultRegistry()
+    if args.action == 'add':
+        if not args.name:
+            raise SystemExit("Give the new vault a name.")
+        print(f"Registered vault {args.name} at {registry.add(args.name, args.path)}; "
+              f"it is created when first unlocked (e.g. cli.py --vault {args.name} list).")
+    elif args.action == 'remove':
+        if not args.name:
+            raise SystemExit("Give the name of the vault to forget.")
+        registry.remove(args.name)
+        print(f"Forgot vault {args.name}; its file was left in place.")
+    else:
+        for name, path in registry.items():
+            state = "" if os.path.exists(path) else "  (not created yet)"
+            marker = "*" if name == DEFAULT_VAULT else " "
+            print(f"{marker} {name:<16} {path}{state}")
+
+def cmd_backup(args):
+    # Copies the encrypted database as is, so no password is needed
+    db_service = DatabaseService(db_path=args.db)
+    try:
+        db_service.backup(args.file, progress=lambda copied, total: print(
+            f"\rCopied {copied}/{total} pages", end='', flush=True))
+    finally:
+        print()
+        db_service.close()
+    print(f"Done: {db_service.db_path} backed up to {args.file}")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Secure Password Manager command line interface")
+    vault = parser.add_mutually_exclusive_group()
+    vault.add_argument('--db', help="vault database path (default: ~/PasswordManager/passwords.db)")
+    vault.add_argument('--vault', help="name of a registered vault (see the vaults command)")
+    parser.add_argument('--profile', nargs='?', const='', metavar='PATH',
+                        help="time hot paths and write the results to PATH on exit")
+    parser.add_argument('--socket', help="agent socket path (default: ~/PasswordManager/agent.sock)")
+    parser.add_argument('--no-agent', action='store_true', help="unlock the vault even if an agent is running")
+    commands = parser.add_subparsers(dest='command', required=True)
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument('--json', action='store_true', help="print results as JSON")
+    
+    policy = argparse.ArgumentParser(add_help=False)
+    policy.add_argument('--length', type=int, default=16)
+    policy.add_argument('--no-lowercase', action='store_true')
+    policy.add_argument('--no-uppercase', action='store_true')
+    policy.add_argument('--no-digits', action='store_true')
+    policy.add_argument('--symbols', default=DEFAULT_SYMBOLS, help="symbol characters to use ('' for none)")
+    policy.add_argument('--require', help=f"comma-separated classes each password must contain "
+                                          f"(default: every enabled one of {', '.join(CHARACTER_CLASSES)})")
+    policy.add_argument('--exclude-ambiguous', action='store_true', help="leave out look-alikes such as l, 1 and O")
+    policy.add_argument('--exclude', default='', help="characters to leave out")
+    policy.add_argument('--words', type=int, help="generate a passphrase of this many words instead")
+    policy.add_argument('--separator', default='-', help="between passphrase words")
+    policy.add_argument('--wordlist', help="one word per line, or a diceware list (default: bundled list)")
+    policy.add_argument('--capitalize', action='store_true', help="capitalize passphrase words")
+    
+    list_parser = commands.add_parser('list', help="list entries", parents=[output])
+    list_parser.add_argument('--limit', type=int, default=50)
+    list_parser.add_argument('--offset', type=int, default=0)
+    list_parser.add_argument('--order-by', choices=ORDER_COLUMNS, default='website')
+    list_parser.add_argument('--descending', action='store_true')
+    list_parser.set_defaults(handler=cmd_list)
+    
+    search_parser = commands.add_parser('search', help="find entries by website, username, email or notes",
+                                        parents=[output])
+    search_parser.add_argument('query')
+    search_parser.add_argument('--limit', type=int, default=50)
+    search_parser.add_argument('--all-vaults', action='store_true', help="search every registered vault")
+    search_parser.set_defaults(handler=cmd_search)
+    
+    get_parser = commands.add_parser('get', help="show one entry, by website name or id", parents=[output])
+    get_parser.add_argument('name')
+    get_parser.add_argument('--password', action='store_true', help="print only the password")
+    get_parser.set_defaults(handler=cmd_get)
+    
+    add_parser = commands.add_parser('add', help="add an entry", parents=[policy])
+    add_parser.add_argument('website')
+    add_parser.add_argument('--username', default='')
+    add_parser.add_argument('--email', default='')
+    add_parser.add_argument('--notes', default='')
+    add_parser.add_argument('--password-stdin', action='store_true',
+                            help="read the entry password from the first line of stdin instead of prompting")
+    add_parser.add_argument('--generate', action='store_true',
+                            help="generate the entry password with the policy options")
+    add_parser.set_defaults(handler=cmd_add)
+    
+    generate_parser = commands.add_parser('generate', help="generate passwords or passphrases in bulk",
+                                          parents=[output, policy])
+    generate_parser.add_argument('-n', '--count', type=int, default=1)
+    generate_parser.set_defaults(handler=cmd_generate)
+    
+    report_parser = commands.add_parser('report', help="find reused passwords and duplicate logins",
+                                        parents=[output])
+    report_parser.set_defaults(handler=cmd_report)
+    
+    breach_parser = commands.add_parser('breach', help="check passwords against a local breach hash list",
+                                        parents=[output])
+    breach_parser.add_argument('action', choices=('build', 'check', 'test'),
+                               help="build the index from a SHA-1 list, check the vault, or test one password")
+    breach_parser.add_argument('corpus', nargs='?', help="SHA-1 hash list, one hex hash per line (for build)")
+    breach_parser.add_argument('--index', help="breach index path (default: ~/PasswordManager/breach.idx)")
+    breach_parser.add_argument('--bits-per-entry', type=int, default=DEFAULT_BITS_PER_ENTRY,
+                               help="Bloom filter size; 0 leaves the filter out")
+    breach_parser.set_defaults(handler=cmd_breach)
+    
+    agent_parser = commands.add_parser('agent', help="keep the vault unlocked in a local agent for fast lookups")
+    agent_parser.add_argument('action', choices=('start', 'stop', 'status'))
+    agent_parser.add_argument('--timeout', type=float,
+                              help="lock and exit after this many idle seconds (default: 900, 0 = never)")
+    agent_parser.set_defaults(handler=cmd_agent)
+    
+    import_parser = commands.add_parser('import', help="import entries exported from another password manager")
+    import_parser.add_argument('file', help="CSV, JSON or JSON Lines export, or an archive made by 'export'")
+    import_parser.add_argument('--format', choices=('csv', 'json'),
+                               help="input format (default: guessed from the file extension)")
+    import_parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                               help=f"entries per transaction (default: {IMPORT_BATCH_SIZE})")
+    import_parser.set_defaults(handler=cmd_import)
+    
+    export_parser = commands.add_parser('export', help="write an encrypted, compressed archive of all entries")
+    export_parser.add_argument('file', help="archive to create")
+    export_parser.set_defaults(handler=cmd_export)
+    
+    passwd_parser = commands.add_parser('passwd', help="change the master password and re-encrypt the vault")
+    passwd_parser.set_defaults(handler=cmd_passwd)
+    
+    sync_parser = commands.add_parser('sync', help="exchange changes with another copy of the vault")
+    sync_parser.add_argument('other', nargs='?', help="the other vault database")
+    sync_parser.add_argument('--agent', action='store_true', help="sync with the vault the agent serves")
+    sync_parser.set_defaults(handler=cmd_sync)
+    
+    vaults_parser = commands.add_parser('vaults', help="list, add or remove named vaults")
+    vaults_parser.add_argument('action', nargs='?', choices=('list', 'add', 'remove'), default='list')
+    vaults_parser.add_argument('name', nargs='?')
+    vaults_parser.add_argument('path', nargs='?', help="database file for a new vault "
+                                                       "(default: ~/PasswordManager/vaults/NAME.db)")
+    vaults_parser.set_defaults(handler=cmd_vaults)
+    
+    backup_parser = commands.add_parser('backup', help="snapshot the vault database while it is in use")
+    backup_parser.add_argument('file', help="backup database to create")
+    backup_parser.set_defaults(handler=cmd_backup)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile is not None:
+        instrumentation.enable(args.profile or None)
+    else:
+        instrumentation.enable_from_env()
+    try:
+        if args.vault:
+            args.db = VaultRegistry().path_of(args.vault)
+        # Handlers may return an exit status (e.g. 1 when breached passwords were found)
+        return args.handler(args) or 0
+    except KeyboardInterrupt:
+        print("\nInterrupted.")
+        return 1
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
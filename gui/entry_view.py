@@ -0,0 +1,64 @@
+import bisect
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional
+from models.password_entry import PasswordEntry
+
+class EntryView:
+    """Ordered, filtered view over the master entry list, indexed like a list.
+    
+    A filtered view keeps the matching entry ids in a compact array and
+    resolves them through the id map, so a search never copies entries and
+    the view survives inserts into the master list. Without ids it is the
+    master list itself (no search active).
+    """
+    
+    def __init__(self, entries: List[PasswordEntry], entries_by_id: Dict[int, PasswordEntry],
+                 sort_key: Callable[[PasswordEntry], tuple], ids: Optional[Iterable[int]] = None):
+        self.entries = entries
+        self.entries_by_id = entries_by_id
+        self.sort_key = sort_key
+        self.ids: Optional[array] = None if ids is None else array('I', ids)
+    
+    @classmethod
+    def from_matches(cls, entries: List[PasswordEntry], entries_by_id: Dict[int, PasswordEntry],
+                     sort_key: Callable[[PasswordEntry], tuple], matches: Iterable[int]) -> 'EntryView':
+        # Ids unknown to the map (e.g. removed meanwhile) are dropped
+        keyed = [(sort_key(entry), entry.id) for entry in map(entries_by_id.get, matches) if entry is not None]
+        keyed.sort()
+        return cls(entries, entries_by_id, sort_key, (entry_id for _, entry_id in keyed))
+    
+    def __len__(self) -> int:
+        return len(self.entries) if self.ids is None else len(self.ids)
+    
+    def __getitem__(self, index: int) -> PasswordEntry:
+        if self.ids is None:
+            return self.entries[index]
+        return self.entries_by_id[self.ids[index]]
+    
+    def index(self, entry: PasswordEntry) -> int:
+        # Position of entry by its sort key, or -1
+        key = self.sort_key(entry)
+        index = bisect.bisect_left(self, key, key=self.sort_key)
+        if index < len(self) and self.sort_key(self[index]) == key:
+            return index
+        return -1
+    
+    def insert(self, entry: PasswordEntry):
+        # The master list is patched by the caller; the entry must already be in the id map
+        if self.ids is not None:
+            bisect.insort(self.ids, entry.id, key=self._id_key)
+    
+    def remove(self, entry: PasswordEntry):
+        # Call before the entry leaves the id map
+        if self.ids is not None:
+            index = self.index(entry)
+            if index >= 0:
+                del self.ids[index]
+    
+    def extend(self, entries: Iterable[PasswordEntry]):
+        # Entries must sort after everything already in the view
+        if self.ids is not None:
+            self.ids.extend(entry.id for entry in entries)
+    
+    def _id_key(self, entry_id: int) -> tuple:
+        return self.sort_key(self.entries_by_id[entry_id])
@@ -1,18 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import secrets
-import string
+from typing import Callable, Optional
 from models.password_entry import PasswordEntry
+from services.password_generator import PRESETS
 
 class EntryWindow:
-    def __init__(self, parent, entry=None):
+    def __init__(self, parent, entry=None, breach_check: Optional[Callable[[str], bool]] = None):
         self.parent = parent
         self.entry = entry if entry else PasswordEntry()
         self.result = None
+        # Returns True for a password found in the local breach index
+        self.breach_check = breach_check
         
         self.window = tk.Toplevel(parent)
         self.window.title("Add Entry" if not entry else "Edit Entry")
-        self.window.geometry("500x400")
+        self.window.geometry("500x440")
         self.window.resizable(False, False)
         self.window.transient(parent)
         
@@ -37,14 +39,14 @@ class EntryWindow:
         self.window.update_idletasks()
         try:
             x = self.parent.winfo_x() + (self.parent.winfo_width() // 2) - (500 // 2)
-            y = self.parent.winfo_y() + (self.parent.winfo_height() // 2) - (400 // 2)
-            self.window.geometry(f"500x400+{x}+{y}")
+            y = self.parent.winfo_y() + (self.parent.winfo_height() // 2) - (440 // 2)
+            self.window.geometry(f"500x440+{x}+{y}")
         except tk.TclError:
             # If parent window info is not available, center on screen
             self.window.update_idletasks()
             x = (self.window.winfo_screenwidth() // 2) - (500 // 2)
-            y = (self.window.winfo_screenheight() // 2) - (400 // 2)
-            self.window.geometry(f"500x400+{x}+{y}")
+            y = (self.window.winfo_screenheight() // 2) - (440 // 2)
+            self.window.geometry(f"500x440+{x}+{y}")
     
     def _create_widgets(self):
         main_frame = ttk.Frame(self.window, padding="20")
@@ -73,14 +75,26 @@ class EntryWindow:
         generate_btn = ttk.Button(main_frame, text="Generate", command=self._generate_password)
         generate_btn.grid(row=3, column=2, padx=(5, 0), pady=(0, 10))
         
+        # Generator policy and its strength
+        policy_frame = ttk.Frame(main_frame)
+        policy_frame.grid(row=4, column=1, columnspan=2, sticky=tk.W+tk.E, pady=(0, 10))
+        self.policy_var = tk.StringVar(value=next(iter(PRESETS)))
+        policy_box = ttk.Combobox(policy_frame, textvariable=self.policy_var, values=list(PRESETS),
+                                  state="readonly", width=32)
+        policy_box.pack(side=tk.LEFT)
+        policy_box.bind("<<ComboboxSelected>>", lambda e: self._update_strength())
+        self.strength_label = ttk.Label(policy_frame, text="")
+        self.strength_label.pack(side=tk.LEFT, padx=(10, 0))
+        self._update_strength()
+        
         # Notes
-        ttk.Label(main_frame, text="Notes:").grid(row=4, column=0, sticky=tk.W+tk.N, pady=(0, 5))
+        ttk.Label(main_frame, text="Notes:").grid(row=5, column=0, sticky=tk.W+tk.N, pady=(0, 5))
         self.notes_text = tk.Text(main_frame, width=50, height=6)
-        self.notes_text.grid(row=4, column=1, columnspan=2, sticky=tk.W+tk.E, pady=(0, 20))
+        self.notes_text.grid(row=5, column=1, columnspan=2, sticky=tk.W+tk.E, pady=(0, 20))
         
         # Buttons
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=5, column=0, columnspan=3, sticky=tk.W+tk.E)
+        button_frame.grid(row=6, column=0, columnspan=3, sticky=tk.W+tk.E)
         
         ttk.Button(button_frame, text="Cancel", command=self._cancel).pack(side=tk.RIGHT, padx=(5, 0))
         ttk.Button(button_frame, text="Save", command=self._save).pack(side=tk.RIGHT)
@@ -104,11 +118,12 @@ class EntryWindow:
         self.password_entry.insert(0, self.entry.password)
         self.notes_text.insert(tk.END, self.entry.notes)
     
+    def _update_strength(self):
+        policy = PRESETS[self.policy_var.get()]
+        self.strength_label.config(text=f"{policy.entropy_bits():.0f} bits")
+    
     def _generate_password(self):
-        # Generate secure password
-        length = 16
-        characters = string.ascii_letters + string.digits + "!@#$%^&*"
-        password = ''.join(secrets.choice(characters) for _ in range(length))
+        password = PRESETS[self.policy_var.get()].generate()[0]
         
         self.password_entry.delete(0, tk.END)
         self.password_entry.insert(0, password)
@@ -127,6 +142,13 @@ class EntryWindow:
             self.password_entry.focus()
             return
         
+        if self.breach_check is not None and password != self.entry.password and self.breach_check(password):
+            if not messagebox.askyesno("Breached Password",
+                                       "This password appears in a known data breach and may be tried by "
+                                       "attackers.\n\nSave it anyway?", parent=self.window):
+                self.password_entry.focus()
+                return
+        
         self.entry.website = website
         self.entry.username = self.username_entry.get().strip()
         self.entry.email = self.email_entry.get().strip()
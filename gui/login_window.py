@@ -1,12 +1,38 @@
+import importlib
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
+from services.vault_registry import DEFAULT_VAULT, VaultRegistry
+
+# Imported in the background while the login prompt is up, so startup only
+# waits for tkinter and the main window opens without a cryptography/sqlite3 stall
+PRELOAD_MODULES = ('services.unlock_service', 'gui.main_window', 'pyperclip')
+
+def preload(modules=PRELOAD_MODULES) -> threading.Thread:
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                # Raised again, with a proper report, when the module is imported for real
+                pass
+    
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
 
 class LoginWindow:
-    def __init__(self):
+    def __init__(self, session_cache=None, db_path=None):
         self.master_password = None
+        self.unlock_task = None
+        self.session_cache = session_cache
+        self.registry = VaultRegistry()
+        self.db_path = db_path or self.registry.path_of(DEFAULT_VAULT)
+        # The vault picker is only shown once there is more than one vault
+        self.height = 250 if len(self.registry) > 1 else 200
         self.window = tk.Tk()
         self.window.title("Password Manager - Login")
-        self.window.geometry("400x200")
+        self.window.geometry(f"400x{self.height}")
         self.window.resizable(False, False)
         
         # Center the window
@@ -15,12 +41,14 @@ class LoginWindow:
         
         self._create_widgets()
         self._center_window()
+        # Start once the window has been drawn so the imports don't delay it
+        self.window.after_idle(preload)
     
     def _center_window(self):
         self.window.update_idletasks()
         x = (self.window.winfo_screenwidth() // 2) - (400 // 2)
-        y = (self.window.winfo_screenheight() // 2) - (200 // 2)
-        self.window.geometry(f"400x200+{x}+{y}")
+        y = (self.window.winfo_screenheight() // 2) - (self.height // 2)
+        self.window.geometry(f"400x{self.height}+{x}+{y}")
     
     def _create_widgets(self):
         main_frame = ttk.Frame(self.window, padding="20")
@@ -31,6 +59,15 @@ class LoginWindow:
                                font=("Arial", 14, "bold"))
         title_label.pack(pady=(0, 20))
         
+        # Vault
+        self.vault_var = tk.StringVar(value=self.registry.name_of(self.db_path) or DEFAULT_VAULT)
+        if len(self.registry) > 1:
+            vault_frame = ttk.Frame(main_frame)
+            vault_frame.pack(fill=tk.X, pady=(0, 10))
+            ttk.Label(vault_frame, text="Vault:").pack(side=tk.LEFT)
+            ttk.Combobox(vault_frame, textvariable=self.vault_var, values=self.registry.names(),
+                         state="readonly").pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(10, 0))
+        
         # Password entry
         password_frame = ttk.Frame(main_frame)
         password_frame.pack(fill=tk.X, pady=(0, 10))
@@ -66,6 +103,13 @@ class LoginWindow:
             return
         
         self.master_password = password
+        if self.registry.name_of(self.db_path) != self.vault_var.get():
+            self.db_path = self.registry.path_of(self.vault_var.get())
+        from services.unlock_service import UnlockTask
+        # Start deriving the key now unless the session cache can skip it;
+        # the main window picks the task up when it opens
+        if self.session_cache is None or not self.session_cache.matches(password, self.db_path):
+            self.unlock_task = UnlockTask(password, self.db_path)
         self.window.quit()
     
     def _cancel(self):
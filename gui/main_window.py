@@ -1,25 +1,65 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import pyperclip
-from typing import List
+from tkinter import ttk, messagebox, simpledialog
+import bisect
+import copy
+import hmac
+import os
+from typing import List, Optional
 from models.password_entry import PasswordEntry
 from services.database_service import DatabaseService
+from services.edit_queue import Edit, EditQueue
+from services.encryption_service import InvalidMasterPassword
+from services.search_index import SearchIndex
+from services.vault_registry import VaultRegistry
+from services.unlock_service import UnlockTask
+from services.session_cache import SessionKeyCache
+from services.migration_service import CiphertextMigration, FingerprintBackfill
+from services.rekey_service import VaultRekey
+from services import instrumentation
 from gui.entry_window import EntryWindow
+from gui.entry_view import EntryView
+from gui.virtual_tree import VirtualTreeview
+from gui.search_scheduler import SearchScheduler
 
 class MainWindow:
-    def __init__(self, master_password: str):
+    PAGE_SIZE = 500
+    
+    def __init__(self, master_password: str, unlock_task: Optional[UnlockTask] = None):
         self.master_password = master_password
-        self.db_service = DatabaseService(master_password)
+        # Key derivation runs in the background while the window and schema are set up
+        unlock_task = unlock_task or UnlockTask(master_password)
+        self.db_service = DatabaseService(db_path=unlock_task.db_path)
+        # Edits are shown at once and written to the vault shortly after
+        self.edit_queue = EditQueue(self.db_service)
+        self._edit_check_job = None
         self.entries = []
-        self.filtered_entries = []
+        self._entries_by_id = {}
+        # What the tree shows: the whole list, or ids matching the search
+        self.filtered_entries = EntryView(self.entries, self._entries_by_id, self._sort_key)
+        self.search_index = SearchIndex()
+        self._applied_search = ""
+        self._load_after = None
+        self._page_job = None
+        self._unlock_job = None
+        self.session_cache = SessionKeyCache()
+        self._migrations = []
+        self._rekey = None
+        self._rekey_job = None
+        self._breach_index = None
         
         self.window = tk.Tk()
-        self.window.title("Secure Password Manager")
+        self._update_title()
         self.window.geometry("1000x600")
         
         self._create_widgets()
-        self._load_entries()
+        self.search_scheduler = SearchScheduler(self.window, self._search_rows, self._apply_search_result,
+                                                on_error=self._search_failed)
         self._center_window()
+        self._begin_unlock(unlock_task)
+    
+    def _update_title(self):
+        name = VaultRegistry().name_of(self.db_service.db_path)
+        self.window.title(f"Secure Password Manager - {name}" if name else "Secure Password Manager")
     
     def _center_window(self):
         self.window.update_idletasks()
@@ -38,7 +78,9 @@ class MainWindow:
         
         ttk.Button(toolbar, text="Add Entry", command=self._add_entry).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(toolbar, text="Edit", command=self._edit_entry).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(toolbar, text="Delete", command=self._delete_entry).pack(side=tk.LEFT, padx=(0, 15))
+        ttk.Button(toolbar, text="Delete", command=self._delete_entry).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(toolbar, text="Undo", command=self._undo).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(toolbar, text="Redo", command=self._redo).pack(side=tk.LEFT, padx=(0, 15))
         
         # Search
         ttk.Label(toolbar, text="Search:").pack(side=tk.LEFT, padx=(0, 5))
@@ -48,13 +90,18 @@ class MainWindow:
         search_entry.pack(side=tk.LEFT, padx=(0, 15))
         
         ttk.Button(toolbar, text="Lock", command=self._lock_app).pack(side=tk.RIGHT)
+        ttk.Button(toolbar, text="Change Password", command=self._change_master_password).pack(side=tk.RIGHT,
+                                                                                           padx=(0, 5))
+        ttk.Button(toolbar, text="Security Report", command=self._show_security_report).pack(side=tk.RIGHT,
+                                                                                         padx=(0, 5))
         
         # Treeview
         tree_frame = ttk.Frame(main_frame)
         tree_frame.pack(fill=tk.BOTH, expand=True)
         
         # Create treeview with scrollbars
-        self.tree = ttk.Treeview(tree_frame, columns=("website", "username", "email", "password", "notes"), show="headings")
+        self.tree = ttk.Treeview(tree_frame, columns=("website", "username", "email", "password", "notes"),
+                                 show="headings", selectmode="browse")
         
         # Define columns
         self.tree.heading("website", text="Website/Service")
@@ -70,27 +117,25 @@ class MainWindow:
         self.tree.column("password", width=100)
         self.tree.column("notes", width=300)
         
-        # Scrollbars
-        v_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        # Scrollbars; the vertical one drives the virtual list rather than the Treeview itself
+        v_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL)
         h_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        self.tree_view = VirtualTreeview(self.tree, v_scrollbar, self._row_values,
+                                         lambda entry: str(entry.id), self._filtered_index_of)
         
         # Pack treeview and scrollbars
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
         
-        # Context menu
-        self.context_menu = tk.Menu(self.window, tearoff=0)
-        self.context_menu.add_command(label="Copy Username", command=self._copy_username)
-        self.context_menu.add_command(label="Copy Password", command=self._copy_password)
-        self.context_menu.add_command(label="Copy Email", command=self._copy_email)
-        self.context_menu.add_separator()
-        self.context_menu.add_command(label="Edit", command=self._edit_entry)
-        self.context_menu.add_command(label="Delete", command=self._delete_entry)
-        
+        # Context menu, built on first use
+        self.context_menu = None
         self.tree.bind("<Button-3>", self._show_context_menu)  # Right click
         self.tree.bind("<Double-1>", self._edit_entry)  # Double click
+        self.window.bind("<Control-z>", self._undo)
+        self.window.bind("<Control-y>", self._redo)
+        self.window.bind("<Control-Z>", self._redo)  # Ctrl+Shift+Z
         
         # Status bar
         status_frame = ttk.Frame(main_frame)
@@ -101,95 +146,378 @@ class MainWindow:
         
         self.count_label = ttk.Label(status_frame, text="0 entries")
         self.count_label.pack(side=tk.RIGHT)
+        
+        self.unlock_progress = ttk.Progressbar(status_frame, mode="determinate", maximum=1.0, length=150)
+        
+        # Live timings, only when instrumentation is switched on
+        if instrumentation.enabled():
+            self.stats_label = ttk.Label(status_frame, text="", foreground="gray")
+            self.stats_label.pack(side=tk.RIGHT, padx=(0, 15))
+            self._update_stats()
     
-    def _load_entries(self):
+    def _update_stats(self):
+        self.stats_label.config(text=instrumentation.summary_line())
+        self.window.after(1000, self._update_stats)
+    
+    def _begin_unlock(self, unlock_task: UnlockTask):
+        self._unlock_task = unlock_task
+        self.status_label.config(text="Unlocking...")
+        self.unlock_progress.pack(side=tk.RIGHT, padx=(0, 10))
+        self._poll_unlock()
+    
+    def _poll_unlock(self):
+        self._unlock_job = None
+        if not self._unlock_task.done():
+            self.unlock_progress["value"] = self._unlock_task.progress()
+            self._unlock_job = self.window.after(50, self._poll_unlock)
+            return
+        
+        self.unlock_progress.pack_forget()
+        # Cleared before anything can start another unlock (_lock_app does, via _begin_unlock)
+        unlock_task, self._unlock_task = self._unlock_task, None
+        try:
+            self.db_service.attach_encryption_service(unlock_task.result())
+        except InvalidMasterPassword:
+            # Rejected by the key verifier before anything was loaded; ask again
+            messagebox.showerror("Error", "Incorrect master password")
+            self._lock_app()
+            return
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to unlock vault: {str(e)}")
+            self.window.quit()
+            return
+        self._load_entries()
+        self._start_background_tasks()
+        if VaultRekey.pending(self.db_service):
+            messagebox.showinfo("Change Password", "An earlier master password change was interrupted. "
+                                "Change the password again with the same new password to resume it.")
+    
+    def _start_background_tasks(self):
+        # Upgrade legacy ciphertext and fingerprint older entries in the background;
+        # both resume where an earlier run stopped
+        self._migrations = [CiphertextMigration(self.db_service), FingerprintBackfill(self.db_service)]
+        for migration in self._migrations:
+            migration.start()
+    
+    def _stop_background_tasks(self):
+        for migration in self._migrations:
+            migration.stop()
+        self._migrations = []
+        if self._rekey_job is not None:
+            self.window.after_cancel(self._rekey_job)
+            self._rekey_job = None
+        if self._rekey is not None:
+            # Finished batches are kept; changing to the same password again resumes
+            self._rekey.stop()
+            self._rekey = None
+            self.unlock_progress.pack_forget()
+    
+    def _change_master_password(self):
+        if self._rekey is not None or not self.db_service.is_unlocked:
+            return
+        current = simpledialog.askstring("Change Password", "Current master password:", show='*',
+                                         parent=self.window)
+        if current is None:
+            return
+        if not hmac.compare_digest(current.encode(), self.master_password.encode()):
+            messagebox.showerror("Error", "Incorrect master password")
+            return
+        new_password = simpledialog.askstring("Change Password", "New master password:", show='*',
+                                              parent=self.window)
+        if new_password is None:
+            return
+        if len(new_password) < 6:
+            messagebox.showerror("Error", "Password must be at least 6 characters long")
+            return
+        if simpledialog.askstring("Change Password", "Confirm new master password:", show='*',
+                                  parent=self.window) != new_password:
+            messagebox.showerror("Error", "Passwords do not match")
+            return
+        
+        # Re-encryption runs in the background; the vault stays usable with the old key until the swap
+        self._rekey = VaultRekey(self.db_service, new_password)
+        self._rekey.start()
+        self.status_label.config(text="Changing master password...")
+        self.unlock_progress.pack(side=tk.RIGHT, padx=(0, 10))
+        self._poll_rekey()
+    
+    def _poll_rekey(self):
+        self._rekey_job = None
+        rekey = self._rekey
+        if not rekey.done():
+            self.unlock_progress["value"] = rekey.progress()
+            self._rekey_job = self.window.after(100, self._poll_rekey)
+            return
+        
+        self._rekey = None
+        self.unlock_progress.pack_forget()
+        # The migrations hold the old key; restart them once the new one is attached
+        self._stop_background_tasks()
+        new_password = rekey.new_password
+        self.edit_queue.flush()
         try:
-            self.entries = self.db_service.get_all_entries()
-            self.filtered_entries = self.entries.copy()
-            self._refresh_tree()
+            rekey.result()
+            self.db_service.attach_encryption_service(rekey.finish())
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to change master password: {str(e)}")
+            self._start_background_tasks()
             self._update_status()
+            return
+        self.master_password = new_password
+        self.session_cache.wipe()
+        # Loaded entries, and those kept for undo, hold the old ciphertext
+        self.edit_queue.clear_history()
+        self._clear_entries()
+        self._load_entries()
+        self._start_background_tasks()
+        if rekey.failed_ids:
+            messagebox.showwarning("Change Password", f"Master password changed, but {len(rekey.failed_ids)} "
+                                   "entries could not be decrypted and were left as they were.")
+        else:
+            messagebox.showinfo("Change Password", "Master password changed successfully")
+    
+    def _clear_entries(self):
+        # Fresh containers rather than clearing in place: the old ones may be held by the session cache
+        self.entries = []
+        self._entries_by_id = {}
+        self.search_index = SearchIndex()
+        self._load_after = None
+        self.search_scheduler.invalidate()
+        self._apply_search_result(self._applied_search, self._unfiltered_view())
+    
+    def _session_state(self) -> dict:
+        return {
+            'entries': self.entries,
+            'entries_by_id': self._entries_by_id,
+            'search_index': self.search_index,
+            'load_after': self._load_after,
+            'marker': self.db_service.change_marker(),
+        }
+    
+    @staticmethod
+    def _wipe_session_state(state: dict):
+        # Called from the cache's timer thread when the idle window expires
+        state['entries'].clear()
+        state['entries_by_id'].clear()
+        state['search_index'].clear()
+    
+    def _resume_session(self, encryption_service, state: dict):
+        self.db_service.attach_encryption_service(encryption_service)
+        self._start_background_tasks()
+        if self.db_service.change_marker() != state['marker']:
+            # Something else wrote to the vault while it was locked
+            self._load_entries()
+            return
+        
+        self.entries = state['entries']
+        self._entries_by_id = state['entries_by_id']
+        self.search_index = state['search_index']
+        self._load_after = state['load_after']
+        self._apply_search()
+        self._update_status()
+        if self._load_after is not None:
+            self._page_job = self.window.after_idle(self._load_next_page)
+    
+    def _load_entries(self):
+        # The first page is shown right away; the rest streams in from idle callbacks
+        if self._page_job is not None:
+            self.window.after_cancel(self._page_job)
+            self._page_job = None
+        self.edit_queue.flush()
+        try:
+            self.entries = self.db_service.get_entries_page(self.PAGE_SIZE)
+            self._entries_by_id = {entry.id: entry for entry in self.entries}
+            self.search_index.clear()
+            self.search_index.add_many(self.entries)
+            self.search_scheduler.invalidate()
+            self._load_after = self._sort_key(self.entries[-1]) if len(self.entries) == self.PAGE_SIZE else None
+            self._apply_search()
+            if self._load_after is not None:
+                self._page_job = self.window.after_idle(self._load_next_page)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load entries: {str(e)}")
     
+    def _load_next_page(self):
+        self._page_job = None
+        # Pages are read from the vault, so it has to hold the edits made so far
+        self.edit_queue.flush()
+        try:
+            page = self.db_service.get_entries_page(self.PAGE_SIZE, after=self._load_after)
+        except Exception as e:
+            self._load_after = None
+            messagebox.showerror("Error", f"Failed to load entries: {str(e)}")
+            return
+        
+        self._load_after = self._sort_key(page[-1]) if len(page) == self.PAGE_SIZE else None
+        # Every row in the page sorts after everything loaded so far, so appending keeps order
+        page = [entry for entry in page if entry.id not in self._entries_by_id]
+        self.entries.extend(page)
+        self._entries_by_id.update((entry.id, entry) for entry in page)
+        self.search_index.add_many(page)
+        self.search_scheduler.invalidate()
+        self.filtered_entries.extend(entry for entry in page if self._matches_search(entry))
+        self.tree_view.refresh()
+        self._update_status()
+        
+        if self._load_after is not None:
+            self._page_job = self.window.after(1, self._load_next_page)
+    
     def _refresh_tree(self):
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Add entries
-        for entry in self.filtered_entries:
-            self.tree.insert("", tk.END, values=(
-                entry.website,
-                entry.username,
-                entry.email,
-                entry.masked_password,
-                entry.notes[:50] + "..." if len(entry.notes) > 50 else entry.notes
-            ), tags=(entry.id,))
+        self.tree_view.set_rows(self.filtered_entries)
+    
+    def _row_values(self, entry: PasswordEntry):
+        return (
+            entry.website,
+            entry.username,
+            entry.email,
+            entry.masked_password,
+            entry.notes_preview
+        )
+    
+    @staticmethod
+    def _sort_key(entry: PasswordEntry):
+        # Matches the ORDER BY website, id used by DatabaseService
+        return (entry.website, entry.id)
+    
+    def _matches_search(self, entry: PasswordEntry, search_text: str = None) -> bool:
+        if search_text is None:
+            # Compare against the query the current filtered list was built from
+            search_text = self._applied_search
+        return SearchIndex.entry_matches(entry, search_text)
+    
+    def _find_index(self, entries: List[PasswordEntry], key) -> int:
+        index = bisect.bisect_left(entries, key, key=self._sort_key)
+        if index < len(entries) and self._sort_key(entries[index]) == key:
+            return index
+        return -1
+    
+    def _filtered_index_of(self, iid: str):
+        entry = self._entries_by_id.get(int(iid))
+        if entry is None:
+            return None
+        index = self.filtered_entries.index(entry)
+        return index if index >= 0 else None
+    
+    def _insert_entry(self, entry: PasswordEntry):
+        # Patch the in-memory lists for a single new or moved entry
+        key = self._sort_key(entry)
+        if self._load_after is not None and key > self._load_after:
+            # Not reached by the background load yet; a later page will pick it up
+            return
+        bisect.insort(self.entries, entry, key=self._sort_key)
+        self._entries_by_id[entry.id] = entry
+        self.search_index.add(entry)
+        self.search_scheduler.invalidate()
+        
+        if self._matches_search(entry):
+            self.filtered_entries.insert(entry)
+        self.tree_view.refresh()
+    
+    def _remove_entry(self, entry: PasswordEntry):
+        # The view resolves ids through the map, so it goes first
+        self.filtered_entries.remove(entry)
+        index = self._find_index(self.entries, self._sort_key(entry))
+        if index >= 0:
+            del self.entries[index]
+        self._entries_by_id.pop(entry.id, None)
+        self.search_index.remove(entry.id)
+        self.search_scheduler.invalidate()
+        self.tree_view.refresh()
+    
+    def _replace_entry(self, old_entry: PasswordEntry, new_entry: PasswordEntry):
+        key = self._sort_key(old_entry)
+        if key != self._sort_key(new_entry) or self._matches_search(old_entry) != self._matches_search(new_entry):
+            self._remove_entry(old_entry)
+            self._insert_entry(new_entry)
+            return
+        
+        # Position unchanged, swap the object and refresh the visible rows;
+        # the view holds ids, so it picks the new object up through the map
+        self.entries[self._find_index(self.entries, key)] = new_entry
+        self._entries_by_id[new_entry.id] = new_entry
+        self.search_index.add(new_entry)
+        self.search_scheduler.invalidate()
+        self.tree_view.refresh()
     
     def _update_status(self):
         count = len(self.filtered_entries)
         self.count_label.config(text=f"{count} entries")
-        self.status_label.config(text="Ready")
+        self.status_label.config(text="Loading..." if self._load_after is not None else "Ready")
     
     def _on_search(self, *args):
-        search_text = self.search_var.get().lower()
+        self.search_scheduler.schedule(self.search_var.get())
+    
+    def _apply_search(self):
+        # Synchronous variant used when (re)loading the vault
+        self.search_scheduler.cancel()
+        _, rows = self._search_rows(self.search_var.get())
+        self._apply_search_result(self.search_var.get(), rows)
+    
+    def _search_rows(self, search_text: str, within=None):
+        # Runs on the search worker thread; only reads the index and the id map
         if not search_text:
-            self.filtered_entries = self.entries.copy()
-        else:
-            self.filtered_entries = [
-                entry for entry in self.entries
-                if (search_text in entry.website.lower() or
-                    search_text in entry.username.lower() or
-                    search_text in entry.email.lower())
-            ]
-        
+            return None, self._unfiltered_view()
+        matches = self.search_index.search(search_text, within=within)
+        return matches, EntryView.from_matches(self.entries, self._entries_by_id, self._sort_key, matches)
+    
+    def _unfiltered_view(self) -> EntryView:
+        return EntryView(self.entries, self._entries_by_id, self._sort_key)
+    
+    def _apply_search_result(self, search_text: str, rows: EntryView):
+        self._applied_search = search_text
+        self.filtered_entries = rows
         self._refresh_tree()
         self._update_status()
     
+    def _search_failed(self, search_text: str, error: Exception):
+        self.status_label.config(text=f"Search failed: {str(error)}")
+    
     def _get_selected_entry(self):
-        selection = self.tree.selection()
-        if not selection:
+        selected = self.tree_view.selected_iid()
+        if selected is None:
             return None
         
-        item = self.tree.item(selection[0])
-        entry_id = int(item['tags'][0])
-        
-        for entry in self.entries:
-            if entry.id == entry_id:
-                return entry
-        return None
+        return self._entries_by_id.get(int(selected))
     
     def _add_entry(self):
+        if not self.db_service.is_unlocked:
+            return
         try:
-            entry_window = EntryWindow(self.window)
+            entry_window = EntryWindow(self.window, breach_check=self._is_breached)
             result = entry_window.show()
-            
-            if result:
-                if self.db_service.save_entry(result):
-                    self._load_entries()
-                    self.status_label.config(text="Entry added successfully")
-                else:
-                    messagebox.showerror("Error", "Failed to save entry")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open entry window: {str(e)}")
+            return
         
-    def _edit_entry(self, event=None):
-        selected_entry = self._get_selected_entry()
+        if result:
+            try:
+                self.edit_queue.add(result)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save entry: {str(e)}")
+                return
+            self._insert_entry(result)
+            self._edited("Entry added")
+    
+    def _edit_entry(self, event=None, entry: Optional[PasswordEntry] = None):
+        if not self.db_service.is_unlocked:
+            return
+        selected_entry = entry or self._get_selected_entry()
         if not selected_entry:
             messagebox.showinfo("No Selection", "Please select an entry to edit.")
             return
         
-        entry_window = EntryWindow(self.window, selected_entry)
+        # Edit a copy so the listed entry keeps its sort position until the save succeeds
+        entry_window = EntryWindow(self.window, copy.copy(selected_entry), breach_check=self._is_breached)
         result = entry_window.show()
         
         if result:
-            if self.db_service.save_entry(result):
-                self._load_entries()
-                self.status_label.config(text="Entry updated successfully")
-            else:
-                messagebox.showerror("Error", "Failed to update entry")
-        
+            self.edit_queue.update(selected_entry, result)
+            self._replace_entry(selected_entry, result)
+            self._edited("Entry updated")
+    
     def _delete_entry(self):
+        if not self.db_service.is_unlocked:
+            return
         selected_entry = self._get_selected_entry()
         if not selected_entry:
             messagebox.showinfo("No Selection", "Please select an entry to delete.")
@@ -197,47 +525,187 @@ class MainWindow:
         
         if messagebox.askyesno("Confirm Delete", 
                               f"Are you sure you want to delete the entry for '{selected_entry.website}'?"):
-            if self.db_service.delete_entry(selected_entry.id):
-                self._load_entries()
-                self.status_label.config(text="Entry deleted successfully")
-            else:
-                messagebox.showerror("Error", "Failed to delete entry")
+            self.edit_queue.delete(selected_entry)
+            self._remove_entry(selected_entry)
+            self._edited("Entry deleted (Ctrl+Z to undo)")
+    
+    def _undo(self, event=None):
+        if not self.db_service.is_unlocked:
+            return
+        edit = self.edit_queue.undo()
+        if edit is None:
+            self.status_label.config(text="Nothing to undo")
+            return
+        self._apply_edit(edit)
+        self._edited(f"Undid {edit.label}")
+    
+    def _redo(self, event=None):
+        if not self.db_service.is_unlocked:
+            return
+        edit = self.edit_queue.redo()
+        if edit is None:
+            self.status_label.config(text="Nothing to redo")
+            return
+        self._apply_edit(edit)
+        self._edited(f"Redid {edit.label}")
+    
+    def _apply_edit(self, edit: Edit):
+        # The listed object may be another copy of the entry, so look it up by id
+        current = self._entries_by_id.get(edit.entry_id)
+        if edit.after is None:
+            if current is not None:
+                self._remove_entry(current)
+        elif current is None:
+            self._insert_entry(edit.after)
+        else:
+            self._replace_entry(current, edit.after)
+    
+    def _edited(self, message: str):
+        self._update_status()
+        self.status_label.config(text=message)
+        if self._edit_check_job is None:
+            self._edit_check_job = self.window.after(int(self.edit_queue.delay * 1000) + 250, self._check_edits)
+    
+    def _check_edits(self):
+        # Writes happen on the queue's timer thread; failures are reported from here, on the Tk thread
+        self._edit_check_job = None
+        if self.edit_queue.error is not None:
+            messagebox.showerror("Error", f"Failed to save changes: {str(self.edit_queue.error)}\n\n"
+                                 "They will be saved again with the next change.")
+        elif self.edit_queue.pending:
+            self._edit_check_job = self.window.after(int(self.edit_queue.delay * 1000), self._check_edits)
+    
+    def _save_edits(self) -> bool:
+        if self.edit_queue.flush():
+            return True
+        messagebox.showerror("Error", f"Failed to save changes: {str(self.edit_queue.error)}")
+        return False
+    
+    def _is_breached(self, password: str) -> bool:
+        # Checked against the local breach index when one has been built (cli.py breach build)
+        from services.breach_service import BreachIndex, default_index_path
+        if self._breach_index is None:
+            path = default_index_path()
+            if not os.path.exists(path):
+                return False
+            try:
+                self._breach_index = BreachIndex(path)
+            except (OSError, ValueError) as e:
+                print(f"Error opening breach index: {e}")
+                return False
+        return self._breach_index.contains_password(password)
+    
+    def _show_security_report(self):
+        if not self.db_service.is_unlocked:
+            return
+        from gui.security_report_window import SecurityReportWindow
+        self.edit_queue.flush()
+        SecurityReportWindow(self.window, self.db_service, self._open_report_entry)
+    
+    def _open_report_entry(self, entry_id: int):
+        entry = self._entries_by_id.get(entry_id)
+        if entry is None:
+            messagebox.showinfo("Security Report", "That entry could not be found; refresh the report.")
+            return
+        self._edit_entry(entry=entry)
     
     def _copy_username(self):
         selected_entry = self._get_selected_entry()
         if selected_entry and selected_entry.username:
-            pyperclip.copy(selected_entry.username)
+            self._copy_to_clipboard(selected_entry.username)
             self.status_label.config(text="Username copied to clipboard")
     
     def _copy_password(self):
         selected_entry = self._get_selected_entry()
         if selected_entry and selected_entry.password:
-            pyperclip.copy(selected_entry.password)
+            self._copy_to_clipboard(selected_entry.password)
             self.status_label.config(text="Password copied to clipboard")
     
     def _copy_email(self):
         selected_entry = self._get_selected_entry()
         if selected_entry and selected_entry.email:
-            pyperclip.copy(selected_entry.email)
+            self._copy_to_clipboard(selected_entry.email)
             self.status_label.config(text="Email copied to clipboard")
     
+    @staticmethod
+    def _copy_to_clipboard(text: str):
+        # Imported on first copy (normally already preloaded behind the login window)
+        import pyperclip
+        pyperclip.copy(text)
+    
+    def _create_context_menu(self):
+        self.context_menu = tk.Menu(self.window, tearoff=0)
+        self.context_menu.add_command(label="Copy Username", command=self._copy_username)
+        self.context_menu.add_command(label="Copy Password", command=self._copy_password)
+        self.context_menu.add_command(label="Copy Email", command=self._copy_email)
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="Edit", command=self._edit_entry)
+        self.context_menu.add_command(label="Delete", command=self._delete_entry)
+    
     def _show_context_menu(self, event):
         if self.tree.identify_row(event.y):
+            if self.context_menu is None:
+                self._create_context_menu()
             self.context_menu.post(event.x_root, event.y_root)
     
     def _lock_app(self):
+        # Nothing is left pending while locked; the vault stays open if the edits cannot be written
+        if not self._save_edits():
+            return
+        self.edit_queue.clear_history()
         self.window.withdraw()
+        if self._edit_check_job is not None:
+            self.window.after_cancel(self._edit_check_job)
+            self._edit_check_job = None
+        if self._page_job is not None:
+            self.window.after_cancel(self._page_job)
+            self._page_job = None
+        if self._unlock_job is not None:
+            self.window.after_cancel(self._unlock_job)
+            self._unlock_job = None
+        self.search_scheduler.cancel()
+        self._stop_background_tasks()
+        db_path = self.db_service.db_path
+        if self.db_service.is_unlocked:
+            # Keep the key and loaded entries around so a quick unlock skips the KDF and the reload
+            self.session_cache.store(self.master_password, db_path, self.db_service.encryption_service,
+                                     self._session_state(), on_wipe=self._wipe_session_state)
+        self._clear_entries()
+        self.db_service.detach_encryption_service()
+        self.db_service.close()
         from gui.login_window import LoginWindow
-        login_window = LoginWindow()
+        login_window = LoginWindow(self.session_cache, db_path)
         new_password = login_window.show()
         
         if new_password:
             self.master_password = new_password
-            self.db_service = DatabaseService(new_password)
-            self._load_entries()
+            if login_window.db_path != db_path:
+                # Another vault was picked; the cached session belongs to the old one
+                self.session_cache.wipe()
+                self.db_service = DatabaseService(db_path=login_window.db_path)
+                self.edit_queue = EditQueue(self.db_service)
+                db_path = login_window.db_path
+                self._update_title()
+            else:
+                # Same service object: cached lazy entries decrypt through it
+                self.db_service.open()
             self.window.deiconify()
+            cached = None if login_window.unlock_task else self.session_cache.take(new_password, db_path)
+            if cached:
+                self._resume_session(*cached)
+            else:
+                self._begin_unlock(login_window.unlock_task or UnlockTask(new_password, db_path))
         else:
+            self.session_cache.wipe()
             self.window.quit()
     
     def run(self):
-        self.window.mainloop()
\ No newline at end of file
+        try:
+            self.window.mainloop()
+        finally:
+            self.search_scheduler.close()
+            self._stop_background_tasks()
+            # Failures are printed by the queue; there is no window left to show them in
+            self.edit_queue.close()
+            self.session_cache.wipe()
+            self.db_service.close()
\ No newline at end of file
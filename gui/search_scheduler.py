@@ -0,0 +1,127 @@
+import queue
+import threading
+from typing import Callable, Optional, Set, Tuple
+
+class SearchScheduler:
+    """Debounces search input and runs the filtering on a worker thread.
+    
+    Only the newest query is ever applied: older ones are dropped before or
+    after they run. When a query extends the previous one, the worker
+    narrows the previous result instead of searching the whole vault.
+    """
+    
+    def __init__(self, window, search: Callable[[str, Optional[Set[int]]], Tuple[Set[int], list]],
+                 apply: Callable[[str, list], None], delay_ms: int = 150, poll_ms: int = 15,
+                 on_error: Optional[Callable[[str, Exception], None]] = None):
+        # search(query, within) -> (matching ids, rows to show); runs off the Tk thread.
+        # on_error(query, exception) is called on the Tk thread when the newest search fails
+        self.window = window
+        self.search = search
+        self.apply = apply
+        self.on_error = on_error
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+        
+        self._generation = 0
+        self._epoch = 0
+        self._debounce_job = None
+        self._poll_job = None
+        self._pending_query: Optional[str] = None
+        self._base_query: Optional[str] = None
+        self._base_ids: Optional[Set[int]] = None
+        self._results = queue.Queue()
+        self._requests = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="search-worker", daemon=True)
+        self._worker.start()
+    
+    def schedule(self, query: str):
+        self._generation += 1
+        self._pending_query = query
+        if self._debounce_job is not None:
+            self.window.after_cancel(self._debounce_job)
+        self._debounce_job = self.window.after(self.delay_ms, self._submit)
+    
+    def invalidate(self):
+        # The entries changed: earlier results can no longer be narrowed or trusted
+        self._epoch += 1
+        self._base_query = None
+        self._base_ids = None
+    
+    def cancel(self):
+        self._generation += 1
+        self._pending_query = None
+        for job in (self._debounce_job, self._poll_job):
+            if job is not None:
+                self.window.after_cancel(job)
+        self._debounce_job = None
+        self._poll_job = None
+    
+    def close(self):
+        self.cancel()
+        self._requests.put(None)
+    
+    def _submit(self):
+        self._debounce_job = None
+        query = self._pending_query
+        if query is None:
+            return
+        
+        within = None
+        if self._base_ids is not None and self._base_query and query.lower().startswith(self._base_query.lower()):
+            within = self._base_ids
+        self._requests.put((self._generation, self._epoch, query, within))
+        if self._poll_job is None:
+            self._poll_job = self.window.after(self.poll_ms, self._poll)
+    
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            # Skip straight to the newest request if several piled up
+            while not self._requests.empty():
+                newer = self._requests.get()
+                if newer is None:
+                    return
+                request = newer
+            generation, epoch, query, within = request
+            if generation != self._generation:
+                continue
+            try:
+                ids, rows = self.search(query, within)
+            except Exception as e:
+                print(f"Search failed: {e}")
+                self._results.put((generation, epoch, query, None, e))
+                continue
+            self._results.put((generation, epoch, query, ids, rows))
+    
+    def _poll(self):
+        self._poll_job = None
+        latest = None
+        while True:
+            try:
+                latest = self._results.get_nowait()
+            except queue.Empty:
+                break
+        
+        if latest is not None:
+            generation, epoch, query, ids, rows = latest
+            if generation == self._generation:
+                if isinstance(rows, Exception):
+                    # Nothing more is coming for this query; stop polling and keep the current rows
+                    self._pending_query = None
+                    if self.on_error is not None:
+                        self.on_error(query, rows)
+                    return
+                if epoch != self._epoch:
+                    # Entries changed while the worker ran; search again on fresh data
+                    self._submit()
+                    return
+                self._pending_query = None
+                self._base_query = query
+                self._base_ids = ids
+                self.apply(query, rows)
+                return
+        
+        if self._pending_query is not None:
+            self._poll_job = self.window.after(self.poll_ms, self._poll)
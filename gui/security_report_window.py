@@ -0,0 +1,93 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, List
+from models.password_entry import PasswordEntry
+from services.database_service import DatabaseService
+
+class SecurityReportWindow:
+    """Lists reused passwords and duplicate logins.
+    
+    Both come from indexed GROUP BY queries over the stored fingerprints,
+    so opening the report decrypts nothing. Double-clicking an entry calls
+    on_open(entry_id).
+    """
+    
+    def __init__(self, parent, db_service: DatabaseService, on_open: Callable[[int], None]):
+        self.parent = parent
+        self.db_service = db_service
+        self.on_open = on_open
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("Security Report")
+        self.window.geometry("700x450")
+        self.window.transient(parent)
+        
+        self._create_widgets()
+        self.refresh()
+        self.window.focus_set()
+    
+    def _create_widgets(self):
+        main_frame = ttk.Frame(self.window, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.summary_label = ttk.Label(main_frame, text="")
+        self.summary_label.pack(fill=tk.X, pady=(0, 10))
+        
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.tree = ttk.Treeview(tree_frame, columns=("username", "email"), selectmode="browse")
+        self.tree.heading("#0", text="Website/Service")
+        self.tree.heading("username", text="Username")
+        self.tree.heading("email", text="Email")
+        self.tree.column("#0", width=300)
+        self.tree.column("username", width=180)
+        self.tree.column("email", width=200)
+        
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<Double-1>", self._on_double_click)
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(button_frame, text="Close", command=self.window.destroy).pack(side=tk.RIGHT, padx=(5, 0))
+        ttk.Button(button_frame, text="Refresh", command=self.refresh).pack(side=tk.RIGHT)
+    
+    def refresh(self):
+        self.tree.delete(*self.tree.get_children())
+        reused = self.db_service.reused_password_groups()
+        duplicates = self.db_service.duplicate_login_groups()
+        pending = self.db_service.count_missing_fingerprints()
+        undecryptable = self.db_service.count_undecryptable()
+        
+        self._add_section("Reused passwords", reused,
+                          lambda group: f"Same password on {len(group)} entries")
+        self._add_section("Duplicate logins", duplicates,
+                          lambda group: f"{group[0].website} / {group[0].username or '(no username)'}")
+        
+        summary = (f"{sum(map(len, reused))} entries share a password ({len(reused)} groups), "
+                   f"{len(duplicates)} website/username pairs are stored more than once.")
+        if pending:
+            summary += f" {pending} older entries are still being analysed."
+        if undecryptable:
+            summary += f" {undecryptable} entries could not be decrypted and are left out."
+        self.summary_label.config(text=summary)
+    
+    def _add_section(self, title: str, groups: List[List[PasswordEntry]],
+                     group_label: Callable[[List[PasswordEntry]], str]):
+        section = self.tree.insert("", tk.END, text=f"{title} ({len(groups)})", open=True)
+        if not groups:
+            self.tree.insert(section, tk.END, text="None found")
+        for group in groups:
+            node = self.tree.insert(section, tk.END, text=group_label(group), open=True)
+            for entry in group:
+                # Entry rows get recognisable iids so double-click can tell them from group rows
+                self.tree.insert(node, tk.END, iid=f"entry-{entry.id}-{node}", text=entry.website,
+                                 values=(entry.username, entry.email))
+    
+    def _on_double_click(self, event=None):
+        selection = self.tree.selection()
+        if selection and selection[0].startswith("entry-"):
+            self.on_open(int(selection[0].split("-")[1]))
@@ -0,0 +1,145 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Optional, Sequence
+
+class VirtualTreeview:
+    """Keeps only the rows inside the viewport (plus a small buffer) as Treeview items.
+    
+    The full row list lives in Python; the vertical scrollbar, mouse wheel and
+    arrow keys move a window over it and only that window is materialized.
+    """
+    
+    BUFFER_ROWS = 5
+    DEFAULT_ROW_HEIGHT = 20
+    
+    def __init__(self, tree: ttk.Treeview, scrollbar: ttk.Scrollbar,
+                 row_values: Callable[[object], tuple], row_iid: Callable[[object], str],
+                 row_index: Optional[Callable[[str], Optional[int]]] = None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_values = row_values
+        self.row_iid = row_iid
+        self.row_index = row_index
+        self.rows: Sequence = ()
+        self.first = 0
+        self._selected_index: Optional[int] = None
+        self._selected_iid: Optional[str] = None
+        self._visible_rows = 1
+        
+        self.scrollbar.configure(command=self._on_scrollbar)
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_units(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_units(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-self._visible_rows))
+        self.tree.bind("<Next>", lambda e: self._move_selection(self._visible_rows))
+        self.tree.bind("<Home>", lambda e: self._move_selection(-len(self.rows)))
+        self.tree.bind("<End>", lambda e: self._move_selection(len(self.rows)))
+    
+    def set_rows(self, rows: Sequence):
+        self.rows = rows
+        self.first = 0
+        self._selected_index = None
+        self._selected_iid = None
+        self.refresh()
+    
+    def refresh(self):
+        # Re-resolve the selection: rows may have been inserted or removed around it
+        if self._selected_iid is not None:
+            self._selected_index = self._index_of_iid(self._selected_iid)
+            if self._selected_index is None:
+                self._selected_iid = None
+        self.first = max(0, min(self.first, len(self.rows) - self._visible_rows))
+        self._render()
+    
+    def selected_iid(self) -> Optional[str]:
+        return self._selected_iid
+    
+    def see(self, index: int):
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + self._visible_rows:
+            self.first = index - self._visible_rows + 1
+        self.refresh()
+    
+    def _index_of_iid(self, iid: str) -> Optional[int]:
+        if self.row_index is not None:
+            return self.row_index(iid)
+        if self._selected_index is not None and self._selected_index < len(self.rows):
+            if self.row_iid(self.rows[self._selected_index]) == iid:
+                return self._selected_index
+        for index, row in enumerate(self.rows):
+            if self.row_iid(row) == iid:
+                return index
+        return None
+    
+    def _render(self):
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        
+        end = min(len(self.rows), self.first + self._visible_rows + self.BUFFER_ROWS)
+        for index in range(self.first, end):
+            row = self.rows[index]
+            self.tree.insert("", tk.END, iid=self.row_iid(row), values=self.row_values(row))
+        
+        if self._selected_iid is not None and self.tree.exists(self._selected_iid):
+            self.tree.selection_set(self._selected_iid)
+            self.tree.focus(self._selected_iid)
+        self._update_scrollbar()
+    
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if total <= self._visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        self.scrollbar.set(self.first / total, min(1.0, (self.first + self._visible_rows) / total))
+    
+    def _scroll_to(self, first: int):
+        first = max(0, min(first, len(self.rows) - self._visible_rows))
+        if first != self.first:
+            self.first = first
+            self._render()
+    
+    def _scroll_units(self, units: int):
+        self._scroll_to(self.first + units)
+        return "break"
+    
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._scroll_to(int(float(amount) * len(self.rows)))
+        elif action == "scroll":
+            step = self._visible_rows if unit == "pages" else 1
+            self._scroll_to(self.first + int(amount) * step)
+    
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_units(-delta * 3)
+    
+    def _on_configure(self, event=None):
+        style_height = ttk.Style().lookup("Treeview", "rowheight")
+        row_height = int(style_height) if style_height else self.DEFAULT_ROW_HEIGHT
+        visible = max(1, self.tree.winfo_height() // row_height)
+        if visible != self._visible_rows:
+            self._visible_rows = visible
+            self.refresh()
+    
+    def _on_select(self, event=None):
+        selection = self.tree.selection()
+        if selection:
+            self._selected_iid = selection[0]
+            self._selected_index = self.first + self.tree.index(selection[0])
+    
+    def _move_selection(self, offset: int):
+        if not self.rows:
+            return "break"
+        current = self._selected_index if self._selected_index is not None else self.first - 1
+        index = max(0, min(len(self.rows) - 1, current + offset))
+        self._selected_index = index
+        self._selected_iid = self.row_iid(self.rows[index])
+        self.see(index)
+        return "break"
@@ -6,18 +6,40 @@ A simple, secure password manager built with Python and Tkinter
 
 import sys
 import os
+import argparse
 
 # Add the current directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Only tkinter is needed to draw the login prompt; the rest is imported on a
+# background thread while the user types (see gui.login_window.preload)
 from gui.login_window import LoginWindow
-from gui.main_window import MainWindow
 
 def main():
     """Main application entry point"""
+    parser = argparse.ArgumentParser(description="Secure Password Manager")
+    parser.add_argument('--profile', nargs='?', const='', metavar='PATH',
+                        help="time hot paths, show them in the status bar and write them to PATH on exit")
+    parser.add_argument('--vault', metavar='NAME', help="vault to preselect at login (see cli.py vaults)")
+    args = parser.parse_args()
+    if args.profile is not None or os.environ.get('PASSWORD_MANAGER_PROFILE'):
+        from services import instrumentation
+        if args.profile is not None:
+            instrumentation.enable(args.profile or None)
+        else:
+            instrumentation.enable_from_env()
+    
+    db_path = None
+    if args.vault:
+        from services.vault_registry import VaultRegistry
+        try:
+            db_path = VaultRegistry().path_of(args.vault)
+        except LookupError as e:
+            parser.error(str(e))
+    
     try:
         # Show login window
-        login_window = LoginWindow()
+        login_window = LoginWindow(db_path=db_path)
         master_password = login_window.show()
         
         if not master_password:
@@ -25,9 +47,10 @@ def main():
             return
         
         # Show main application window
-        app = MainWindow(master_password)
+        from gui.main_window import MainWindow
+        app = MainWindow(master_password, login_window.unlock_task)
         app.run()
-        
+    
     except KeyboardInterrupt:
         print("\nApplication interrupted by user.")
     except Exception as e:
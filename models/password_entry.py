@@ -1,24 +1,153 @@
 from datetime import datetime
-from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Dict, Optional, Union
+
+# Notes longer than this are cut short in the entry list
+NOTES_PREVIEW_LENGTH = 50
+
+ENTRY_FIELDS = ('id', 'website', 'username', 'email', 'password', 'notes', 'date_created', 'date_modified')
+
+# A datetime, or the ISO string it was stored as until someone reads it
+Timestamp = Union[datetime, str, None]
+
+# Mask strings shared by every entry with a password of that length
+_masks: Dict[int, str] = {}
+
+def _mask(length: int) -> str:
+    mask = _masks.get(length)
+    if mask is None:
+        mask = _masks[length] = '*' * length
+    return mask
+
+def _parse_timestamp(value: Timestamp) -> Optional[datetime]:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
 
-@dataclass
 class PasswordEntry:
-    id: int = 0
-    website: str = ""
-    username: str = ""
-    email: str = ""
-    password: str = ""
-    notes: str = ""
-    date_created: datetime = None
-    date_modified: datetime = None
-    
-    def __post_init__(self):
-        if self.date_created is None:
-            self.date_created = datetime.now()
-        if self.date_modified is None:
-            self.date_modified = datetime.now()
+    """A vault entry, slotted so that large vaults stay compact.
+    
+    Timestamps can be passed as the ISO strings stored in the database and
+    are only parsed when read. The notes preview shown in the list is built
+    once and cached until the notes change.
+    """
+    
+    __slots__ = ('id', 'website', 'username', 'email', '_password', '_notes', '_notes_preview',
+                 '_date_created', '_date_modified')
+    
+    def __init__(self, id: int = 0, website: str = "", username: str = "", email: str = "",
+                 password: str = "", notes: str = "", date_created: Timestamp = None,
+                 date_modified: Timestamp = None):
+        self.id = id
+        self.website = website
+        self.username = username
+        self.email = email
+        self._password = password
+        self._notes = notes
+        self._notes_preview: Optional[str] = None
+        if date_created is None or date_modified is None:
+            now = datetime.now()
+            date_created = now if date_created is None else date_created
+            date_modified = now if date_modified is None else date_modified
+        self._date_created = date_created
+        self._date_modified = date_modified
+    
+    @property
+    def password(self) -> str:
+        return self._password
+    
+    @password.setter
+    def password(self, value: str):
+        self._password = value
+    
+    @property
+    def notes(self) -> str:
+        return self._notes
+    
+    @notes.setter
+    def notes(self, value: str):
+        self._notes = value
+        self._notes_preview = None
+    
+    @property
+    def notes_preview(self) -> str:
+        if self._notes_preview is None:
+            notes = self._notes or ""
+            self._notes_preview = notes[:NOTES_PREVIEW_LENGTH] + "..." if len(notes) > NOTES_PREVIEW_LENGTH else notes
+        return self._notes_preview
+    
+    @property
+    def date_created(self) -> datetime:
+        if isinstance(self._date_created, str):
+            self._date_created = _parse_timestamp(self._date_created)
+        return self._date_created
+    
+    @date_created.setter
+    def date_created(self, value: Timestamp):
+        self._date_created = value
+    
+    @property
+    def date_modified(self) -> datetime:
+        if isinstance(self._date_modified, str):
+            self._date_modified = _parse_timestamp(self._date_modified)
+        return self._date_modified
+    
+    @date_modified.setter
+    def date_modified(self, value: Timestamp):
+        self._date_modified = value
+    
+    @property
+    def mask_length(self) -> int:
+        return len(self.password) if self.password else 0
     
     @property
     def masked_password(self) -> str:
-        return '*' * len(self.password) if self.password else ''
\ No newline at end of file
+        return _mask(self.mask_length)
+    
+    def _values(self) -> tuple:
+        return tuple(getattr(self, field) for field in ENTRY_FIELDS)
+    
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values() == other._values()
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{field}={getattr(self, field)!r}" for field in ENTRY_FIELDS)
+        return f"{self.__class__.__name__}({fields})"
+
+
+class LazyPasswordEntry(PasswordEntry):
+    """Entry loaded with ciphertext only; the password is decrypted on first read."""
+    
+    __slots__ = ('encrypted_password', '_decryptor', '_mask_length')
+    
+    def __init__(self, encrypted_password: Union[str, bytes], decryptor: Callable[[Union[str, bytes]], str],
+                 mask_length: int = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.encrypted_password = encrypted_password
+        self._decryptor = decryptor
+        self._mask_length = mask_length
+        self._password: Optional[str] = None
+    
+    @property
+    def password(self) -> str:
+        if self._password is None:
+            self._password = self._decryptor(self.encrypted_password) if self.encrypted_password else ""
+        return self._password
+    
+    @password.setter
+    def password(self, value: str):
+        self._password = value
+    
+    @property
+    def is_decrypted(self) -> bool:
+        return self._password is not None
+    
+    @property
+    def mask_length(self) -> int:
+        # Use the ciphertext-derived estimate until something has read the password
+        if self._password is None:
+            return self._mask_length
+        return len(self._password)
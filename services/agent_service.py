@@ -0,0 +1,369 @@
+import asyncio
+import json
+import os
+import socket
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from models.password_entry import PasswordEntry
+from services.breach_service import BreachIndex, check_vault, default_index_path
+from services.database_service import DatabaseService
+from services.migration_service import FingerprintBackfill
+from services.search_index import SearchIndex
+from services.sync_service import LocalReplica, SYNC_BATCH_SIZE
+
+# Idle time after which the agent locks the vault and exits;
+# override with PASSWORD_MANAGER_AGENT_TIMEOUT (seconds, 0 keeps it running)
+DEFAULT_AGENT_TIMEOUT = 900
+
+MAX_REQUEST_BYTES = 1024 * 1024
+
+DEFAULT_LIMIT = 50
+
+def default_socket_path() -> str:
+    # Next to the vault, in a directory only the owner can enter
+    folder = os.path.join(os.path.expanduser("~"), "PasswordManager")
+    os.makedirs(folder, mode=0o700, exist_ok=True)
+    return os.path.join(folder, "agent.sock")
+
+def entry_to_dict(entry: PasswordEntry, include_password: bool = False) -> Dict:
+    record = {
+        'id': entry.id,
+        'website': entry.website,
+        'username': entry.username,
+        'email': entry.email,
+        'notes': entry.notes,
+        'date_modified': entry.date_modified.isoformat(),
+    }
+    if include_password:
+        record['password'] = entry.password
+    return record
+
+class VaultSession:
+    """Answers scripted requests against an unlocked vault.
+    
+    Used directly by the CLI for one-off commands and by VaultAgent to
+    serve many. Requests and responses are plain dicts:
+    {"op": "search", "query": "mail"} -> {"ok": true, "result": [...]}.
+    With index=True the entries are loaded once and searched in memory;
+    otherwise search runs as SQL. The replica, peer, changes and apply ops
+    are the remote side of services.sync_service.sync().
+    """
+    
+    OPS = ('ping', 'list', 'get', 'search', 'add', 'report', 'breaches', 'replica', 'peer', 'changes', 'apply')
+    
+    def __init__(self, db_service: DatabaseService, index: bool = False):
+        self.db_service = db_service
+        self.started = time.time()
+        self.search_index: Optional[SearchIndex] = None
+        self._entries_by_id: Dict[int, PasswordEntry] = {}
+        if index:
+            self.reload()
+    
+    def clear(self):
+        self.search_index = None
+        self._entries_by_id = {}
+    
+    def reload(self):
+        self._entries_by_id = {entry.id: entry for entry in self.db_service.iter_entries()}
+        self.search_index = SearchIndex()
+        self.search_index.add_many(self._entries_by_id.values())
+    
+    def handle(self, request: Dict) -> Dict:
+        op = request.get('op')
+        if op not in self.OPS:
+            return {'ok': False, 'error': f"Unknown op {op!r}"}
+        try:
+            return {'ok': True, 'result': getattr(self, f'_op_{op}')(request)}
+        except (KeyError, ValueError, TypeError, LookupError) as e:
+            return {'ok': False, 'error': str(e)}
+        except Exception as e:
+            # Database and file errors too: a dropped connection would leave the client guessing
+            print(f"Error handling {op} request: {e}")
+            return {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+    
+    def _op_ping(self, request: Dict) -> Dict:
+        return {'vault': os.path.abspath(self.db_service.db_path), 'entries': self.db_service.count_entries(),
+                'uptime': time.time() - self.started, 'indexed': self.search_index is not None}
+    
+    def _op_list(self, request: Dict) -> List[Dict]:
+        entries = self.db_service.query_entries(order_by=request.get('order_by', 'website'),
+                                                descending=bool(request.get('descending')),
+                                                limit=int(request.get('limit', DEFAULT_LIMIT)),
+                                                offset=int(request.get('offset', 0)))
+        return [entry_to_dict(entry) for entry in entries]
+    
+    def _op_search(self, request: Dict) -> List[Dict]:
+        query = str(request['query'])
+        limit = int(request.get('limit', DEFAULT_LIMIT))
+        if self.search_index is None:
+            entries = self.db_service.query_entries(search=query, limit=limit)
+        else:
+            matches = map(self._entries_by_id.get, self.search_index.search(query))
+            entries = sorted((entry for entry in matches if entry is not None),
+                             key=lambda entry: (entry.website, entry.id))[:limit]
+        return [entry_to_dict(entry) for entry in entries]
+    
+    def _op_get(self, request: Dict) -> Dict:
+        # By exact website name, falling back to a case-insensitive match and then to an id
+        name = str(request['name'])
+        entries = self.db_service.query_entries(website=name)
+        if not entries:
+            entries = [entry for entry in self.db_service.query_entries(search=name)
+                       if entry.website.lower() == name.lower()]
+        if not entries and name.isdigit():
+            entry = self.db_service.get_entry(int(name))
+            entries = [entry] if entry is not None else []
+        if not entries:
+            raise LookupError(f"No entry named {name!r}")
+        if len(entries) > 1:
+            ids = ', '.join(str(entry.id) for entry in entries)
+            raise LookupError(f"{len(entries)} entries named {name!r} (ids {ids}); ask for one by id")
+        return entry_to_dict(entries[0], bool(request.get('password')))
+    
+    def _op_add(self, request: Dict) -> Dict:
+        if not request.get('website') or not request.get('password'):
+            raise ValueError("website and password are required")
+        entry = PasswordEntry(website=str(request['website']), username=str(request.get('username') or ''),
+                              email=str(request.get('email') or ''), password=str(request['password']),
+                              notes=str(request.get('notes') or ''))
+        if self.db_service.save_entry(entry) is None:
+            raise ValueError("Failed to save entry")
+        if self.search_index is not None:
+            self._entries_by_id[entry.id] = entry
+            self.search_index.add(entry)
+        return entry_to_dict(entry)
+    
+    def _op_report(self, request: Dict) -> Dict:
+        # Reused passwords and duplicate logins, from the stored fingerprints;
+        # entries from before fingerprints existed are caught up first
+        if self.db_service.count_missing_fingerprints():
+            FingerprintBackfill(self.db_service).run()
+        return {
+            'reused_passwords': [[entry_to_dict(entry) for entry in group]
+                                 for group in self.db_service.reused_password_groups()],
+            'duplicate_logins': [[entry_to_dict(entry) for entry in group]
+                                 for group in self.db_service.duplicate_login_groups()],
+            'pending': self.db_service.count_missing_fingerprints(),
+            'undecryptable': self.db_service.count_undecryptable(),
+        }
+    
+    def _op_breaches(self, request: Dict) -> Dict:
+        # Every vault password checked against the local breach index
+        started = time.perf_counter()
+        path = request.get('index') or default_index_path()
+        if not os.path.exists(path):
+            raise LookupError(f"No breach index at {path}; build one with 'cli.py breach build'")
+        try:
+            index = BreachIndex(path)
+        except OSError as e:
+            raise ValueError(f"Cannot read breach index {path}: {e.strerror or e}")
+        with index:
+            breached = check_vault(self.db_service, index)
+        return {'checked': self.db_service.count_entries(), 'seconds': time.perf_counter() - started,
+                'breached': [entry_to_dict(entry) for entry in breached]}
+    
+    def _op_replica(self, request: Dict) -> str:
+        return self.db_service.replica_id()
+    
+    def _op_peer(self, request: Dict) -> Optional[int]:
+        # The last sequence number received from a peer, or records a new one
+        replica = LocalReplica(self.db_service)
+        if request.get('seq') is None:
+            return replica.peer_seq(str(request['peer']))
+        replica.record_peer(str(request['peer']), int(request['seq']))
+        return None
+    
+    def _op_changes(self, request: Dict) -> Dict:
+        limit = min(int(request.get('limit', SYNC_BATCH_SIZE)), SYNC_BATCH_SIZE)
+        return LocalReplica(self.db_service).changes(int(request['since']), request.get('exclude_origin'), limit)
+    
+    def _op_apply(self, request: Dict) -> int:
+        applied = LocalReplica(self.db_service).apply(list(request['changes']))
+        if applied and self.search_index is not None:
+            self.reload()
+        return applied
+
+class VaultAgent:
+    """Serves a VaultSession over a Unix domain socket with asyncio.
+    
+    The protocol is one JSON object per line in each direction. The socket
+    is created 0600 inside a 0700 directory, and on Linux connections from
+    other users are also refused by peer credentials. Writes made by other
+    processes (e.g. the GUI) are noticed through PRAGMA data_version and
+    trigger a reload of the in-memory index. Requests are answered on a
+    single worker thread, one at a time, so a slow one does not stall the
+    event loop and a reload never runs alongside a search.
+    """
+    
+    def __init__(self, db_service: DatabaseService, socket_path: Optional[str] = None,
+                 timeout: Optional[float] = None):
+        self.session = VaultSession(db_service, index=True)
+        self.db_service = db_service
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = self._timeout_from_env() if timeout is None else timeout
+        self._data_version = self._read_data_version()
+        self._last_request = time.monotonic()
+        self._stopping: Optional[asyncio.Event] = None
+        self._worker: Optional[ThreadPoolExecutor] = None
+    
+    @staticmethod
+    def _timeout_from_env() -> float:
+        try:
+            return float(os.environ.get('PASSWORD_MANAGER_AGENT_TIMEOUT', DEFAULT_AGENT_TIMEOUT))
+        except ValueError:
+            return DEFAULT_AGENT_TIMEOUT
+    
+    def run(self):
+        asyncio.run(self.serve())
+    
+    async def serve(self):
+        self._stopping = asyncio.Event()
+        if os.path.exists(self.socket_path):
+            if AgentClient(self.socket_path).is_running():
+                raise RuntimeError(f"An agent is already listening on {self.socket_path}")
+            os.remove(self.socket_path)
+        
+        old_umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path,
+                                                     limit=MAX_REQUEST_BYTES)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.socket_path, 0o600)
+        
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="agent")
+        watchdog = asyncio.ensure_future(self._watch_idle())
+        try:
+            async with server:
+                await self._stopping.wait()
+        finally:
+            watchdog.cancel()
+            # Lets a request already running finish before the vault is closed under it
+            self._worker.shutdown(wait=True, cancel_futures=True)
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            self.session.clear()
+            self.db_service.detach_encryption_service()
+            self.db_service.close()
+    
+    def stop(self):
+        if self._stopping is not None:
+            self._stopping.set()
+    
+    async def _watch_idle(self):
+        while self.timeout > 0:
+            remaining = self._last_request + self.timeout - time.monotonic()
+            if remaining <= 0:
+                print("Agent idle timeout reached; locking.")
+                self.stop()
+                return
+            await asyncio.sleep(remaining)
+    
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            if not self._peer_allowed(writer):
+                return
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Request longer than the stream limit
+                    break
+                if not line:
+                    break
+                self._last_request = time.monotonic()
+                response = await self._respond(line)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # Cancelled when the agent stops with the client still connected
+            pass
+        finally:
+            writer.close()
+    
+    async def _respond(self, line: bytes) -> Dict:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {'ok': False, 'error': "Request is not valid JSON"}
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': "Request must be a JSON object"}
+        if request.get('op') == 'stop':
+            self.stop()
+            return {'ok': True, 'result': None}
+        if self._stopping.is_set():
+            # The worker is being shut down and takes no more requests
+            return {'ok': False, 'error': "Agent is stopping"}
+        return await asyncio.get_running_loop().run_in_executor(self._worker, self._answer, request)
+    
+    def _answer(self, request: Dict) -> Dict:
+        # Runs on the worker thread, which does all the session's reads and reloads
+        data_version = self._read_data_version()
+        if data_version != self._data_version:
+            # Another connection committed since the last request
+            self._data_version = data_version
+            self.session.reload()
+        return self.session.handle(request)
+    
+    def _read_data_version(self) -> int:
+        with self.db_service.transaction() as conn:
+            return conn.execute('PRAGMA data_version').fetchone()[0]
+    
+    @staticmethod
+    def _peer_allowed(writer: asyncio.StreamWriter) -> bool:
+        sock = writer.get_extra_info('socket')
+        if sock is None or not hasattr(socket, 'SO_PEERCRED'):
+            return True
+        credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        _, uid, _ = struct.unpack('3i', credentials)
+        return uid == os.getuid()
+
+class AgentClient:
+    """Blocking client for VaultAgent; one connection per client object."""
+    
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = 5.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+    
+    def is_running(self) -> bool:
+        try:
+            return self.request('ping').get('ok', False)
+        except OSError:
+            return False
+        finally:
+            self.close()
+    
+    def request(self, op: str, **params) -> Dict:
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(self.timeout)
+            try:
+                self._sock.connect(self.socket_path)
+            except OSError:
+                self.close()
+                raise
+            self._reader = self._sock.makefile('rb')
+        self._sock.sendall(json.dumps(dict(params, op=op)).encode() + b'\n')
+        line = self._reader.readline()
+        if not line:
+            self.close()
+            raise ConnectionError("Agent closed the connection")
+        return json.loads(line)
+    
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
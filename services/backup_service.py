@@ -0,0 +1,136 @@
+import base64
+import json
+import os
+import struct
+import zlib
+from itertools import islice
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional
+from cryptography.fernet import InvalidToken
+from models.password_entry import PasswordEntry
+from services.database_service import DatabaseService
+from services.encryption_service import EncryptionService
+
+# Archive layout:
+#   header  ARCHIVE_MAGIC, format version, 16-byte salt, KDF iterations
+#   frames  4-byte length + raw Fernet token; each token holds the frame's
+#           sequence number and a zlib-compressed block of JSON lines.
+#           A frame with an empty block marks the end of the archive.
+ARCHIVE_MAGIC = b'PMARCHIV'
+ARCHIVE_VERSION = 1
+HEADER = struct.Struct('>8sB16sI')
+FRAME_LENGTH = struct.Struct('>I')
+FRAME_SEQUENCE = struct.Struct('>Q')
+
+# Entries per frame; bounds memory when writing and when reading back
+FRAME_ENTRIES = 500
+
+COMPRESSION_LEVEL = 6
+
+EXPORT_FIELDS = ('website', 'username', 'email', 'password', 'notes')
+
+def export_archive(db_service: DatabaseService, path: str, passphrase: str,
+                   progress: Optional[Callable[[int], None]] = None, frame_entries: int = FRAME_ENTRIES,
+                   iterations: Optional[int] = None) -> int:
+    """Stream every entry into an encrypted, compressed archive at path.
+    
+    Entries are read with iter_entries and written one frame at a time, so
+    memory stays flat whatever the vault size. The archive key is derived
+    from passphrase with a fresh random salt. Returns the number of entries
+    written; progress(exported) is called after every frame.
+    """
+    if iterations is None:
+        iterations = EncryptionService.calibrate_iterations()
+    salt = os.urandom(16)
+    cipher = EncryptionService(passphrase, iterations, salt=salt)
+    
+    failures = []
+    entries = db_service.iter_entries(chunk_size=frame_entries, lazy=False,
+                                      on_error=lambda index, e: failures.append(e))
+    tmp_path = path + '.tmp'
+    exported = 0
+    try:
+        with open(tmp_path, 'wb') as stream:
+            stream.write(HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, salt, iterations))
+            sequence = 0
+            while True:
+                batch = list(islice(entries, frame_entries))
+                if failures:
+                    # A blank password in a backup is silent data loss
+                    raise ValueError(f"Could not decrypt {len(failures)} entries; is the vault key correct?")
+                _write_frame(stream, cipher, sequence, batch)
+                if not batch:
+                    break
+                sequence += 1
+                exported += len(batch)
+                if progress is not None:
+                    progress(exported)
+        os.replace(tmp_path, path)
+    except BaseException:
+        entries.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return exported
+
+def is_archive(path: str) -> bool:
+    with open(path, 'rb') as stream:
+        return stream.read(len(ARCHIVE_MAGIC)) == ARCHIVE_MAGIC
+
+def iter_archive(path: str, passphrase: str) -> Iterator[PasswordEntry]:
+    """Yield the entries of an archive written by export_archive, one frame at a time.
+    
+    Raises ValueError for a wrong passphrase, a damaged or truncated file
+    and frames that were reordered or dropped.
+    """
+    with open(path, 'rb') as stream:
+        header = stream.read(HEADER.size)
+        if len(header) < HEADER.size or not header.startswith(ARCHIVE_MAGIC):
+            raise ValueError("Not a password manager archive")
+        magic, version, salt, iterations = HEADER.unpack(header)
+        if version != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported archive version {version}")
+        cipher = EncryptionService(passphrase, iterations, salt=salt)
+        
+        sequence = 0
+        while True:
+            payload = _read_frame(stream, cipher)
+            if FRAME_SEQUENCE.unpack_from(payload)[0] != sequence:
+                raise ValueError("Archive frames are out of order")
+            block = payload[FRAME_SEQUENCE.size:]
+            if not block:
+                return
+            # split('\n') rather than splitlines(): JSON keeps U+2028 and friends unescaped
+            for line in zlib.decompress(block).decode().split('\n'):
+                if line:
+                    yield _record_to_entry(json.loads(line))
+            sequence += 1
+
+def _write_frame(stream: BinaryIO, cipher: EncryptionService, sequence: int, entries: List[PasswordEntry]):
+    block = b''
+    if entries:
+        lines = ''.join(json.dumps(_entry_record(entry), ensure_ascii=False) + '\n' for entry in entries)
+        block = zlib.compress(lines.encode(), COMPRESSION_LEVEL)
+    token = cipher.fernet.encrypt(FRAME_SEQUENCE.pack(sequence) + block)
+    raw = base64.urlsafe_b64decode(token)
+    stream.write(FRAME_LENGTH.pack(len(raw)))
+    stream.write(raw)
+
+def _read_frame(stream: BinaryIO, cipher: EncryptionService) -> bytes:
+    prefix = stream.read(FRAME_LENGTH.size)
+    if len(prefix) < FRAME_LENGTH.size:
+        raise ValueError("Archive is truncated")
+    raw = stream.read(FRAME_LENGTH.unpack(prefix)[0])
+    try:
+        return cipher.fernet.decrypt(base64.urlsafe_b64encode(raw))
+    except InvalidToken:
+        raise ValueError("Wrong passphrase or damaged archive")
+
+def _entry_record(entry: PasswordEntry) -> Dict:
+    record = {field: getattr(entry, field) for field in EXPORT_FIELDS}
+    record['date_created'] = entry.date_created.isoformat()
+    record['date_modified'] = entry.date_modified.isoformat()
+    return record
+
+def _record_to_entry(record: Dict) -> PasswordEntry:
+    values = {field: record.get(field) or "" for field in EXPORT_FIELDS}
+    return PasswordEntry(date_created=record['date_created'], date_modified=record['date_modified'], **values)
@@ -0,0 +1,289 @@
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple
+from models.password_entry import PasswordEntry
+from services.database_service import DatabaseService
+
+# Breach index file layout (all integers big-endian):
+#   header   INDEX_HEADER: magic, version, bloom hash count, bloom block count, hash count
+#   fanout   FANOUT_SIZE + 1 cumulative counts, by the first two bytes of the hash
+#   hashes   sorted, de-duplicated 20-byte SHA-1 digests
+#   bloom    bloom block count * BLOOM_BLOCK_BYTES bytes
+INDEX_MAGIC = b'PMBREACH'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('>8sBBxxxxxxQQ')
+FANOUT_SIZE = 1 << 16
+FANOUT_OFFSET = INDEX_HEADER.size
+HASHES_OFFSET = FANOUT_OFFSET + (FANOUT_SIZE + 1) * 8
+DIGEST_SIZE = 20
+
+# Register-blocked Bloom filter: all of a hash's bits land in one 64-bit
+# word, so a lookup reads a single word of the mapped file and the masks stay
+# small ints. A few more false positives than a classic filter, which the
+# exact list settles anyway.
+BLOOM_BLOCK_BYTES = 8
+BLOOM_BLOCK_BITS = BLOOM_BLOCK_BYTES * 8
+
+# Bits within a block come from the low 6 bits of each of the last 12 digest bytes
+MAX_BLOOM_HASHES = 12
+
+# ~2% false positives with register blocking
+DEFAULT_BITS_PER_ENTRY = 10
+
+# Hashes sorted in memory per run while building (~70 MB of Python objects)
+BUILD_RUN_SIZE = 1000000
+
+def default_index_path() -> str:
+    return os.path.join(os.path.dirname(DatabaseService.default_db_path()), "breach.idx")
+
+def password_digest(password: str) -> bytes:
+    # Breach corpora (e.g. Have I Been Pwned) publish unsalted SHA-1 of the password
+    return hashlib.sha1(password.encode()).digest()
+
+def _bloom_position(digest: bytes, hash_count: int, blocks: int) -> Tuple[int, int]:
+    # The digest is already uniformly distributed: its first 8 bytes pick the
+    # block (scaled rather than taken modulo, so sorted digests fill the blocks
+    # in order) and the last hash_count bytes pick the bits within it.
+    # Returns the block number and the bits as a little-endian 64-bit mask.
+    block = (int.from_bytes(digest[:8], 'big') * blocks) >> 64
+    mask = 0
+    for byte in digest[DIGEST_SIZE - hash_count:]:
+        mask |= 1 << (byte & 63)
+    return block, mask
+
+def iter_corpus_digests(stream: Iterable[bytes], on_invalid: Optional[Callable[[bytes], None]] = None
+                        ) -> Iterator[bytes]:
+    """Yield the SHA-1 digests of a corpus with one hex hash per line.
+    
+    Anything after the 40 hex characters (such as the ":count" suffix of
+    Have I Been Pwned dumps) is ignored.
+    """
+    for line in stream:
+        try:
+            digest = bytes.fromhex(line[:40].decode('ascii'))
+        except ValueError:
+            digest = None
+        if digest is not None and len(digest) == DIGEST_SIZE:
+            yield digest
+        elif line.strip() and on_invalid is not None:
+            on_invalid(line)
+
+def build_index(corpus_path: str, index_path: str, bits_per_entry: int = DEFAULT_BITS_PER_ENTRY,
+                run_size: int = BUILD_RUN_SIZE, progress: Optional[Callable[[str, int], None]] = None) -> int:
+    """Build a breach index from a SHA-1 corpus and return the number of distinct hashes.
+    
+    The corpus is sorted externally: runs of run_size hashes are sorted in
+    memory and spilled to temporary files, then merged straight into the
+    index. The Bloom filter is then written in one sequential pass over
+    the sorted hashes, so memory stays bounded by the run size however
+    large the corpus is. bits_per_entry=0 leaves the filter out. progress(stage,
+    count) is called as hashes are read, merged and added to the filter.
+    """
+    hash_count = min(MAX_BLOOM_HASHES, max(1, round(bits_per_entry * 0.693))) if bits_per_entry else 0
+    tmp_path = index_path + '.building'
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(index_path))) as run_dir:
+        runs = _write_sorted_runs(corpus_path, run_dir, run_size, progress)
+        with open(tmp_path, 'w+b') as index:
+            index.write(bytes(HASHES_OFFSET))
+            count, fanout = _merge_runs(runs, index, progress)
+        
+        blocks = -(-count * bits_per_entry // BLOOM_BLOCK_BITS) if hash_count else 0
+        with open(tmp_path, 'r+b') as index:
+            index.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, hash_count, blocks, count))
+            index.write(struct.pack(f'>{FANOUT_SIZE + 1}Q', *fanout))
+            if blocks:
+                _write_bloom(index, count, hash_count, blocks, progress)
+    os.replace(tmp_path, index_path)
+    return count
+
+def _write_sorted_runs(corpus_path: str, run_dir: str, run_size: int,
+                       progress: Optional[Callable[[str, int], None]]) -> List[str]:
+    runs = []
+    read = 0
+    
+    def spill(batch):
+        batch.sort()
+        path = os.path.join(run_dir, f"run{len(runs)}")
+        with open(path, 'wb') as run:
+            run.write(b''.join(batch))
+        runs.append(path)
+    
+    with open(corpus_path, 'rb') as corpus:
+        batch = []
+        for digest in iter_corpus_digests(corpus):
+            batch.append(digest)
+            if len(batch) >= run_size:
+                read += len(batch)
+                spill(batch)
+                batch = []
+                if progress is not None:
+                    progress('read', read)
+        if batch or not runs:
+            read += len(batch)
+            spill(batch)
+    if progress is not None:
+        progress('read', read)
+    return runs
+
+def _read_run(path: str) -> Iterator[bytes]:
+    with open(path, 'rb') as run:
+        yield from _read_digests(run)
+
+def _read_digests(stream: BinaryIO, count: Optional[int] = None) -> Iterator[bytes]:
+    # In 1 MB reads; stops after `count` digests or at the end of the stream
+    chunk_size = DIGEST_SIZE * 52428
+    remaining = count * DIGEST_SIZE if count is not None else None
+    while remaining is None or remaining > 0:
+        chunk = stream.read(chunk_size if remaining is None else min(chunk_size, remaining))
+        if not chunk:
+            return
+        if remaining is not None:
+            remaining -= len(chunk)
+        for offset in range(0, len(chunk) - DIGEST_SIZE + 1, DIGEST_SIZE):
+            yield chunk[offset:offset + DIGEST_SIZE]
+
+def _merge_runs(runs: List[str], index: BinaryIO, progress: Optional[Callable[[str, int], None]]):
+    fanout = [0] * (FANOUT_SIZE + 1)
+    count = 0
+    previous = None
+    buffer = []
+    for digest in heapq.merge(*map(_read_run, runs)):
+        if digest == previous:
+            continue
+        previous = digest
+        buffer.append(digest)
+        fanout[(digest[0] << 8 | digest[1]) + 1] += 1
+        count += 1
+        if len(buffer) >= 65536:
+            index.write(b''.join(buffer))
+            buffer = []
+            if progress is not None and count % (1 << 20) < 65536:
+                progress('merge', count)
+    index.write(b''.join(buffer))
+    for bucket in range(FANOUT_SIZE):
+        fanout[bucket + 1] += fanout[bucket]
+    if progress is not None:
+        progress('merge', count)
+    return count, fanout
+
+def _write_bloom(index: BinaryIO, count: int, hash_count: int, blocks: int,
+                 progress: Optional[Callable[[str, int], None]]):
+    # Sorted digests map to non-decreasing blocks, so each block is complete
+    # once the next one starts and can be appended straight away
+    index.seek(0, os.SEEK_END)
+    with open(index.name, 'rb') as hashes:
+        hashes.seek(HASHES_OFFSET)
+        current, mask = 0, 0
+        for i, digest in enumerate(_read_digests(hashes, count)):
+            block, bits = _bloom_position(digest, hash_count, blocks)
+            if block != current:
+                index.write(mask.to_bytes(BLOOM_BLOCK_BYTES, 'little'))
+                index.write(bytes(BLOOM_BLOCK_BYTES * (block - current - 1)))
+                current, mask = block, 0
+            mask |= bits
+            if progress is not None and i % (1 << 20) == 0:
+                progress('bloom', i)
+    index.write(mask.to_bytes(BLOOM_BLOCK_BYTES, 'little'))
+    index.write(bytes(BLOOM_BLOCK_BYTES * (blocks - current - 1)))
+    if progress is not None:
+        progress('bloom', count)
+
+class BreachIndex:
+    """Read-only lookups in a breach index built by build_index().
+    
+    The file is memory-mapped, so opening it is instant and only the pages a
+    lookup touches are read. A Bloom filter miss answers most lookups from
+    one block; possible hits are confirmed by binary search in the hash's
+    fanout bucket of the sorted list.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_index_path()
+        self._file = open(self.path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{self.path} is not a breach index")
+        magic, version, self.hash_count, self.blocks, self.count = INDEX_HEADER.unpack_from(self._map)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a breach index")
+        self._bloom_offset = HASHES_OFFSET + self.count * DIGEST_SIZE
+        self.bloom_rejections = 0
+        self.lookups = 0
+    
+    def close(self):
+        self._map.close()
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def contains_password(self, password: str) -> bool:
+        return bool(password) and self.contains_digest(password_digest(password))
+    
+    def contains_digest(self, digest: bytes) -> bool:
+        self.lookups += 1
+        if self.blocks and not self._bloom_may_contain(digest):
+            self.bloom_rejections += 1
+            return False
+        
+        bucket = digest[0] << 8 | digest[1]
+        low, high = struct.unpack_from('>QQ', self._map, FANOUT_OFFSET + bucket * 8)
+        mapped = self._map
+        while low < high:
+            middle = (low + high) // 2
+            offset = HASHES_OFFSET + middle * DIGEST_SIZE
+            candidate = mapped[offset:offset + DIGEST_SIZE]
+            if candidate == digest:
+                return True
+            if candidate < digest:
+                low = middle + 1
+            else:
+                high = middle
+        return False
+    
+    def _bloom_may_contain(self, digest: bytes) -> bool:
+        block, mask = _bloom_position(digest, self.hash_count, self.blocks)
+        offset = self._bloom_offset + block * BLOOM_BLOCK_BYTES
+        return int.from_bytes(self._map[offset:offset + BLOOM_BLOCK_BYTES], 'little') & mask == mask
+
+def check_vault(db_service: DatabaseService, index: BreachIndex,
+                progress: Optional[Callable[[int, float], None]] = None) -> List[PasswordEntry]:
+    """Return the vault entries whose password is in the breach index.
+    
+    Entries are streamed with iter_entries and decrypted a chunk at a time,
+    so the vault is never held in memory at once. What is kept grows with
+    the vault: the breached entries returned, and the digest and result of
+    each distinct password, which is looked up only once.
+    progress(checked, elapsed_seconds) is called every 500 entries.
+    """
+    started = time.perf_counter()
+    breached = []
+    seen = {}
+    checked = 0
+    for entry in db_service.iter_entries(lazy=False):
+        digest = password_digest(entry.password) if entry.password else None
+        if digest is not None:
+            if digest not in seen:
+                seen[digest] = index.contains_digest(digest)
+            if seen[digest]:
+                breached.append(entry)
+        checked += 1
+        if progress is not None and checked % 500 == 0:
+            progress(checked, time.perf_counter() - started)
+    if progress is not None:
+        progress(checked, time.perf_counter() - started)
+    return breached
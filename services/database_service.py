@@ -1,114 +1,790 @@
+import base64
+import hmac
 import sqlite3
 import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from itertools import groupby, islice
 from datetime import datetime
-from typing import List, Optional
-from models.password_entry import PasswordEntry
-from services.encryption_service import EncryptionService
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from models.password_entry import PasswordEntry, LazyPasswordEntry
+from services.encryption_service import EncryptionService, InvalidMasterPassword, DEFAULT_ITERATIONS, LEGACY_SALT
+
+# Statements are kept as module constants so sqlite3's statement cache can reuse
+# the prepared form across calls on the long-lived connection.
+SELECT_ALL_ENTRIES = '''
+    SELECT id, website, username, email, password, notes,
+           date_created, date_modified
+    FROM password_entries
+    ORDER BY website, id
+'''
+
+# Keyset pagination on the same (website, id) order as SELECT_ALL_ENTRIES
+SELECT_FIRST_PAGE = '''
+    SELECT id, website, username, email, password, notes,
+           date_created, date_modified
+    FROM password_entries
+    ORDER BY website, id
+    LIMIT ?
+'''
+
+SELECT_NEXT_PAGE = '''
+    SELECT id, website, username, email, password, notes,
+           date_created, date_modified
+    FROM password_entries
+    WHERE (website, id) > (?, ?)
+    ORDER BY website, id
+    LIMIT ?
+'''
+
+SELECT_ENTRY = '''
+    SELECT id, website, username, email, password, notes,
+           date_created, date_modified
+    FROM password_entries
+    WHERE id = ?
+'''
+
+COUNT_ENTRIES = 'SELECT COUNT(*) FROM password_entries'
+
+# Cheap fingerprint of the table contents, compared before reusing a cached entry list;
+# the change log sequence also moves when sync applies an older edit
+CHANGE_MARKER = '''
+    SELECT COUNT(*), MAX(id), MAX(date_modified), (SELECT MAX(seq) FROM change_log)
+    FROM password_entries
+'''
+
+INSERT_ENTRY = '''
+    INSERT INTO password_entries
+    (website, username, email, password, notes, date_created, date_modified, password_fingerprint, entry_uid)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Also drops any re-encrypted copy from a master password change in progress,
+# so VaultRekey.finish() re-encrypts the new value
+UPDATE_ENTRY = '''
+    UPDATE password_entries
+    SET website=?, username=?, email=?, password=?, notes=?, date_modified=?, password_fingerprint=?,
+        rekey_password=NULL, rekey_fingerprint=NULL
+    WHERE id=?
+'''
+
+DELETE_ENTRY = 'DELETE FROM password_entries WHERE id=?'
+
+# For ids handed out by reserve_entry_ids() ahead of the write (services.edit_queue)
+INSERT_ENTRY_WITH_ID = '''
+    INSERT INTO password_entries
+    (id, website, username, email, password, notes, date_created, date_modified, password_fingerprint, entry_uid)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# AUTOINCREMENT never hands out an id at or below this, even one whose row was deleted
+SELECT_ID_SEQUENCE = '''
+    SELECT MAX(IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'password_entries'), 0), IFNULL(MAX(id), 0))
+    FROM password_entries
+'''
+
+UPDATE_ID_SEQUENCE = "UPDATE sqlite_sequence SET seq = ? WHERE name = 'password_entries'"
+
+INSERT_ID_SEQUENCE = "INSERT INTO sqlite_sequence (name, seq) VALUES ('password_entries', ?)"
+
+# The change log keeps one row per entry: REPLACE drops the previous change
+# and gives the entry the next sequence number
+LOG_CHANGE = '''
+    INSERT OR REPLACE INTO change_log (entry_uid, date_modified, deleted, origin)
+    VALUES (?, ?, ?, ?)
+'''
+
+LOG_ENTRY_CHANGE = '''
+    INSERT OR REPLACE INTO change_log (entry_uid, date_modified, deleted, origin)
+    SELECT entry_uid, ?, ?, ? FROM password_entries WHERE id = ?
+'''
+
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',   # safe with WAL, avoids an fsync per commit
+    'PRAGMA cache_size=-8000',     # ~8 MB page cache
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA foreign_keys=ON',
+)
+
+# Schema history, applied in order and tracked in PRAGMA user_version. Append
+# new steps; never edit one that has shipped.
+SCHEMA_MIGRATIONS = (
+    # 1: initial schema (vaults from before versioning already have it)
+    (
+        '''
+        CREATE TABLE IF NOT EXISTS password_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            website TEXT NOT NULL,
+            username TEXT,
+            email TEXT,
+            password TEXT NOT NULL,
+            notes TEXT,
+            date_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            date_modified TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS vault_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        ''',
+    ),
+    # 2: indexes for the (website, id) listing order, username lookups and
+    #    recently-modified queries; the rowid rides along in every index
+    (
+        'CREATE INDEX IF NOT EXISTS idx_entries_website ON password_entries (website)',
+        'CREATE INDEX IF NOT EXISTS idx_entries_username ON password_entries (username)',
+        'CREATE INDEX IF NOT EXISTS idx_entries_date_modified ON password_entries (date_modified)',
+    ),
+    # 3: keyed password fingerprints (EncryptionService.fingerprint) for reuse
+    #    detection, and (website, username) for duplicate logins. Existing rows
+    #    start NULL and are filled in by FingerprintBackfill once unlocked.
+    (
+        'ALTER TABLE password_entries ADD COLUMN password_fingerprint BLOB',
+        'CREATE INDEX IF NOT EXISTS idx_entries_password_fingerprint ON password_entries (password_fingerprint)',
+        'CREATE INDEX IF NOT EXISTS idx_entries_website_username ON password_entries (website, username)',
+    ),
+    # 4: master password changes (services.rekey_service). Rows are re-encrypted
+    #    into the rekey_* columns batch by batch, tracked in rekey_progress, and
+    #    swapped in by one final transaction, so the vault opens with the old
+    #    password until then and an interrupted change can resume.
+    (
+        'ALTER TABLE password_entries ADD COLUMN rekey_password BLOB',
+        'ALTER TABLE password_entries ADD COLUMN rekey_fingerprint BLOB',
+        '''
+        CREATE TABLE IF NOT EXISTS rekey_progress (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            salt BLOB NOT NULL,
+            iterations INTEGER NOT NULL,
+            key_verifier TEXT NOT NULL,
+            last_id INTEGER NOT NULL DEFAULT 0,
+            started TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ),
+    # 5: change journal for syncing replicas (services.sync_service). entry_uid
+    #    names an entry across copies of the vault; rows from before it get one
+    #    derived from id and date_created, so copies of one file agree on them.
+    #    change_log holds the latest change per entry, deletions included, and
+    #    sync_peers the last sequence number received from each other replica.
+    (
+        'ALTER TABLE password_entries ADD COLUMN entry_uid TEXT',
+        """UPDATE password_entries SET entry_uid = 'legacy-' || id || '-' || IFNULL(date_created, '')
+           WHERE entry_uid IS NULL""",
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_entries_entry_uid ON password_entries (entry_uid)',
+        '''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_uid TEXT NOT NULL UNIQUE,
+            date_modified TIMESTAMP NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0,
+            origin TEXT
+        )
+        ''',
+        '''
+        INSERT INTO change_log (entry_uid, date_modified)
+        SELECT entry_uid, IFNULL(date_modified, CURRENT_TIMESTAMP) FROM password_entries ORDER BY id
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS sync_peers (
+            replica_id TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL DEFAULT 0,
+            last_sync TIMESTAMP
+        )
+        ''',
+    ),
+)
+
+SCHEMA_VERSION = len(SCHEMA_MIGRATIONS)
+
+# Columns query_entries() can order by; each is indexed
+ORDER_COLUMNS = ('website', 'username', 'date_modified')
+
+SELECT_ENTRY_COLUMNS = '''
+    SELECT id, website, username, email, password, notes,
+           date_created, date_modified
+    FROM password_entries
+'''
+
+# Stored by FingerprintBackfill for rows it could not decrypt, so it does not try them again
+UNDECRYPTABLE_FINGERPRINT = b''
+
+# Entries sharing a password with at least one other, grouped by fingerprint;
+# the GROUP BY walks idx_entries_password_fingerprint and nothing is decrypted.
+# Comparing with X'' leaves out both NULL and UNDECRYPTABLE_FINGERPRINT.
+SELECT_REUSED_PASSWORDS = '''
+    SELECT e.id, e.website, e.username, e.email, e.password, e.notes,
+           e.date_created, e.date_modified, e.password_fingerprint
+    FROM password_entries e
+    JOIN (SELECT password_fingerprint FROM password_entries
+          WHERE password_fingerprint > X''
+          GROUP BY password_fingerprint HAVING COUNT(*) > 1) reused
+      ON e.password_fingerprint = reused.password_fingerprint
+    ORDER BY e.password_fingerprint, e.website, e.id
+'''
+
+# Entries with the same website and username as another
+SELECT_DUPLICATE_LOGINS = '''
+    SELECT e.id, e.website, e.username, e.email, e.password, e.notes,
+           e.date_created, e.date_modified
+    FROM password_entries e
+    JOIN (SELECT website, username FROM password_entries
+          GROUP BY website, username HAVING COUNT(*) > 1) duplicate
+      ON e.website = duplicate.website AND e.username IS duplicate.username
+    ORDER BY e.website, e.username, e.id
+'''
+
+COUNT_MISSING_FINGERPRINTS = '''
+    SELECT COUNT(*) FROM password_entries
+    WHERE password_fingerprint IS NULL AND password != ''
+'''
+
+COUNT_UNDECRYPTABLE = "SELECT COUNT(*) FROM password_entries WHERE password_fingerprint = X''"
+
+SELECT_SAMPLE_CIPHERTEXT = "SELECT password FROM password_entries WHERE password != '' LIMIT 1"
+
+SELECT_META = 'SELECT value FROM vault_meta WHERE key=?'
+
+UPSERT_META = 'INSERT OR REPLACE INTO vault_meta (key, value) VALUES (?, ?)'
+
+# Rows per transaction for bulk imports
+IMPORT_BATCH_SIZE = 2000
+
+# Rows fetched per round trip when streaming the vault
+ITER_CHUNK_SIZE = 500
+
+# Pages copied per step of an online backup; writers can get in between steps
+BACKUP_PAGES_PER_STEP = 1024
 
 class DatabaseService:
-    def __init__(self, master_password: str):
-        self.db_path = self._get_db_path()
-        self.encryption_service = EncryptionService(master_password)
+    def __init__(self, master_password: Optional[str] = None, db_path: Optional[str] = None,
+                 encryption_service: Optional[EncryptionService] = None):
+        # Without a password or encryption service the vault is opened locked:
+        # the schema is ready but nothing can be decrypted until
+        # attach_encryption_service() is called (see services.unlock_service).
+        self.db_path = db_path or self._get_db_path()
+        self._lock = threading.RLock()
+        # Bound once so every lazy entry shares one method object
+        self._decryptor = self.decrypt_password
+        self._conn = self._connect()
         self._initialize_database()
+        self._replica_id: Optional[str] = None
+        self.encryption_service = None
+        if encryption_service is None and master_password is not None:
+            iterations, salt = self.read_kdf_params(self.db_path, self.connection)
+            encryption_service = EncryptionService(master_password, iterations or DEFAULT_ITERATIONS,
+                                                   salt=salt or EncryptionService.generate_salt())
+        if encryption_service is not None:
+            self.attach_encryption_service(encryption_service)
     
-    def _get_db_path(self) -> str:
+    @staticmethod
+    def default_db_path() -> str:
         app_data = os.path.expanduser("~")
         app_folder = os.path.join(app_data, "PasswordManager")
         os.makedirs(app_folder, exist_ok=True)
         return os.path.join(app_folder, "passwords.db")
     
+    def _get_db_path(self) -> str:
+        return self.default_db_path()
+    
+    def _connect(self) -> sqlite3.Connection:
+        # One connection for the lifetime of the service; worker threads share it
+        # through self._lock instead of opening their own.
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=128)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("DatabaseService is closed")
+        return self._conn
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    # Refresh planner statistics where they are stale, then fold the
+                    # WAL back into the main file so the vault is a single file at rest
+                    self._conn.execute('PRAGMA optimize')
+                    self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                except sqlite3.Error:
+                    pass
+                self._conn.close()
+                self._conn = None
+    
+    @contextmanager
+    def transaction(self):
+        # Exclusive use of the shared connection; commits on success, rolls back on error
+        with self._lock, self.connection as conn:
+            yield conn
+    
+    def open(self):
+        # Reopen after close(), e.g. when unlocking again from the session cache
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def backup(self, dest_path: str, pages: int = BACKUP_PAGES_PER_STEP,
+               progress: Optional[Callable[[int, int], None]] = None):
+        """Snapshot the live vault to dest_path with SQLite's online backup API.
+        
+        The copy runs on its own connection in steps of `pages` pages, so the
+        app keeps reading and writing meanwhile; the backup restarts itself if
+        another connection writes mid-copy. progress(copied, total) is called
+        after each step. The file is written next to dest_path and moved into
+        place once complete. Works on a locked vault: the rows stay encrypted.
+        """
+        tmp_path = dest_path + '.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        source = self._connect()
+        try:
+            target = sqlite3.connect(tmp_path)
+            try:
+                report = None
+                if progress is not None:
+                    report = lambda status, remaining, total: progress(total - remaining, total)
+                source.backup(target, pages=pages, progress=report)
+                # A self-contained file: no -wal needed next to it
+                target.execute('PRAGMA journal_mode=DELETE')
+            finally:
+                target.close()
+        finally:
+            source.close()
+        os.replace(tmp_path, dest_path)
+    
     def _initialize_database(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS password_entries (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    website TEXT NOT NULL,
-                    username TEXT,
-                    email TEXT,
-                    password TEXT NOT NULL,
-                    notes TEXT,
-                    date_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    date_modified TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            conn.commit()
-    
-    def get_all_entries(self) -> List[PasswordEntry]:
-        entries = []
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, website, username, email, password, notes, 
-                       date_created, date_modified 
-                FROM password_entries 
-                ORDER BY website
-            ''')
-            
-            for row in cursor.fetchall():
-                entry = PasswordEntry(
-                    id=row[0],
-                    website=row[1],
-                    username=row[2] or "",
-                    email=row[3] or "",
-                    password=self.encryption_service.decrypt(row[4]),
-                    notes=row[5] or "",
-                    date_created=datetime.fromisoformat(row[6]) if row[6] else datetime.now(),
-                    date_modified=datetime.fromisoformat(row[7]) if row[7] else datetime.now()
-                )
-                entries.append(entry)
+        self._migrate_schema()
+    
+    def _migrate_schema(self):
+        # One transaction per step: a failed step leaves the vault at the previous
+        # version. The version is re-read under the write lock, so two processes
+        # opening an old vault at once don't apply a step twice.
+        with self._lock:
+            conn = self.connection
+            while True:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    version = conn.execute('PRAGMA user_version').fetchone()[0]
+                    if version >= SCHEMA_VERSION:
+                        conn.commit()
+                        return
+                    for statement in SCHEMA_MIGRATIONS[version]:
+                        conn.execute(statement)
+                    conn.execute(f'PRAGMA user_version = {version + 1}')
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+    
+    def schema_version(self) -> int:
+        with self._lock:
+            return self.connection.execute('PRAGMA user_version').fetchone()[0]
+    
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.connection.execute(SELECT_META, (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, key: str, value):
+        with self._lock, self.connection as conn:
+            conn.execute(UPSERT_META, (key, str(value)))
+    
+    def replica_id(self) -> str:
+        # Names this copy of the vault in the change log and to sync peers. A
+        # copied file is a new replica, so the id is issued again when the file
+        # turns up on another host or inode than the one it was issued for.
+        if self._replica_id is None:
+            origin = f"{socket.gethostname()}:{os.stat(self.db_path).st_ino}"
+            with self.transaction() as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                replica_id = conn.execute(SELECT_META, ('replica_id',)).fetchone()
+                stored_origin = conn.execute(SELECT_META, ('replica_origin',)).fetchone()
+                if replica_id is None or stored_origin is None or stored_origin[0] != origin:
+                    replica_id = (uuid.uuid4().hex,)
+                    conn.execute(UPSERT_META, ('replica_id', replica_id[0]))
+                    conn.execute(UPSERT_META, ('replica_origin', origin))
+            self._replica_id = replica_id[0]
+        return self._replica_id
+    
+    def kdf_iterations(self) -> Optional[int]:
+        with self._lock:
+            return self.read_kdf_iterations(self.db_path, self.connection)
+    
+    @staticmethod
+    def read_kdf_iterations(db_path: str, conn: Optional[sqlite3.Connection] = None) -> Optional[int]:
+        return DatabaseService.read_kdf_params(db_path, conn)[0]
+    
+    @staticmethod
+    def read_kdf_params(db_path: str, conn: Optional[sqlite3.Connection] = None
+                        ) -> Tuple[Optional[int], Optional[bytes]]:
+        # Stored work factor and salt. Vaults that predate vault_meta get
+        # DEFAULT_ITERATIONS and LEGACY_SALT; a vault with no entries yet gets
+        # (None, None) and is calibrated and salted on first unlock.
+        # Usable from other threads without a DatabaseService.
+        own_conn = conn is None
+        if own_conn:
+            if not os.path.exists(db_path):
+                return None, None
+            conn = sqlite3.connect(db_path)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            if 'vault_meta' in tables:
+                row = conn.execute(SELECT_META, ('kdf_iterations',)).fetchone()
+                if row:
+                    salt = conn.execute(SELECT_META, ('kdf_salt',)).fetchone()
+                    return int(row[0]), base64.b64decode(salt[0]) if salt else LEGACY_SALT
+            if 'password_entries' in tables and conn.execute(
+                    'SELECT 1 FROM password_entries LIMIT 1').fetchone():
+                return DEFAULT_ITERATIONS, LEGACY_SALT
+            return None, None
+        finally:
+            if own_conn:
+                conn.close()
+    
+    def attach_encryption_service(self, encryption_service: EncryptionService):
+        """Unlock with encryption_service, raising InvalidMasterPassword if its key is wrong."""
+        verifier = self.get_meta('key_verifier')
+        if verifier is not None:
+            if not hmac.compare_digest(verifier, encryption_service.key_verifier()):
+                raise InvalidMasterPassword("Incorrect master password")
+        else:
+            # New vault, or one from before key verifiers: prove the key on a
+            # stored row, then record the work factor, salt and verifier
+            with self._lock:
+                row = self.connection.execute(SELECT_SAMPLE_CIPHERTEXT).fetchone()
+            failures = []
+            if row:
+                encryption_service.decrypt_many([row[0]], on_error=lambda index, e: failures.append(e))
+            if failures:
+                raise InvalidMasterPassword("Incorrect master password")
+            with self.transaction() as conn:
+                if self.read_kdf_iterations(self.db_path, conn) is None:
+                    conn.execute(UPSERT_META, ('kdf_iterations', str(encryption_service.iterations)))
+                if conn.execute(SELECT_META, ('kdf_salt',)).fetchone() is None:
+                    conn.execute(UPSERT_META, ('kdf_salt', base64.b64encode(encryption_service.salt).decode()))
+                conn.execute(UPSERT_META, ('key_verifier', encryption_service.key_verifier()))
+        self.encryption_service = encryption_service
+    
+    def detach_encryption_service(self):
+        self.encryption_service = None
+    
+    @property
+    def is_unlocked(self) -> bool:
+        return self.encryption_service is not None
+    
+    def decrypt_password(self, ciphertext: str) -> str:
+        # Lazy entries decrypt through here, so they follow the key across lock/unlock
+        if self.encryption_service is None:
+            raise RuntimeError("Vault is locked")
+        return self.encryption_service.decrypt(ciphertext)
+    
+    def get_all_entries(self, lazy: bool = True) -> List[PasswordEntry]:
+        with self._lock:
+            rows = self.connection.execute(SELECT_ALL_ENTRIES).fetchall()
+        return self._rows_to_entries(rows, lazy)
+    
+    def _rows_to_entries(self, rows, lazy: bool = True,
+                         on_error: Optional[Callable[[int, Exception], None]] = None) -> List[PasswordEntry]:
+        if lazy:
+            return [self._row_to_entry(row) for row in rows]
+        # Eager loads decrypt the whole batch at once so it can spread across cores
+        passwords = self.encryption_service.decrypt_many([row[4] for row in rows], on_error)
+        return [self._row_to_entry(row, lazy=False, password=password) for row, password in zip(rows, passwords)]
+    
+    
+    def iter_entries(self, chunk_size: int = ITER_CHUNK_SIZE, lazy: bool = True,
+                     on_error: Optional[Callable[[int, Exception], None]] = None) -> Iterator[PasswordEntry]:
+        """Yield every entry in (website, id) order without loading the vault.
         
-        return entries
+        Rows are read chunk by chunk with fetchmany on a dedicated connection,
+        so the shared one stays free while the caller works through the
+        generator. The single SELECT reads one consistent snapshot and, with
+        WAL, does not block writers. on_error is passed to decrypt_many for
+        eager (lazy=False) iteration.
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.execute(SELECT_ALL_ENTRIES)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from self._rows_to_entries(rows, lazy, on_error)
+        finally:
+            conn.close()
+    
+    def get_entries_page(self, limit: int, after: Optional[Tuple[str, int]] = None,
+                         lazy: bool = True) -> List[PasswordEntry]:
+        # `after` is the (website, id) of the last row of the previous page
+        with self._lock:
+            if after is None:
+                rows = self.connection.execute(SELECT_FIRST_PAGE, (limit,)).fetchall()
+            else:
+                rows = self.connection.execute(SELECT_NEXT_PAGE, (after[0], after[1], limit)).fetchall()
+        return self._rows_to_entries(rows, lazy)
+    
+    def get_entry(self, entry_id: int, lazy: bool = True) -> Optional[PasswordEntry]:
+        with self._lock:
+            row = self.connection.execute(SELECT_ENTRY, (entry_id,)).fetchone()
+        return self._rows_to_entries([row], lazy)[0] if row else None
     
-    def save_entry(self, entry: PasswordEntry) -> bool:
+    def query_entries(self, search: Optional[str] = None, username: Optional[str] = None,
+                      website_prefix: Optional[str] = None, modified_since: Optional[datetime] = None,
+                      order_by: str = 'website', descending: bool = False, limit: Optional[int] = None,
+                      offset: int = 0, lazy: bool = True, website: Optional[str] = None) -> List[PasswordEntry]:
+        """Filter, order and page entries in SQLite rather than in Python.
+        
+        search is a case-insensitive substring of website, username, email
+        or notes; it cannot use an index, so combine it with a limit. The
+        website and username (exact), website_prefix (case-sensitive) and
+        modified_since filters and every order_by column are served by
+        indexes. Ties are broken by id.
+        """
+        sql, params = self.build_entry_query(search, username, website_prefix, modified_since,
+                                             order_by, descending, limit, offset, website)
+        with self._lock:
+            rows = self.connection.execute(sql, params).fetchall()
+        return self._rows_to_entries(rows, lazy)
+    
+    @staticmethod
+    def build_entry_query(search: Optional[str] = None, username: Optional[str] = None,
+                          website_prefix: Optional[str] = None, modified_since: Optional[datetime] = None,
+                          order_by: str = 'website', descending: bool = False, limit: Optional[int] = None,
+                          offset: int = 0, website: Optional[str] = None) -> Tuple[str, list]:
+        # The SQL and parameters behind query_entries(), also used to check query plans
+        if order_by not in ORDER_COLUMNS:
+            raise ValueError(f"Cannot order by {order_by!r}; expected one of {ORDER_COLUMNS}")
+        conditions, params = [], []
+        if search:
+            pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            conditions.append("(website LIKE ? ESCAPE '\\' OR username LIKE ? ESCAPE '\\' OR "
+                              "email LIKE ? ESCAPE '\\' OR notes LIKE ? ESCAPE '\\')")
+            params.extend([pattern] * 4)
+        if website is not None:
+            conditions.append('website = ?')
+            params.append(website)
+        if username is not None:
+            conditions.append('username = ?')
+            params.append(username)
+        if website_prefix:
+            # A range rather than LIKE 'x%', which can't use the default-collation index
+            conditions.append('website >= ? AND website < ?')
+            params.extend([website_prefix, website_prefix + '\U0010ffff'])
+        if modified_since is not None:
+            conditions.append('date_modified >= ?')
+            params.append(modified_since.isoformat())
+        
+        direction = 'DESC' if descending else 'ASC'
+        sql = SELECT_ENTRY_COLUMNS
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += f' ORDER BY {order_by} {direction}, id {direction}'
+        if limit is not None or offset:
+            sql += ' LIMIT ? OFFSET ?'
+            params.extend([-1 if limit is None else limit, offset])
+        return sql, params
+    
+    def reused_password_groups(self) -> List[List[PasswordEntry]]:
+        """Groups of entries sharing a password, largest first, found without decrypting."""
+        with self._lock:
+            rows = self.connection.execute(SELECT_REUSED_PASSWORDS).fetchall()
+        groups = [self._rows_to_entries(list(group)) for _, group in groupby(rows, key=lambda row: row[8])]
+        groups.sort(key=len, reverse=True)
+        return groups
+    
+    def duplicate_login_groups(self) -> List[List[PasswordEntry]]:
+        """Groups of entries with the same website and username."""
+        with self._lock:
+            rows = self.connection.execute(SELECT_DUPLICATE_LOGINS).fetchall()
+        return [self._rows_to_entries(list(group)) for _, group in groupby(rows, key=lambda row: (row[1], row[2]))]
+    
+    def count_missing_fingerprints(self) -> int:
+        # Entries the report can't see yet (written before fingerprints existed)
+        with self._lock:
+            return self.connection.execute(COUNT_MISSING_FINGERPRINTS).fetchone()[0]
+    
+    def count_undecryptable(self) -> int:
+        # Entries left out of the report because their password could not be decrypted
+        with self._lock:
+            return self.connection.execute(COUNT_UNDECRYPTABLE).fetchone()[0]
+    
+    def count_entries(self) -> int:
+        with self._lock:
+            return self.connection.execute(COUNT_ENTRIES).fetchone()[0]
+    
+    def change_marker(self) -> tuple:
+        with self._lock:
+            return tuple(self.connection.execute(CHANGE_MARKER).fetchone())
+    
+    def _row_to_entry(self, row, lazy: bool = True, password: Optional[str] = None) -> PasswordEntry:
+        fields = dict(
+            id=row[0],
+            website=row[1],
+            username=row[2] or "",
+            email=row[3] or "",
+            notes=row[5] or "",
+            # Kept as the stored strings; PasswordEntry parses them on first read
+            date_created=row[6],
+            date_modified=row[7]
+        )
+        if lazy:
+            # Defer the Fernet decrypt until the password is actually read
+            return LazyPasswordEntry(
+                encrypted_password=row[4] or "",
+                decryptor=self._decryptor,
+                mask_length=EncryptionService.plaintext_length_hint(row[4]),
+                **fields
+            )
+        if password is None:
+            password = self.encryption_service.decrypt(row[4])
+        return PasswordEntry(password=password, **fields)
+    
+    def save_entry(self, entry: PasswordEntry) -> Optional[int]:
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                encrypted_password = self.encryption_service.encrypt(entry.password)
-                
+            encrypted_password = self.encryption_service.encrypt(entry.password)
+            fingerprint = self.encryption_service.fingerprint(entry.password)
+            origin = self.replica_id()
+            
+            entry_id = entry.id
+            with self._lock, self.connection as conn:
                 if entry.id == 0:  # New entry
-                    cursor.execute('''
-                        INSERT INTO password_entries 
-                        (website, username, email, password, notes, date_created, date_modified)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (
+                    cursor = conn.execute(INSERT_ENTRY, (
                         entry.website,
                         entry.username,
                         entry.email,
                         encrypted_password,
                         entry.notes,
                         entry.date_created.isoformat(),
-                        entry.date_modified.isoformat()
+                        entry.date_modified.isoformat(),
+                        fingerprint,
+                        uuid.uuid4().hex
                     ))
+                    entry_id = cursor.lastrowid
                 else:  # Update existing
                     entry.date_modified = datetime.now()
-                    cursor.execute('''
-                        UPDATE password_entries 
-                        SET website=?, username=?, email=?, password=?, notes=?, date_modified=?
-                        WHERE id=?
-                    ''', (
+                    conn.execute(UPDATE_ENTRY, (
                         entry.website,
                         entry.username,
                         entry.email,
                         encrypted_password,
                         entry.notes,
                         entry.date_modified.isoformat(),
+                        fingerprint,
                         entry.id
                     ))
-                
-                conn.commit()
-                return True
+                conn.execute(LOG_ENTRY_CHANGE, (entry.date_modified.isoformat(), 0, origin, entry_id))
+            entry.id = entry_id
+            return entry_id
         except Exception as e:
             print(f"Error saving entry: {e}")
-            return False
+            return None
     
     def delete_entry(self, entry_id: int) -> bool:
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM password_entries WHERE id=?', (entry_id,))
-                conn.commit()
-                return True
+            origin = self.replica_id()
+            with self._lock, self.connection as conn:
+                # The log row outlives the entry as its tombstone
+                conn.execute(LOG_ENTRY_CHANGE, (datetime.now().isoformat(), 1, origin, entry_id))
+                conn.execute(DELETE_ENTRY, (entry_id,))
+            return True
         except Exception as e:
             print(f"Error deleting entry: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def reserve_entry_ids(self, count: int) -> range:
+        """Set aside `count` ids for entries that will be inserted later with write_entries().
+        
+        The AUTOINCREMENT counter is moved past them, so no other insert, in
+        this process or another, can take one in the meantime.
+        """
+        with self.transaction() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            last = conn.execute(SELECT_ID_SEQUENCE).fetchone()[0]
+            if conn.execute(UPDATE_ID_SEQUENCE, (last + count,)).rowcount == 0:
+                conn.execute(INSERT_ID_SEQUENCE, (last + count,))
+        return range(last + 1, last + count + 1)
+    
+    def write_entries(self, saved: Iterable[PasswordEntry], deleted_ids: Iterable[int] = ()):
+        """Write a batch of edits in one transaction.
+        
+        Saved entries keep the id and date_modified they carry: a row with
+        that id is updated, otherwise one is inserted under it. Passwords
+        are encrypted before the connection is taken. Raises on failure,
+        in which case nothing is written.
+        """
+        if not self.is_unlocked:
+            raise RuntimeError("Vault is locked")
+        saved = list(saved)
+        deleted_ids = list(deleted_ids)
+        failures = []
+        ciphertexts = self.encryption_service.encrypt_many(
+            [entry.password for entry in saved], on_error=lambda index, e: failures.append(e))
+        if failures:
+            raise failures[0]
+        fingerprint = self.encryption_service.fingerprint
+        origin = self.replica_id()
+        with self.transaction() as conn:
+            for entry, ciphertext in zip(saved, ciphertexts):
+                modified = entry.date_modified.isoformat()
+                password_fingerprint = fingerprint(entry.password)
+                if not conn.execute(UPDATE_ENTRY, (entry.website, entry.username, entry.email, ciphertext,
+                                                   entry.notes, modified, password_fingerprint, entry.id)).rowcount:
+                    conn.execute(INSERT_ENTRY_WITH_ID, (entry.id, entry.website, entry.username, entry.email,
+                                                        ciphertext, entry.notes, entry.date_created.isoformat(),
+                                                        modified, password_fingerprint, uuid.uuid4().hex))
+                conn.execute(LOG_ENTRY_CHANGE, (modified, 0, origin, entry.id))
+            now = datetime.now().isoformat()
+            conn.executemany(LOG_ENTRY_CHANGE, [(now, 1, origin, entry_id) for entry_id in deleted_ids])
+            conn.executemany(DELETE_ENTRY, [(entry_id,) for entry_id in deleted_ids])
+    
+    def import_entries(self, entries: Iterable[PasswordEntry], batch_size: int = IMPORT_BATCH_SIZE,
+                       progress: Optional[Callable[[int, float], None]] = None) -> int:
+        """Insert entries in batches and return how many were imported.
+        
+        Each batch is encrypted with encrypt_many and written with one
+        executemany in its own transaction, so only a batch is held in
+        memory. progress(imported, elapsed_seconds) is called after every
+        batch. On failure the batches already committed are kept and the
+        error propagates.
+        """
+        if not self.is_unlocked:
+            raise RuntimeError("Vault is locked")
+        started = time.perf_counter()
+        imported = 0
+        origin = self.replica_id()
+        entries = iter(entries)
+        while True:
+            batch = list(islice(entries, batch_size))
+            if not batch:
+                break
+            failures = []
+            ciphertexts = self.encryption_service.encrypt_many(
+                [entry.password for entry in batch], on_error=lambda index, e: failures.append(e))
+            if failures:
+                raise failures[0]
+            fingerprint = self.encryption_service.fingerprint
+            rows = [(entry.website, entry.username, entry.email, ciphertext, entry.notes,
+                     entry.date_created.isoformat(), entry.date_modified.isoformat(), fingerprint(entry.password),
+                     uuid.uuid4().hex)
+                    for entry, ciphertext in zip(batch, ciphertexts)]
+            with self.transaction() as conn:
+                conn.executemany(INSERT_ENTRY, rows)
+                conn.executemany(LOG_CHANGE, [(row[8], row[6], 0, origin) for row in rows])
+            imported += len(batch)
+            if progress is not None:
+                progress(imported, time.perf_counter() - started)
+        return imported
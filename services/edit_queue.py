@@ -0,0 +1,199 @@
+import copy
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from models.password_entry import PasswordEntry
+from services.database_service import DatabaseService
+
+# Quiet time (seconds) after the last edit before the pending ones are written
+FLUSH_DELAY = 0.5
+
+# New entry ids reserved from the database at a time
+ID_BLOCK_SIZE = 32
+
+# Edits remembered for undo
+UNDO_LIMIT = 100
+
+class Edit:
+    """One change to the vault: an entry before and after it, None where there is none.
+    
+    before None is an addition, after None a deletion. label describes the
+    change for the status bar, e.g. "delete of example.com".
+    """
+    
+    __slots__ = ('before', 'after', 'label')
+    
+    def __init__(self, before: Optional[PasswordEntry], after: Optional[PasswordEntry], label: str):
+        self.before = before
+        self.after = after
+        self.label = label
+    
+    @property
+    def entry_id(self) -> int:
+        return (self.after or self.before).id
+
+class EditQueue:
+    """Write-behind buffer with undo and redo between the main window and DatabaseService.
+    
+    add(), update() and delete() record a change and return at once; the
+    caller applies it to its in-memory list. Pending changes are kept per
+    entry, so several edits of one entry cost one write, and an addition
+    undone before it was written costs none. They are written in a single
+    transaction on a timer thread once no edit has come in for `delay`
+    seconds. flush() writes them straight away and must be called before
+    the vault is read back, locked or closed.
+    
+    New entries take their ids from a block reserved in the database, so an
+    entry has the same id before and after it is written, and undoing a
+    deletion restores the entry under its old id.
+    """
+    
+    def __init__(self, db_service: DatabaseService, delay: float = FLUSH_DELAY, undo_limit: int = UNDO_LIMIT):
+        self.db_service = db_service
+        self.delay = delay
+        self.undo_limit = undo_limit
+        self.error: Optional[Exception] = None
+        self._lock = threading.Lock()
+        # Held while a batch is written, so batches reach the database in order
+        self._flush_lock = threading.Lock()
+        # entry id -> [row exists in the database, entry to write or None to delete it]
+        self._pending: Dict[int, list] = {}
+        # Ids with no row, as of the writes handed to the database: reserved or deleted
+        self._absent = set()
+        self._free_ids: List[int] = []
+        self._undo: List[Edit] = []
+        self._redo: List[Edit] = []
+        self._timer: Optional[threading.Timer] = None
+    
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+    
+    def add(self, entry: PasswordEntry) -> Edit:
+        # Gives the entry its id; the only database call made on the caller's thread
+        if not self._free_ids:
+            ids = self.db_service.reserve_entry_ids(ID_BLOCK_SIZE)
+            with self._lock:
+                self._absent.update(ids)
+            self._free_ids = list(reversed(ids))
+        entry.id = self._free_ids.pop()
+        return self._record(Edit(None, entry, f"add of {entry.website}"))
+    
+    def update(self, old_entry: PasswordEntry, new_entry: PasswordEntry) -> Edit:
+        new_entry.date_modified = datetime.now()
+        return self._record(Edit(old_entry, new_entry, f"edit of {new_entry.website}"))
+    
+    def delete(self, entry: PasswordEntry) -> Edit:
+        return self._record(Edit(entry, None, f"delete of {entry.website}"))
+    
+    def undo(self) -> Optional[Edit]:
+        """Revert the latest edit; returns the change to make in memory, or None if there is none."""
+        return self._step(self._undo, self._redo)
+    
+    def redo(self) -> Optional[Edit]:
+        return self._step(self._redo, self._undo)
+    
+    def clear_history(self):
+        with self._lock:
+            self._undo.clear()
+            self._redo.clear()
+    
+    def _record(self, edit: Edit) -> Edit:
+        with self._lock:
+            self._undo.append(edit)
+            del self._undo[:-self.undo_limit]
+            self._redo.clear()
+            self._queue(edit)
+        self._schedule()
+        return edit
+    
+    def _step(self, source: List[Edit], target: List[Edit]) -> Optional[Edit]:
+        # Undoing an edit is itself an edit, the inverse one, and redoing undoes that
+        with self._lock:
+            if not source:
+                return None
+            edit = source.pop()
+            inverse = Edit(edit.after, self._restamp(edit.before), edit.label)
+            target.append(inverse)
+            self._queue(inverse)
+        self._schedule()
+        return inverse
+    
+    @staticmethod
+    def _restamp(entry: Optional[PasswordEntry]) -> Optional[PasswordEntry]:
+        # A restored version is a new change to sync peers, so it gets a fresh date_modified
+        if entry is None:
+            return None
+        entry = copy.copy(entry)
+        entry.date_modified = datetime.now()
+        return entry
+    
+    def _queue(self, edit: Edit):
+        # Called with self._lock held; a later edit of an entry replaces the earlier one
+        pending = self._pending.get(edit.entry_id)
+        if pending is None:
+            self._pending[edit.entry_id] = [edit.entry_id not in self._absent, edit.after]
+        else:
+            pending[1] = edit.after
+    
+    def _schedule(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def flush(self) -> bool:
+        """Write the pending edits now; returns False, with the exception in self.error, on failure.
+        
+        A batch that fails to write is put back in front of any edits made
+        since, and is retried by the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._pending:
+                    return self.error is None
+                batch, self._pending = self._pending, {}
+                for entry_id, (_, entry) in batch.items():
+                    if entry is None:
+                        self._absent.add(entry_id)
+                    else:
+                        self._absent.discard(entry_id)
+            
+            saved = [entry for _, entry in batch.values() if entry is not None]
+            deleted_ids = [entry_id for entry_id, (exists, entry) in batch.items() if entry is None and exists]
+            try:
+                if saved or deleted_ids:
+                    self.db_service.write_entries(saved, deleted_ids)
+            except Exception as e:
+                print(f"Error saving changes: {e}")
+                with self._lock:
+                    self._requeue(batch)
+                self.error = e
+                return False
+            self.error = None
+            return True
+    
+    def _requeue(self, batch: Dict[int, list]):
+        # Edits made while the batch was being written stay on top; what is in
+        # the database is still what the batch found there
+        for entry_id, (exists, entry) in batch.items():
+            if exists:
+                self._absent.discard(entry_id)
+            else:
+                self._absent.add(entry_id)
+            pending = self._pending.get(entry_id)
+            if pending is None:
+                self._pending[entry_id] = [exists, entry]
+            else:
+                pending[0] = exists
+    
+    def close(self) -> bool:
+        # Writes what is left and forgets the history; the queue can still be used afterwards
+        flushed = self.flush()
+        self.clear_history()
+        return flushed
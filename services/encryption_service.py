@@ -1,38 +1,198 @@
 import base64
+import hashlib
+import hmac
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Union
 from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+# version (1) + timestamp (8) + IV (16) + HMAC (32) bytes around the padded ciphertext
+FERNET_OVERHEAD = 57
+
+# Stored ciphertext formats:
+#   legacy (str): base64 of the base64 Fernet token
+#   v2 (bytes):   CIPHERTEXT_V2 tag byte followed by the raw, decoded Fernet token
+CIPHERTEXT_V2 = 2
+
+Ciphertext = Union[str, bytes]
+
+# Salt of vaults that predate per-vault salts; newer vaults store a random
+# SALT_SIZE-byte salt in vault_meta
+LEGACY_SALT = b'salt_1234567890'
+SALT_SIZE = 16
+
+# Work factor of vaults created before it was stored, and the floor for calibration
+DEFAULT_ITERATIONS = 100000
+
+# Unlock latency new vaults are calibrated to; override with PASSWORD_MANAGER_UNLOCK_MS
+DEFAULT_UNLOCK_SECONDS = 0.5
+
+CALIBRATION_PROBE_ITERATIONS = 20000
+
+# Batches smaller than this are processed serially; the pool hand-off isn't worth it
+PARALLEL_THRESHOLD = 512
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    # Shared by all EncryptionService instances; the crypto backend releases the GIL
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="crypto")
+        return _executor
+
+class InvalidMasterPassword(ValueError):
+    """The derived key does not match the vault's key verifier."""
 
 class EncryptionService:
-    def __init__(self, master_password: str):
+    def __init__(self, master_password: str, iterations: int = DEFAULT_ITERATIONS, key: bytes = None,
+                 salt: bytes = None):
         self.master_password = master_password.encode()
-        self.salt = b'salt_1234567890'  # In production, use random salt per user
-        self.key = self._derive_key()
+        self.salt = salt or LEGACY_SALT
+        self.iterations = iterations
+        # An already derived key (e.g. from the session cache) skips the KDF
+        self.key = key or self._derive_key()
         self.fernet = Fernet(self.key)
+        # Separate from the encryption key so a fingerprint reveals nothing about it
+        self._fingerprint_key = hmac.new(base64.urlsafe_b64decode(self.key), b'password-fingerprint',
+                                         hashlib.sha256).digest()
     
     def _derive_key(self) -> bytes:
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=self.salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(self.master_password))
-        return key
-    
-    def encrypt(self, plaintext: str) -> str:
+        # PBKDF2-HMAC-SHA256. hashlib releases the GIL for the whole derivation,
+        # so vaults unlocking at the same time derive their keys in parallel
+        key = hashlib.pbkdf2_hmac('sha256', self.master_password, self.salt, self.iterations, dklen=32)
+        return base64.urlsafe_b64encode(key)
+    
+    @staticmethod
+    def measure_iteration_rate() -> float:
+        # PBKDF2 iterations per second on this host
+        start = time.perf_counter()
+        hashlib.pbkdf2_hmac('sha256', b'calibration', os.urandom(16), CALIBRATION_PROBE_ITERATIONS, dklen=32)
+        return CALIBRATION_PROBE_ITERATIONS / max(time.perf_counter() - start, 1e-6)
+    
+    @staticmethod
+    def target_unlock_seconds() -> float:
+        value = os.environ.get('PASSWORD_MANAGER_UNLOCK_MS')
+        try:
+            return float(value) / 1000 if value else DEFAULT_UNLOCK_SECONDS
+        except ValueError:
+            return DEFAULT_UNLOCK_SECONDS
+    
+    @classmethod
+    def calibrate_iterations(cls, target_seconds: float = None, rate: float = None) -> int:
+        # Iterations that take about target_seconds here, never below DEFAULT_ITERATIONS
+        if target_seconds is None:
+            target_seconds = cls.target_unlock_seconds()
+        if rate is None:
+            rate = cls.measure_iteration_rate()
+        iterations = int(rate * target_seconds) // 1000 * 1000
+        return max(iterations, DEFAULT_ITERATIONS)
+    
+    def encrypt(self, plaintext: str) -> Ciphertext:
         if not plaintext:
             return ""
-        encrypted = self.fernet.encrypt(plaintext.encode())
-        return base64.urlsafe_b64encode(encrypted).decode()
+        token = self.fernet.encrypt(plaintext.encode())
+        return bytes((CIPHERTEXT_V2,)) + base64.urlsafe_b64decode(token)
     
-    def decrypt(self, ciphertext: str) -> str:
-        if not ciphertext:
-            return ""
+    @staticmethod
+    def generate_salt() -> bytes:
+        return os.urandom(SALT_SIZE)
+    
+    def key_verifier(self) -> str:
+        # Stored in vault_meta so a wrong master password is rejected as soon as
+        # the KDF finishes, instead of every row quietly decrypting to ""
+        return hmac.new(base64.urlsafe_b64decode(self.key), b'key-verifier', hashlib.sha256).hexdigest()
+    
+    def fingerprint(self, plaintext: str) -> Optional[bytes]:
+        # Keyed hash stored next to the ciphertext: equal passwords share a
+        # fingerprint, so reuse is found without decrypting, but it cannot be
+        # looked up in a precomputed table without the vault key
+        if not plaintext:
+            return None
+        return hmac.new(self._fingerprint_key, plaintext.encode(), hashlib.sha256).digest()
+    
+    def decrypt(self, ciphertext: Ciphertext) -> str:
         try:
-            decoded = base64.urlsafe_b64decode(ciphertext.encode())
-            decrypted = self.fernet.decrypt(decoded)
-            return decrypted.decode()
+            return self._decrypt_or_raise(ciphertext)
         except Exception:
-            return ""
\ No newline at end of file
+            return ""
+    
+    def _decrypt_or_raise(self, ciphertext: Ciphertext) -> str:
+        if not ciphertext:
+            return ""
+        decrypted = self.fernet.decrypt(self.fernet_token(ciphertext))
+        return decrypted.decode()
+    
+    @staticmethod
+    def fernet_token(ciphertext: Ciphertext) -> bytes:
+        if isinstance(ciphertext, (bytes, bytearray, memoryview)):
+            ciphertext = bytes(ciphertext)
+            if ciphertext[0] != CIPHERTEXT_V2:
+                raise ValueError(f"Unknown ciphertext format {ciphertext[0]}")
+            return base64.urlsafe_b64encode(ciphertext[1:])
+        # Legacy values carry an extra base64 layer around the token
+        return base64.urlsafe_b64decode(ciphertext.encode())
+    
+    @classmethod
+    def upgrade_ciphertext(cls, ciphertext: Ciphertext) -> Ciphertext:
+        # Re-encode a legacy value as v2 without decrypting it
+        if not ciphertext or not isinstance(ciphertext, str):
+            return ciphertext
+        return bytes((CIPHERTEXT_V2,)) + base64.urlsafe_b64decode(cls.fernet_token(ciphertext))
+    
+    def encrypt_many(self, plaintexts: Sequence[str],
+                     on_error: Optional[Callable[[int, Exception], None]] = None) -> List[Ciphertext]:
+        return self._map(self.encrypt, plaintexts, on_error)
+    
+    def decrypt_many(self, ciphertexts: Sequence[Ciphertext],
+                     on_error: Optional[Callable[[int, Exception], None]] = None) -> List[str]:
+        # Results keep input order; an item that fails becomes "" (like decrypt)
+        # and is reported as on_error(index, exception)
+        return self._map(self._decrypt_or_raise, ciphertexts, on_error)
+    
+    def _map(self, fn: Callable[[str], str], values: Sequence[str],
+             on_error: Optional[Callable[[int, Exception], None]]) -> List[str]:
+        values = list(values)
+        workers = os.cpu_count() or 1
+        if workers <= 1 or len(values) < PARALLEL_THRESHOLD:
+            return self._map_chunk(fn, values, 0, on_error)
+        
+        # One contiguous chunk per worker keeps the per-task overhead negligible
+        size = -(-len(values) // workers)
+        futures = [_get_executor().submit(self._map_chunk, fn, values[start:start + size], start, on_error)
+                   for start in range(0, len(values), size)]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+    
+    @staticmethod
+    def _map_chunk(fn: Callable[[str], str], values: Sequence[str], offset: int,
+                   on_error: Optional[Callable[[int, Exception], None]]) -> List[str]:
+        results = []
+        for index, value in enumerate(values, offset):
+            try:
+                results.append(fn(value))
+            except Exception as e:
+                results.append("")
+                if on_error is not None:
+                    on_error(index, e)
+        return results
+    
+    @staticmethod
+    def plaintext_length_hint(ciphertext: Ciphertext) -> int:
+        # Estimate the plaintext length from the stored token size without decrypting.
+        # Fernet pads to 16-byte blocks, so this is only accurate to the block.
+        if not ciphertext:
+            return 0
+        if isinstance(ciphertext, bytes):
+            raw_length = len(ciphertext) - 1
+        else:
+            token_length = (len(ciphertext) * 3) // 4 - ciphertext[-2:].count('=')
+            raw_length = (token_length * 3) // 4
+        blocks = max((raw_length - FERNET_OVERHEAD) // 16, 1)
+        return blocks * 16 - 8
@@ -0,0 +1,149 @@
+import csv
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, Iterator, Optional, TextIO
+from models.password_entry import PasswordEntry
+
+# Column names used by common password manager exports, per PasswordEntry field
+FIELD_ALIASES = {
+    'website': ('website', 'url', 'login_uri', 'uri', 'name', 'title', 'site', 'service'),
+    'username': ('username', 'login_username', 'user', 'login', 'user name'),
+    'email': ('email', 'e-mail', 'mail'),
+    'password': ('password', 'login_password', 'pass'),
+    'notes': ('notes', 'note', 'extra', 'comments'),
+}
+
+CHUNK_SIZE = 64 * 1024
+
+def record_to_entry(record: Dict) -> Optional[PasswordEntry]:
+    # Map one exported record onto a PasswordEntry; None when it has no password
+    login = record.get('login') if isinstance(record.get('login'), dict) else {}
+    if login:
+        # Bitwarden JSON nests the credentials under "login"
+        uris = login.get('uris') or []
+        record = dict(record, login_username=login.get('username'), login_password=login.get('password'),
+                      login_uri=uris[0].get('uri') if uris else None)
+    lowered = {str(key).strip().lower(): value for key, value in record.items() if value not in (None, '')}
+    
+    values = {}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            if alias in lowered and not isinstance(lowered[alias], (dict, list)):
+                values[field] = str(lowered[alias]).strip()
+                break
+    if not values.get('password'):
+        return None
+    if not values.get('website'):
+        values['website'] = values.get('username') or values.get('email') or 'Imported entry'
+    if not values.get('email') and '@' in values.get('username', ''):
+        values['email'] = values['username']
+    
+    now = datetime.now()
+    return PasswordEntry(date_created=now, date_modified=now, **values)
+
+def iter_csv(stream: TextIO) -> Iterator[PasswordEntry]:
+    for record in csv.DictReader(stream):
+        entry = record_to_entry(record)
+        if entry is not None:
+            yield entry
+
+def iter_json(stream: TextIO, lines: bool = False) -> Iterator[PasswordEntry]:
+    for record in iter_json_records(stream, lines):
+        if isinstance(record, dict):
+            entry = record_to_entry(record)
+            if entry is not None:
+                yield entry
+
+def iter_json_records(stream: TextIO, lines: bool = False) -> Iterator:
+    """Stream records from JSON Lines (lines=True), a top-level array, or an
+    object whose "items"/"entries" key holds the array (Bitwarden style),
+    keeping only one chunk of the file in memory."""
+    reader = _JsonChunkReader(stream)
+    if lines:
+        yield from reader.values()
+        return
+    
+    first = reader.peek()
+    if first == '[':
+        reader.pos += 1
+    elif first == '{':
+        if not reader.seek_pattern(re.compile(r'"(?:items|entries)"\s*:\s*\[')):
+            # No record array inside: the whole document is one record
+            yield from reader.values()
+            return
+    else:
+        yield from reader.values()
+        return
+    yield from reader.array_values()
+
+class _JsonChunkReader:
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+    
+    def _fill(self) -> bool:
+        chunk = self.stream.read(CHUNK_SIZE)
+        if not chunk:
+            return False
+        # Drop what has been consumed so the buffer stays around one chunk
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def peek(self, skip: str = ' \t\r\n') -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in skip:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+    
+    def seek_pattern(self, pattern) -> bool:
+        while True:
+            match = pattern.search(self.buffer, self.pos)
+            if match is not None:
+                self.pos = match.end()
+                return True
+            # Keep a tail in case the pattern straddles two chunks
+            self.pos = max(self.pos, len(self.buffer) - 64)
+            if not self._fill():
+                return False
+    
+    def _decode(self):
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            self.pos = end
+            return value
+    
+    def values(self) -> Iterator:
+        while self.peek():
+            yield self._decode()
+    
+    def array_values(self) -> Iterator:
+        while True:
+            char = self.peek(skip=' \t\r\n,')
+            if char in ('', ']'):
+                return
+            yield self._decode()
+
+def iter_file(path: str, file_format: Optional[str] = None) -> Iterator[PasswordEntry]:
+    # file_format is "csv" or "json"; guessed from the extension when omitted.
+    # .jsonl/.ndjson files are read as JSON Lines.
+    extension = os.path.splitext(path)[1].lower()
+    if file_format is None:
+        file_format = 'json' if extension in ('.json', '.jsonl', '.ndjson') else 'csv'
+    with open(path, newline='', encoding='utf-8-sig') as stream:
+        if file_format == 'json':
+            yield from iter_json(stream, lines=extension in ('.jsonl', '.ndjson'))
+        else:
+            yield from iter_csv(stream)
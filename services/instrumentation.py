@@ -0,0 +1,191 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# Hot paths timed when instrumentation is on: (module, class, method, metric).
+# Nothing is wrapped until enable() runs, so a normal run pays no overhead, and
+# modules not imported yet are wrapped when they are, so profiling does not
+# change what startup loads.
+TARGETS = (
+    ('services.unlock_service', 'UnlockTask', '_run', 'unlock'),
+    ('services.encryption_service', 'EncryptionService', '_derive_key', 'kdf'),
+    ('services.encryption_service', 'EncryptionService', 'encrypt', 'encrypt'),
+    ('services.encryption_service', 'EncryptionService', '_decrypt_or_raise', 'decrypt'),
+    ('services.database_service', 'DatabaseService', 'get_entries_page', 'db.get_entries_page'),
+    ('services.database_service', 'DatabaseService', 'get_all_entries', 'db.get_all_entries'),
+    ('services.database_service', 'DatabaseService', 'query_entries', 'db.query_entries'),
+    ('services.database_service', 'DatabaseService', 'count_entries', 'db.count_entries'),
+    ('services.database_service', 'DatabaseService', 'change_marker', 'db.change_marker'),
+    ('services.database_service', 'DatabaseService', 'save_entry', 'db.save_entry'),
+    ('services.database_service', 'DatabaseService', 'delete_entry', 'db.delete_entry'),
+    ('services.database_service', 'DatabaseService', 'import_entries', 'db.import_entries'),
+    ('services.database_service', 'DatabaseService', 'get_meta', 'db.get_meta'),
+    ('services.database_service', 'DatabaseService', 'set_meta', 'db.set_meta'),
+    ('gui.main_window', 'MainWindow', '_search_rows', 'search.query'),
+    ('gui.main_window', 'MainWindow', '_apply_search_result', 'search.apply'),
+    ('gui.virtual_tree', 'VirtualTreeview', 'set_rows', 'tree.refresh'),
+    ('gui.virtual_tree', 'VirtualTreeview', '_render', 'tree.render'),
+)
+
+# Metrics shown in the status-bar readout, with their labels
+READOUT = (('kdf', 'kdf'), ('db.', 'db'), ('decrypt', 'decrypt'), ('search.query', 'search'),
+           ('tree.refresh', 'tree'))
+
+RECENT_SAMPLES = 1000
+MAX_TRACE_EVENTS = 200000
+
+class _Metric:
+    __slots__ = ('count', 'total', 'max', 'recent')
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+_lock = threading.Lock()
+_metrics: Dict[str, _Metric] = {}
+_events = []
+_enabled = False
+_dump_path: Optional[str] = None
+_origin = time.perf_counter()
+# Targets of modules that were not imported yet when enable() ran, by module name
+_pending: Dict[str, List[Tuple[str, str, str]]] = {}
+
+class _InstrumentingLoader:
+    # Runs the real loader, then wraps the module's targets
+    
+    def __init__(self, loader):
+        self.loader = loader
+    
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+    
+    def exec_module(self, module):
+        self.loader.exec_module(module)
+        with _lock:
+            targets = _pending.pop(module.__name__, ())
+        for class_name, method_name, metric in targets:
+            cls = getattr(module, class_name)
+            setattr(cls, method_name, _timed(getattr(cls, method_name), metric))
+    
+    def __getattr__(self, name):
+        # get_source() and friends, for tracebacks
+        return getattr(self.loader, name)
+
+class _InstrumentingFinder:
+    # On sys.meta_path while targets are pending; finds nothing itself
+    
+    def find_spec(self, fullname, path, target=None):
+        if fullname not in _pending:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _InstrumentingLoader(spec.loader)
+                return spec
+        return None
+
+def enabled() -> bool:
+    return _enabled
+
+def enable_from_env():
+    # PASSWORD_MANAGER_PROFILE=1 dumps to a temp file, any other value is the dump path
+    value = os.environ.get('PASSWORD_MANAGER_PROFILE', '')
+    if value and value.lower() not in ('0', 'false', 'no'):
+        enable(None if value.lower() in ('1', 'true', 'yes') else value)
+
+def enable(dump_path: Optional[str] = None):
+    """Start timing the TARGETS hot paths and dump the results at exit."""
+    global _enabled, _dump_path
+    with _lock:
+        if _enabled:
+            return
+        _enabled = True
+        _dump_path = dump_path or os.path.join(tempfile.gettempdir(),
+                                               f"password-manager-profile-{os.getpid()}.json")
+    for module_name, class_name, method_name, metric in TARGETS:
+        module = sys.modules.get(module_name)
+        if module is None:
+            _pending.setdefault(module_name, []).append((class_name, method_name, metric))
+            continue
+        cls = getattr(module, class_name)
+        setattr(cls, method_name, _timed(getattr(cls, method_name), metric))
+    if _pending:
+        sys.meta_path.insert(0, _InstrumentingFinder())
+    atexit.register(_dump_at_exit)
+
+def _timed(fn, metric: str):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record(metric, time.perf_counter() - start, start)
+    return wrapper
+
+def record(metric: str, seconds: float, start: Optional[float] = None):
+    with _lock:
+        entry = _metrics.get(metric)
+        if entry is None:
+            entry = _metrics[metric] = _Metric()
+        entry.count += 1
+        entry.total += seconds
+        entry.max = max(entry.max, seconds)
+        entry.recent.append(seconds)
+        if start is not None and len(_events) < MAX_TRACE_EVENTS:
+            # Chrome trace-event format, loadable in chrome://tracing or Perfetto
+            _events.append({'name': metric, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+                            'ts': (start - _origin) * 1e6, 'dur': seconds * 1e6})
+
+def snapshot() -> Dict[str, Dict[str, float]]:
+    with _lock:
+        stats = {}
+        for metric, entry in sorted(_metrics.items()):
+            recent = sorted(entry.recent)
+            stats[metric] = {
+                'count': entry.count,
+                'total_ms': entry.total * 1e3,
+                'mean_ms': entry.total / entry.count * 1e3,
+                'p95_ms': recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1e3,
+                'max_ms': entry.max * 1e3,
+            }
+        return stats
+
+def summary_line() -> str:
+    # Compact readout for the status bar
+    stats = snapshot()
+    parts = []
+    for prefix, label in READOUT:
+        matching = [value for metric, value in stats.items() if metric.startswith(prefix)]
+        if not matching:
+            continue
+        count = sum(value['count'] for value in matching)
+        mean = sum(value['total_ms'] for value in matching) / count
+        parts.append(f"{label} {count}x{mean:.2f}ms")
+    return " | ".join(parts)
+
+def dump(path: Optional[str] = None) -> str:
+    path = path or _dump_path
+    with _lock:
+        events = list(_events)
+    with open(path, 'w') as f:
+        json.dump({'summary': snapshot(), 'traceEvents': events}, f)
+    return path
+
+def _dump_at_exit():
+    try:
+        print(f"Instrumentation written to {dump()}")
+    except OSError as e:
+        print(f"Error writing instrumentation: {e}")
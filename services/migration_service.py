@@ -0,0 +1,147 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+from services.database_service import DatabaseService, UNDECRYPTABLE_FINGERPRINT, UPSERT_META
+from services.encryption_service import EncryptionService, CIPHERTEXT_V2
+
+SELECT_LEGACY_BATCH = '''
+    SELECT id, password FROM password_entries
+    WHERE id > ? AND typeof(password) = 'text' AND password != ''
+    ORDER BY id
+    LIMIT ?
+'''
+
+# Only rewrite rows nobody changed since we read them
+UPGRADE_ROW = 'UPDATE password_entries SET password=? WHERE id=? AND password=?'
+
+SELECT_UNFINGERPRINTED_BATCH = '''
+    SELECT id, password FROM password_entries
+    WHERE id > ? AND password_fingerprint IS NULL AND password != ''
+    ORDER BY id
+    LIMIT ?
+'''
+
+SET_FINGERPRINT = 'UPDATE password_entries SET password_fingerprint=? WHERE id=? AND password=?'
+
+class BackgroundMigration(ABC):
+    """Runs a resumable, batched rewrite of the vault on a daemon thread.
+    
+    Subclasses implement run() (checking self._stop between batches) and
+    is_complete(); start() does nothing once the work is done.
+    """
+    
+    NAME = "Migration"
+    
+    def __init__(self, db_service: DatabaseService, batch_size: int = 500):
+        self.db_service = db_service
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @abstractmethod
+    def is_complete(self) -> bool:
+        ...
+    
+    @abstractmethod
+    def run(self, progress: Optional[Callable[[int], None]] = None) -> int:
+        ...
+    
+    def start(self):
+        if self._thread is None and not self.is_complete():
+            self._thread = threading.Thread(target=self._run_safely, name=self.NAME.lower().replace(' ', '-'),
+                                            daemon=True)
+            self._thread.start()
+    
+    def stop(self, wait: bool = True):
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+        self._thread = None
+    
+    def _run_safely(self):
+        try:
+            self.run()
+        except Exception as e:
+            print(f"{self.NAME} stopped: {e}")
+
+class CiphertextMigration(BackgroundMigration):
+    """Rewrites legacy double-base64 passwords into the v2 BLOB format.
+    
+    Works in small transactions and records the last migrated id in
+    vault_meta, so an interrupted run picks up where it left off. No key is
+    needed: the Fernet token is only re-encoded, never decrypted.
+    """
+    
+    NAME = "Ciphertext migration"
+    PROGRESS_KEY = 'ciphertext_migration_last_id'
+    FORMAT_KEY = 'ciphertext_format'
+    
+    def is_complete(self) -> bool:
+        return self.db_service.get_meta(self.FORMAT_KEY) == str(CIPHERTEXT_V2)
+    
+    def run(self, progress: Optional[Callable[[int], None]] = None) -> int:
+        # Returns the number of rows upgraded by this run
+        migrated = 0
+        last_id = int(self.db_service.get_meta(self.PROGRESS_KEY) or 0)
+        while not self._stop.is_set():
+            with self.db_service.transaction() as conn:
+                rows = conn.execute(SELECT_LEGACY_BATCH, (last_id, self.batch_size)).fetchall()
+                if not rows:
+                    conn.execute(UPSERT_META, (self.FORMAT_KEY, str(CIPHERTEXT_V2)))
+                    break
+                
+                updates = []
+                for entry_id, ciphertext in rows:
+                    try:
+                        updates.append((EncryptionService.upgrade_ciphertext(ciphertext), entry_id, ciphertext))
+                    except ValueError as e:
+                        # Not valid legacy data; leave it for decrypt() to reject as before
+                        print(f"Skipping entry {entry_id} during ciphertext migration: {e}")
+                last_id = rows[-1][0]
+                conn.executemany(UPGRADE_ROW, updates)
+                conn.execute(UPSERT_META, (self.PROGRESS_KEY, str(last_id)))
+            migrated += len(updates)
+            if progress is not None:
+                progress(migrated)
+        return migrated
+
+class FingerprintBackfill(BackgroundMigration):
+    """Computes password fingerprints for entries written before they existed.
+    
+    Needs the unlocked vault. A NULL fingerprint marks the work left, so no
+    progress is recorded and a later run simply continues. Rows that fail to
+    decrypt get UNDECRYPTABLE_FINGERPRINT, so the backfill can finish; the
+    next save of such an entry writes its real fingerprint.
+    """
+    
+    NAME = "Fingerprint backfill"
+    
+    def is_complete(self) -> bool:
+        return self.db_service.count_missing_fingerprints() == 0
+    
+    def run(self, progress: Optional[Callable[[int], None]] = None) -> int:
+        filled = 0
+        last_id = 0
+        while not self._stop.is_set():
+            encryption_service = self.db_service.encryption_service
+            if encryption_service is None:
+                break
+            with self.db_service.transaction() as conn:
+                rows = conn.execute(SELECT_UNFINGERPRINTED_BATCH, (last_id, self.batch_size)).fetchall()
+            if not rows:
+                break
+            
+            # Decrypted outside the lock so the UI keeps the connection meanwhile
+            failed = set()
+            passwords = encryption_service.decrypt_many([ciphertext for _, ciphertext in rows],
+                                                        on_error=lambda index, e: failed.add(index))
+            updates = [(UNDECRYPTABLE_FINGERPRINT if index in failed else encryption_service.fingerprint(password),
+                        entry_id, ciphertext)
+                       for index, ((entry_id, ciphertext), password) in enumerate(zip(rows, passwords))]
+            with self.db_service.transaction() as conn:
+                conn.executemany(SET_FINGERPRINT, updates)
+            last_id = rows[-1][0]
+            filled += len(updates) - len(failed)
+            if progress is not None:
+                progress(filled)
+        return filled
@@ -0,0 +1,217 @@
+import math
+import os
+import secrets
+import string
+from array import array
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence
+
+DEFAULT_SYMBOLS = "!@#$%^&*"
+
+# Characters that are easily misread or mistyped: l/I/1/|, O/0/o, quotes and dots
+AMBIGUOUS_CHARACTERS = "lI1|O0o`'\";:.,"
+
+CHARACTER_CLASSES = ('lowercase', 'uppercase', 'digits', 'symbols')
+
+# Common English words of 3 to 8 letters, one per line
+DEFAULT_WORDLIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wordlist.txt")
+
+# Extra candidates drawn per round, so that rejected ones rarely need a second round
+OVERDRAW = 1.1
+
+_wordlists: Dict[str, List[str]] = {}
+
+def random_indices(n: int, count: int) -> List[int]:
+    """Return `count` independent, uniformly distributed integers in range(n).
+    
+    Random bytes are drawn in bulk and read as integers of the fewest bytes
+    that cover n. Values at or above the largest multiple of n are rejected
+    rather than wrapped around, so every index is equally likely.
+    """
+    if n < 1:
+        raise ValueError("Cannot choose from an empty range")
+    width = max(1, -(-(n - 1).bit_length() // 8))
+    space = 1 << (8 * width)
+    limit = space - space % n
+    indices = []
+    while len(indices) < count:
+        draws = (count - len(indices)) * space // limit + 16
+        data = secrets.token_bytes(draws * width)
+        if width == 1:
+            values = data
+        elif width == 2:
+            values = array('H', data)
+        else:
+            values = [int.from_bytes(data[i:i + width], 'big') for i in range(0, len(data), width)]
+        indices.extend(value % n for value in values if value < limit)
+    del indices[count:]
+    return indices
+
+class ByteSampler:
+    """Draws uniformly random strings over an alphabet of up to 256 Latin-1 characters.
+    
+    One bytes.translate() call both maps random bytes to characters and
+    drops the bytes that would bias the result, so the per-character work
+    stays in C.
+    """
+    
+    def __init__(self, alphabet: str):
+        try:
+            symbols = alphabet.encode('latin-1')
+        except UnicodeEncodeError:
+            raise ValueError("Only Latin-1 characters can be used in passwords")
+        n = len(symbols)
+        if not 0 < n <= 256:
+            raise ValueError("An alphabet needs between 1 and 256 characters")
+        limit = 256 - 256 % n
+        self._table = bytes(symbols[byte % n] for byte in range(256))
+        self._rejected = bytes(range(limit, 256))
+        self._acceptance = limit / 256
+    
+    def draw(self, count: int) -> bytes:
+        chunks = []
+        drawn = 0
+        while drawn < count:
+            chunk = secrets.token_bytes(int((count - drawn) / self._acceptance) + 16)
+            chunk = chunk.translate(self._table, self._rejected)
+            chunks.append(chunk)
+            drawn += len(chunk)
+        return b''.join(chunks)[:count]
+
+class PasswordPolicy:
+    """Passwords of random characters from the enabled character classes.
+    
+    symbols is the set of symbol characters; an empty string disables them.
+    Each class in `required` (by default every enabled class) appears at
+    least once. Candidates missing a class are drawn again rather than
+    patched, which keeps every valid password equally likely, and
+    entropy_bits() counts exactly the passwords that can come out.
+    """
+    
+    def __init__(self, length: int = 16, lowercase: bool = True, uppercase: bool = True, digits: bool = True,
+                 symbols: str = DEFAULT_SYMBOLS, required: Optional[Sequence[str]] = None,
+                 exclude_ambiguous: bool = False, exclude: str = ""):
+        excluded = set(exclude) | (set(AMBIGUOUS_CHARACTERS) if exclude_ambiguous else set())
+        candidates = {
+            'lowercase': string.ascii_lowercase if lowercase else "",
+            'uppercase': string.ascii_uppercase if uppercase else "",
+            'digits': string.digits if digits else "",
+            # Letters and digits belong to their own classes, so the classes never overlap
+            'symbols': ''.join(dict.fromkeys(char for char in symbols if not char.isalnum())),
+        }
+        self.classes = {name: ''.join(char for char in chars if char not in excluded)
+                        for name, chars in candidates.items()}
+        self.classes = {name: chars for name, chars in self.classes.items() if chars}
+        if not self.classes:
+            raise ValueError("The policy leaves no characters to choose from")
+        
+        self.required = tuple(self.classes if required is None else required)
+        for name in self.required:
+            if name not in CHARACTER_CLASSES:
+                raise ValueError(f"Unknown character class {name!r}; expected one of {CHARACTER_CLASSES}")
+            if name not in self.classes:
+                raise ValueError(f"{name} are required but none are allowed")
+        if length < max(1, len(self.required)):
+            raise ValueError(f"A length of {length} cannot hold the {len(self.required)} required classes")
+        
+        self.length = length
+        self.alphabet = ''.join(self.classes.values())
+        self._sampler = ByteSampler(self.alphabet)
+        self._required_bytes = [self.classes[name].encode('latin-1') for name in self.required]
+        self._valid = self._count_valid()
+        self._acceptance = self._valid / len(self.alphabet) ** length
+    
+    def _count_valid(self) -> int:
+        # Inclusion-exclusion over the required classes: strings of the right
+        # length minus those missing at least one required class
+        total = 0
+        for size in range(len(self.required) + 1):
+            for missing in combinations(self.required, size):
+                remaining = len(self.alphabet) - sum(len(self.classes[name]) for name in missing)
+                total += (-1) ** size * remaining ** self.length
+        return total
+    
+    def entropy_bits(self) -> float:
+        return math.log2(self._valid)
+    
+    def describe(self) -> str:
+        return (f"{self.length} characters from {len(self.alphabet)} ({', '.join(self.classes)}), "
+                f"{self.entropy_bits():.0f} bits")
+    
+    def generate(self, count: int = 1) -> List[str]:
+        """Return `count` passwords, drawn from one bulk read of random bytes where possible."""
+        length = self.length
+        passwords = []
+        while len(passwords) < count:
+            batch = int((count - len(passwords)) / self._acceptance * OVERDRAW) + 1
+            data = self._sampler.draw(batch * length)
+            for offset in range(0, len(data), length):
+                candidate = data[offset:offset + length]
+                # translate(None, chars) drops the class's characters; a shorter result means one was there
+                if all(len(candidate.translate(None, chars)) < length for chars in self._required_bytes):
+                    passwords.append(candidate.decode('latin-1'))
+        del passwords[count:]
+        return passwords
+
+def load_wordlist(path: Optional[str] = None) -> List[str]:
+    """Read a wordlist: one word per line, or diceware's "11111<tab>word" lines.
+    
+    Duplicates and blank lines are dropped so that every word is equally
+    likely. Lists are cached by path.
+    """
+    path = path or DEFAULT_WORDLIST
+    words = _wordlists.get(path)
+    if words is None:
+        with open(path, encoding='utf-8') as wordlist:
+            lines = (line.split()[-1] for line in wordlist if line.strip())
+            words = list(dict.fromkeys(lines))
+        if len(words) < 2:
+            raise ValueError(f"{path} holds fewer than two distinct words")
+        _wordlists[path] = words
+    return words
+
+class PassphrasePolicy:
+    """Diceware-style passphrases: words drawn uniformly from a wordlist.
+    
+    The wordlist is read the first time it is needed. Capitalizing the
+    words changes how a passphrase looks, not its entropy.
+    """
+    
+    def __init__(self, words: int = 6, separator: str = "-", wordlist: Optional[str] = None,
+                 capitalize: bool = False):
+        if words < 1:
+            raise ValueError("A passphrase needs at least one word")
+        self.words = words
+        self.separator = separator
+        self.wordlist = wordlist
+        self.capitalize = capitalize
+    
+    def entropy_bits(self) -> float:
+        return self.words * math.log2(len(load_wordlist(self.wordlist)))
+    
+    def describe(self) -> str:
+        return (f"{self.words} words from a list of {len(load_wordlist(self.wordlist))}, "
+                f"{self.entropy_bits():.0f} bits")
+    
+    def generate(self, count: int = 1) -> List[str]:
+        wordlist = load_wordlist(self.wordlist)
+        if self.capitalize:
+            wordlist = [word.capitalize() for word in wordlist]
+        indices = random_indices(len(wordlist), count * self.words)
+        return [self.separator.join(wordlist[i] for i in indices[offset:offset + self.words])
+                for offset in range(0, len(indices), self.words)]
+
+DEFAULT_POLICY = PasswordPolicy()
+
+# Offered by the entry window's generator, in menu order
+PRESETS = {
+    "Password (16 characters)": DEFAULT_POLICY,
+    "Password (24 characters)": PasswordPolicy(length=24),
+    "Password without look-alikes (20)": PasswordPolicy(length=20, exclude_ambiguous=True),
+    "Letters and digits (20)": PasswordPolicy(length=20, symbols=""),
+    "PIN (6 digits)": PasswordPolicy(length=6, lowercase=False, uppercase=False, symbols=""),
+    "Passphrase (6 words)": PassphrasePolicy(),
+}
+
+def generate_password(policy=None) -> str:
+    return (policy or DEFAULT_POLICY).generate()[0]
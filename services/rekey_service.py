@@ -0,0 +1,216 @@
+import base64
+import hmac
+import threading
+from typing import Callable, Optional, Set
+from services.database_service import DatabaseService, UPSERT_META
+from services.encryption_service import EncryptionService
+
+SELECT_PROGRESS = 'SELECT salt, iterations, key_verifier, last_id FROM rekey_progress WHERE id = 1'
+
+INSERT_PROGRESS = 'INSERT INTO rekey_progress (id, salt, iterations, key_verifier) VALUES (1, ?, ?, ?)'
+
+UPDATE_PROGRESS = 'UPDATE rekey_progress SET last_id = ? WHERE id = 1'
+
+DELETE_PROGRESS = 'DELETE FROM rekey_progress'
+
+SELECT_REKEY_BATCH = '''
+    SELECT id, password FROM password_entries
+    WHERE id > ? AND password != ''
+    ORDER BY id
+    LIMIT ?
+'''
+
+# Rows written or changed since the batches passed them
+SELECT_REKEY_STRAGGLERS = '''
+    SELECT id, password FROM password_entries
+    WHERE rekey_password IS NULL AND password != ''
+'''
+
+COUNT_REKEY_ROWS = "SELECT COUNT(*) FROM password_entries WHERE password != ''"
+
+COUNT_REKEY_ROWS_UPTO = "SELECT COUNT(*) FROM password_entries WHERE id <= ? AND password != ''"
+
+# Only if the row still holds the ciphertext that was re-encrypted
+SET_REKEYED = '''
+    UPDATE password_entries SET rekey_password = ?, rekey_fingerprint = ?
+    WHERE id = ? AND password = ?
+'''
+
+SWAP_REKEYED = '''
+    UPDATE password_entries
+    SET password = rekey_password, password_fingerprint = rekey_fingerprint,
+        rekey_password = NULL, rekey_fingerprint = NULL
+    WHERE rekey_password IS NOT NULL
+'''
+
+CLEAR_REKEYED = '''
+    UPDATE password_entries SET rekey_password = NULL, rekey_fingerprint = NULL
+    WHERE rekey_password IS NOT NULL
+'''
+
+# Rows per transaction; each batch is decrypted and re-encrypted across cores
+REKEY_BATCH_SIZE = 1000
+
+class VaultRekey:
+    """Changes the master password by re-encrypting every row under a new key.
+    
+    The new key gets a fresh random salt. run() streams the rows in id order
+    in batches. Each batch is decrypted with the current key and encrypted
+    with the new one on the shared crypto pool, then written to the
+    rekey_* columns in one transaction. rekey_progress records the last id
+    done and the new key's salt, work factor and verifier.
+    
+    Until finish() the vault still opens with the old password. After a
+    crash, running again with the same new password resumes after the last
+    committed batch; a different new password discards the partial work and
+    starts over. finish() re-encrypts rows written meanwhile, then swaps the
+    new ciphertext in and updates the key parameters in one transaction.
+    Use start() to run on a background thread and poll done()/progress().
+    """
+    
+    def __init__(self, db_service: DatabaseService, new_password: str, iterations: Optional[int] = None,
+                 batch_size: int = REKEY_BATCH_SIZE):
+        if not db_service.is_unlocked:
+            raise RuntimeError("Vault is locked")
+        self.db_service = db_service
+        self.new_password = new_password
+        self.iterations = iterations
+        self.batch_size = batch_size
+        self.new_service: Optional[EncryptionService] = None
+        self.resumed = False
+        self.complete = False
+        self.failed_ids: Set[int] = set()
+        self._done_rows = 0
+        self._total_rows = 0
+        self._stop = threading.Event()
+        self._finished = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+    
+    @staticmethod
+    def pending(db_service: DatabaseService) -> bool:
+        # An interrupted change that the same new password can resume
+        with db_service.transaction() as conn:
+            return conn.execute(SELECT_PROGRESS).fetchone() is not None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run_safely, name="rekey", daemon=True)
+        self._thread.start()
+    
+    def stop(self, wait: bool = True):
+        # Committed batches are kept; running again resumes after them
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+    
+    def done(self) -> bool:
+        return self._finished.is_set()
+    
+    def progress(self) -> float:
+        return self._done_rows / self._total_rows if self._total_rows else 0.0
+    
+    def result(self):
+        # Re-raises what stopped the background run, if anything
+        self._finished.wait()
+        if self._error is not None:
+            raise self._error
+    
+    def _run_safely(self):
+        try:
+            self.run()
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._finished.set()
+    
+    def run(self, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """Re-encrypt all rows into the rekey_* columns; returns the rows done by this run.
+        
+        progress(done, total) is called after every batch.
+        """
+        last_id = self._prepare()
+        old_service = self.db_service.encryption_service
+        with self.db_service.transaction() as conn:
+            self._total_rows = conn.execute(COUNT_REKEY_ROWS).fetchone()[0]
+            if last_id:
+                self._done_rows = conn.execute(COUNT_REKEY_ROWS_UPTO, (last_id,)).fetchone()[0]
+        rekeyed = 0
+        while not self._stop.is_set():
+            with self.db_service.transaction() as conn:
+                rows = conn.execute(SELECT_REKEY_BATCH, (last_id, self.batch_size)).fetchall()
+            if not rows:
+                self.complete = True
+                break
+            # The slow part runs outside the lock so the UI keeps working meanwhile
+            updates = self._reencrypt(old_service, rows)
+            last_id = rows[-1][0]
+            with self.db_service.transaction() as conn:
+                conn.executemany(SET_REKEYED, updates)
+                conn.execute(UPDATE_PROGRESS, (last_id,))
+            rekeyed += len(updates)
+            self._done_rows += len(rows)
+            if progress is not None:
+                progress(self._done_rows, self._total_rows)
+        return rekeyed
+    
+    def finish(self) -> EncryptionService:
+        """Swap the new ciphertext in and return the new key's EncryptionService.
+        
+        Attach the result to the DatabaseService afterwards; entries loaded
+        before the swap hold old ciphertext and must be reloaded.
+        """
+        if not self.complete:
+            raise RuntimeError("Re-encryption has not finished; run() again to resume it")
+        old_service = self.db_service.encryption_service
+        with self.db_service.transaction() as conn:
+            # Hold the write lock from the catch-up through the swap so no other
+            # connection can slip an old-key row in between
+            conn.execute('BEGIN IMMEDIATE')
+            # Rows this run already failed to decrypt are left as they are, not tried again
+            stragglers = [row for row in conn.execute(SELECT_REKEY_STRAGGLERS) if row[0] not in self.failed_ids]
+            if stragglers:
+                conn.executemany(SET_REKEYED, self._reencrypt(old_service, stragglers))
+            conn.execute(SWAP_REKEYED)
+            conn.execute(UPSERT_META, ('kdf_salt', base64.b64encode(self.new_service.salt).decode()))
+            conn.execute(UPSERT_META, ('kdf_iterations', str(self.new_service.iterations)))
+            conn.execute(UPSERT_META, ('key_verifier', self.new_service.key_verifier()))
+            conn.execute(DELETE_PROGRESS)
+        self.new_password = None
+        return self.new_service
+    
+    def _prepare(self) -> int:
+        # Derive the new key, resuming a matching interrupted change; returns the id to continue after
+        with self.db_service.transaction() as conn:
+            row = conn.execute(SELECT_PROGRESS).fetchone()
+        if row is not None:
+            salt, iterations, verifier, last_id = row
+            candidate = EncryptionService(self.new_password, iterations, salt=salt)
+            if hmac.compare_digest(verifier, candidate.key_verifier()):
+                self.new_service = candidate
+                self.resumed = True
+                return last_id
+            with self.db_service.transaction() as conn:
+                conn.execute(CLEAR_REKEYED)
+                conn.execute(DELETE_PROGRESS)
+        
+        iterations = self.iterations or EncryptionService.calibrate_iterations()
+        self.new_service = EncryptionService(self.new_password, iterations, salt=EncryptionService.generate_salt())
+        with self.db_service.transaction() as conn:
+            conn.execute(INSERT_PROGRESS, (self.new_service.salt, iterations, self.new_service.key_verifier()))
+        return 0
+    
+    def _reencrypt(self, old_service: EncryptionService, rows):
+        failed = set()
+        plaintexts = old_service.decrypt_many([ciphertext for _, ciphertext in rows],
+                                              on_error=lambda index, e: failed.add(index))
+        ciphertexts = self.new_service.encrypt_many(plaintexts)
+        updates = []
+        for index, ((entry_id, ciphertext), plaintext, new_ciphertext) in enumerate(
+                zip(rows, plaintexts, ciphertexts)):
+            if index in failed:
+                # Unreadable with the old key too; left as it is rather than
+                # replaced by an encrypted empty string
+                self.failed_ids.add(entry_id)
+                continue
+            updates.append((new_ciphertext, self.new_service.fingerprint(plaintext), entry_id, ciphertext))
+        return updates
@@ -0,0 +1,153 @@
+import threading
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Sequence, Set, Tuple
+from models.password_entry import PasswordEntry
+
+SEARCH_FIELDS = ('website', 'username', 'email', 'notes')
+
+# Marks the start of each field so prefix queries map onto their own trigrams
+FIELD_START = '\x00'
+
+class SearchIndex:
+    """In-memory trigram index over the plaintext columns of the loaded entries.
+    
+    Postings are compact arrays of entry ids. A query intersects its rarest
+    trigrams and verifies only the survivors, so selective queries cost time
+    proportional to the result rather than the vault. Queries shorter than a
+    trigram fall back to a scan of the pre-lowercased text.
+    """
+    
+    # Stop intersecting postings once the candidate set is this small
+    VERIFY_THRESHOLD = 64
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        # id -> lowercased fields, each preceded by FIELD_START
+        self._texts: Dict[int, str] = {}
+        self._postings: Dict[str, array] = defaultdict(lambda: array('I'))
+    
+    def __len__(self) -> int:
+        return len(self._texts)
+    
+    def clear(self):
+        with self._lock:
+            self._texts.clear()
+            self._postings.clear()
+    
+    def add(self, entry: PasswordEntry):
+        self.add_many((entry,))
+    
+    def add_many(self, entries: Iterable[PasswordEntry]):
+        with self._lock:
+            postings = self._postings
+            for entry in entries:
+                entry_id = entry.id
+                if entry_id in self._texts:
+                    self._remove_locked(entry_id)
+                text = self._entry_text(entry)
+                self._texts[entry_id] = text
+                for gram in self._trigrams(text):
+                    postings[gram].append(entry_id)
+    
+    def remove(self, entry_id: int):
+        with self._lock:
+            self._remove_locked(entry_id)
+    
+    def _remove_locked(self, entry_id: int):
+        text = self._texts.pop(entry_id, None)
+        if text is None:
+            return
+        for gram in self._trigrams(text):
+            posting = self._postings[gram]
+            posting.remove(entry_id)
+            if not posting:
+                del self._postings[gram]
+    
+    def search(self, query: str, fields: Optional[Sequence[str]] = None, prefix: bool = False,
+               within: Optional[Iterable[int]] = None) -> Set[int]:
+        """Return the ids of entries whose fields contain (or start with) `query`.
+        
+        `fields` limits the match to a subset of SEARCH_FIELDS and `within`
+        restricts the candidates, e.g. to the result of a shorter query.
+        """
+        query = query.lower()
+        with self._lock:
+            if not query:
+                return set(self._texts) if within is None else set(within) & self._texts.keys()
+            
+            candidates = self._candidates(FIELD_START + query if prefix else query)
+            if within is not None:
+                within = within if isinstance(within, (set, frozenset)) else set(within)
+                candidates = within if candidates is None else within.intersection(candidates)
+            if candidates is None:
+                candidates = self._texts.keys()
+            
+            texts = self._texts
+            if fields is None:
+                # Whole-text check: FIELD_START keeps a match from spanning two fields
+                needle = FIELD_START + query if prefix else query
+                if candidates is texts.keys():
+                    return {entry_id for entry_id, text in texts.items() if needle in text}
+                return {entry_id for entry_id in candidates
+                        if needle in texts.get(entry_id, '')}
+            positions = self._field_positions(fields)
+            return {entry_id for entry_id in candidates
+                    if entry_id in texts and
+                    self._fields_match(self._split(texts[entry_id]), query, positions, prefix)}
+    
+    def _candidates(self, text: str):
+        # Intersect postings from the rarest up; None means scan everything
+        if len(text) < 3:
+            return None
+        postings = []
+        for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return ()
+            postings.append(posting)
+        postings.sort(key=len)
+        if len(postings[0]) > len(self._texts) // 2:
+            # Unselective query; a straight scan of the texts is cheaper than building sets
+            return None
+        
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            # Walking a posting costs about as much as verifying that many candidates
+            if len(candidates) <= self.VERIFY_THRESHOLD or len(posting) > 4 * len(candidates):
+                break
+            candidates.intersection_update(posting)
+        return candidates
+    
+    @staticmethod
+    def _fields_match(entry_fields: Tuple[str, ...], query: str, positions: Sequence[int], prefix: bool) -> bool:
+        if prefix:
+            return any(entry_fields[i].startswith(query) for i in positions)
+        return any(query in entry_fields[i] for i in positions)
+    
+    @staticmethod
+    def _field_positions(fields: Optional[Sequence[str]]) -> Sequence[int]:
+        if fields is None:
+            return range(len(SEARCH_FIELDS))
+        return [SEARCH_FIELDS.index(field) for field in fields]
+    
+    @staticmethod
+    def _entry_text(entry: PasswordEntry) -> str:
+        return ''.join(FIELD_START + (getattr(entry, field) or '').lower() for field in SEARCH_FIELDS)
+    
+    @staticmethod
+    def _split(text: str) -> Tuple[str, ...]:
+        return tuple(text.split(FIELD_START)[1:])
+    
+    @staticmethod
+    def _trigrams(text: str) -> Set[str]:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+    
+    @classmethod
+    def entry_matches(cls, entry: PasswordEntry, query: str, fields: Optional[Sequence[str]] = None,
+                      prefix: bool = False) -> bool:
+        # Same rules as search(), for checking a single entry without the index
+        query = query.lower()
+        if not query:
+            return True
+        return cls._fields_match(cls._split(cls._entry_text(entry)), query, cls._field_positions(fields), prefix)
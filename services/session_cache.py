@@ -0,0 +1,118 @@
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+from cryptography.fernet import Fernet, InvalidToken
+from services.encryption_service import EncryptionService
+
+# Idle window after locking during which the vault can be reopened without the KDF;
+# override with PASSWORD_MANAGER_SESSION_TIMEOUT (seconds, 0 disables the cache)
+DEFAULT_SESSION_TIMEOUT = 300
+
+class SessionKeyCache:
+    """Keeps the derived vault key for a short while after the app is locked.
+    
+    Only a verifier of the master password and a copy of the key wrapped
+    under it are kept, both keyed with per-process random secrets, so the
+    cache is useless without the password. Whatever the caller stores as
+    payload (e.g. the loaded entries) lives and dies with the key.
+    """
+    
+    def __init__(self, timeout: Optional[float] = None):
+        if timeout is None:
+            timeout = self._timeout_from_env()
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._verify_secret = os.urandom(32)
+        self._wrap_secret = os.urandom(32)
+        self._verifier: Optional[bytes] = None
+        self._wrapped_key: Optional[bytearray] = None
+        self._iterations = 0
+        self._salt = b''
+        self._payload: Any = None
+        self._on_wipe: Optional[Callable[[Any], None]] = None
+        self._expires_at = 0.0
+        self._timer: Optional[threading.Timer] = None
+    
+    @staticmethod
+    def _timeout_from_env() -> float:
+        try:
+            return float(os.environ.get('PASSWORD_MANAGER_SESSION_TIMEOUT', DEFAULT_SESSION_TIMEOUT))
+        except ValueError:
+            return DEFAULT_SESSION_TIMEOUT
+    
+    @property
+    def enabled(self) -> bool:
+        return self.timeout > 0
+    
+    def store(self, master_password: str, db_path: str, encryption_service: EncryptionService,
+              payload: Any = None, on_wipe: Optional[Callable[[Any], None]] = None):
+        # on_wipe(payload) runs on the eviction timer thread; keep it free of Tk calls
+        if not self.enabled:
+            if on_wipe is not None:
+                on_wipe(payload)
+            return
+        self.wipe()
+        with self._lock:
+            self._verifier = self._verify(master_password, db_path)
+            wrapped = Fernet(self._wrapping_key(master_password)).encrypt(encryption_service.key)
+            self._wrapped_key = bytearray(wrapped)
+            self._iterations = encryption_service.iterations
+            self._salt = encryption_service.salt
+            self._payload = payload
+            self._on_wipe = on_wipe
+            self._expires_at = time.monotonic() + self.timeout
+            self._timer = threading.Timer(self.timeout, self.wipe)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def matches(self, master_password: str, db_path: str) -> bool:
+        with self._lock:
+            return self._valid() and hmac.compare_digest(self._verifier, self._verify(master_password, db_path))
+    
+    def take(self, master_password: str, db_path: str) -> Optional[Tuple[EncryptionService, Any]]:
+        """Return the cached (encryption service, payload) and empty the cache, or None."""
+        with self._lock:
+            if not self._valid() or not hmac.compare_digest(self._verifier, self._verify(master_password, db_path)):
+                return None
+            try:
+                key = Fernet(self._wrapping_key(master_password)).decrypt(bytes(self._wrapped_key))
+            except InvalidToken:
+                return None
+            payload = self._payload
+            iterations, salt = self._iterations, self._salt
+            # Handed over to the caller, so nothing is left to wipe
+            self._payload = None
+            self._on_wipe = None
+        self.wipe()
+        return EncryptionService(master_password, iterations, key=key, salt=salt), payload
+    
+    def wipe(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._wrapped_key is not None:
+                for i in range(len(self._wrapped_key)):
+                    self._wrapped_key[i] = 0
+            self._wrapped_key = None
+            self._verifier = None
+            payload, on_wipe = self._payload, self._on_wipe
+            self._payload = None
+            self._on_wipe = None
+        if on_wipe is not None:
+            on_wipe(payload)
+    
+    def _valid(self) -> bool:
+        return self._verifier is not None and time.monotonic() < self._expires_at
+    
+    def _verify(self, master_password: str, db_path: str) -> bytes:
+        message = os.path.abspath(db_path).encode() + b'\0' + master_password.encode()
+        return hmac.new(self._verify_secret, message, hashlib.sha256).digest()
+    
+    def _wrapping_key(self, master_password: str) -> bytes:
+        digest = hmac.new(self._wrap_secret, master_password.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest)
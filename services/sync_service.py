@@ -0,0 +1,225 @@
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from services.database_service import DatabaseService, LOG_CHANGE
+
+# One page of the change log, with the entry as it is now; deleted entries
+# only have their tombstone. Changes that came from the requesting replica
+# are left out rather than echoed back to it. The page stops at the last
+# sequence number read beforehand, so a change committed between the two
+# reads is left for the next page instead of being skipped.
+SELECT_CHANGES = '''
+    SELECT c.seq, c.entry_uid, c.date_modified, c.deleted, c.origin,
+           e.website, e.username, e.email, e.password, e.notes, e.date_created
+    FROM change_log c
+    LEFT JOIN password_entries e ON e.entry_uid = c.entry_uid
+    WHERE c.seq > ? AND c.seq <= ? AND (c.origin IS NOT ? OR ? IS NULL)
+    ORDER BY c.seq
+    LIMIT ?
+'''
+
+SELECT_LAST_SEQ = 'SELECT IFNULL(MAX(seq), 0) FROM change_log'
+
+SELECT_LOGGED_CHANGE = 'SELECT date_modified, origin FROM change_log WHERE entry_uid = ?'
+
+SELECT_PEER_SEQ = 'SELECT last_seq FROM sync_peers WHERE replica_id = ?'
+
+UPSERT_PEER_SEQ = '''
+    INSERT OR REPLACE INTO sync_peers (replica_id, last_seq, last_sync) VALUES (?, ?, ?)
+'''
+
+# Also drops any re-encrypted copy from a master password change in progress
+UPDATE_SYNCED_ENTRY = '''
+    UPDATE password_entries
+    SET website=?, username=?, email=?, password=?, notes=?, date_modified=?, password_fingerprint=?,
+        rekey_password=NULL, rekey_fingerprint=NULL
+    WHERE entry_uid=?
+'''
+
+INSERT_SYNCED_ENTRY = '''
+    INSERT INTO password_entries
+    (website, username, email, password, notes, date_modified, password_fingerprint, entry_uid, date_created)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+DELETE_SYNCED_ENTRY = 'DELETE FROM password_entries WHERE entry_uid=?'
+
+# Changes per page; pages to and from the agent must fit in one request line
+SYNC_BATCH_SIZE = 200
+
+def change_order(date_modified: Optional[str], origin: Optional[str]) -> Tuple[datetime, str]:
+    # Last writer wins: the later modification, ties settled by the replica it
+    # was made on, so both sides pick the same version
+    try:
+        modified = datetime.fromisoformat(date_modified)
+    except (TypeError, ValueError):
+        modified = datetime.min
+    return modified, origin or ''
+
+class LocalReplica:
+    """A vault file on this machine, as one side of a sync.
+    
+    Changes travel as dicts with the entry in plaintext, since every replica
+    may have its own key; each side decrypts what it sends and encrypts what
+    it receives, and only the rows in the delta are touched. The vault must
+    be unlocked.
+    """
+    
+    def __init__(self, db_service: DatabaseService):
+        if not db_service.is_unlocked:
+            raise RuntimeError("Vault is locked")
+        self.db_service = db_service
+        # Entries whose password could not be decrypted and were not sent
+        self.failed_uids: List[str] = []
+    
+    def replica_id(self) -> str:
+        return self.db_service.replica_id()
+    
+    def peer_seq(self, peer_id: str) -> int:
+        with self.db_service.transaction() as conn:
+            row = conn.execute(SELECT_PEER_SEQ, (peer_id,)).fetchone()
+        return row[0] if row else 0
+    
+    def record_peer(self, peer_id: str, seq: int):
+        with self.db_service.transaction() as conn:
+            conn.execute(UPSERT_PEER_SEQ, (peer_id, seq, datetime.now().isoformat()))
+    
+    def changes(self, since: int, exclude_origin: Optional[str] = None, limit: int = SYNC_BATCH_SIZE) -> Dict:
+        """Return the changes after sequence number `since`.
+        
+        The result holds the changes, the sequence number to ask from next
+        time ('last_seq') and whether more changes follow ('more').
+        """
+        with self.db_service.transaction() as conn:
+            # Each statement reads its own snapshot, so the end of the log is fixed first
+            end_seq = conn.execute(SELECT_LAST_SEQ).fetchone()[0]
+            rows = conn.execute(SELECT_CHANGES, (since, end_seq, exclude_origin, exclude_origin, limit)).fetchall()
+            more = len(rows) == limit
+            last_seq = rows[-1][0] if more else end_seq
+        
+        live = [row for row in rows if not row[3] and row[5] is not None]
+        failed = set()
+        passwords = self.db_service.encryption_service.decrypt_many(
+            [row[8] for row in live], on_error=lambda index, e: failed.add(index))
+        passwords_by_uid = {}
+        for index, (row, password) in enumerate(zip(live, passwords)):
+            if index in failed:
+                self.failed_uids.append(row[1])
+            else:
+                passwords_by_uid[row[1]] = password
+        
+        changes = []
+        for seq, uid, date_modified, deleted, origin, website, username, email, _, notes, date_created in rows:
+            change = {'uid': uid, 'date_modified': date_modified, 'origin': origin, 'deleted': bool(deleted)}
+            if not deleted:
+                if uid not in passwords_by_uid:
+                    continue
+                change.update(website=website, username=username or '', email=email or '',
+                              password=passwords_by_uid[uid], notes=notes or '', date_created=date_created)
+            changes.append(change)
+        return {'changes': changes, 'last_seq': last_seq, 'more': more}
+    
+    def apply(self, changes: List[Dict]) -> int:
+        """Apply the changes that are newer than what this vault has; returns how many were.
+        
+        Each applied change is logged here under its original origin, so it
+        travels on to further replicas without coming back to its source.
+        """
+        newer = self._newer(changes)
+        live = [change for change in newer if not change['deleted']]
+        encryption_service = self.db_service.encryption_service
+        failures = []
+        ciphertexts = encryption_service.encrypt_many([change['password'] for change in live],
+                                                      on_error=lambda index, e: failures.append(e))
+        if failures:
+            raise failures[0]
+        ciphertext_by_uid = {change['uid']: ciphertext for change, ciphertext in zip(live, ciphertexts)}
+        
+        applied = 0
+        with self.db_service.transaction() as conn:
+            for change in newer:
+                # Checked again under the lock: a local edit may have landed since
+                if not self._is_newer(conn, change):
+                    continue
+                uid = change['uid']
+                if change['deleted']:
+                    conn.execute(DELETE_SYNCED_ENTRY, (uid,))
+                else:
+                    fields = (change['website'], change['username'], change['email'], ciphertext_by_uid[uid],
+                              change['notes'], change['date_modified'],
+                              encryption_service.fingerprint(change['password']), uid)
+                    if conn.execute(UPDATE_SYNCED_ENTRY, fields).rowcount == 0:
+                        conn.execute(INSERT_SYNCED_ENTRY, fields + (change['date_created'],))
+                conn.execute(LOG_CHANGE, (uid, change['date_modified'], int(change['deleted']), change['origin']))
+                applied += 1
+        return applied
+    
+    def _newer(self, changes: List[Dict]) -> List[Dict]:
+        with self.db_service.transaction() as conn:
+            return [change for change in changes if self._is_newer(conn, change)]
+    
+    @staticmethod
+    def _is_newer(conn, change: Dict) -> bool:
+        logged = conn.execute(SELECT_LOGGED_CHANGE, (change['uid'],)).fetchone()
+        return logged is None or change_order(change['date_modified'], change['origin']) > change_order(*logged)
+
+class RemoteReplica:
+    """A vault held open by VaultAgent, synced through its socket."""
+    
+    def __init__(self, client):
+        # An AgentClient; its connection is left to the caller
+        self.client = client
+    
+    def _request(self, op: str, **params):
+        response = self.client.request(op, **params)
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error', "Request failed"))
+        return response.get('result')
+    
+    def replica_id(self) -> str:
+        return self._request('replica')
+    
+    def peer_seq(self, peer_id: str) -> int:
+        return self._request('peer', peer=peer_id)
+    
+    def record_peer(self, peer_id: str, seq: int):
+        self._request('peer', peer=peer_id, seq=seq)
+    
+    def changes(self, since: int, exclude_origin: Optional[str] = None, limit: int = SYNC_BATCH_SIZE) -> Dict:
+        return self._request('changes', since=since, exclude_origin=exclude_origin, limit=limit)
+    
+    def apply(self, changes: List[Dict]) -> int:
+        return self._request('apply', changes=changes)
+
+def sync(local, remote, batch_size: int = SYNC_BATCH_SIZE,
+         progress: Optional[Callable[[str, int], None]] = None) -> Tuple[int, int]:
+    """Bring two replicas up to date with each other; returns the changes (received, sent).
+    
+    Each side remembers the last sequence number it has from the other, so
+    only the changes since the previous sync are exchanged, page by page.
+    The position is saved after every page, so an interrupted sync picks up
+    where it stopped. Conflicting edits of one entry are settled by last
+    writer wins on date_modified, deletions included. progress(direction,
+    count) is called after every page.
+    """
+    local_id, remote_id = local.replica_id(), remote.replica_id()
+    if local_id == remote_id:
+        raise ValueError("Both sides are the same replica")
+    received = _transfer(remote, local, remote_id, local_id, batch_size,
+                         None if progress is None else lambda count: progress('received', count))
+    sent = _transfer(local, remote, local_id, remote_id, batch_size,
+                     None if progress is None else lambda count: progress('sent', count))
+    return received, sent
+
+def _transfer(source, target, source_id: str, target_id: str, batch_size: int,
+              progress: Optional[Callable[[int], None]]) -> int:
+    since = target.peer_seq(source_id)
+    applied = 0
+    while True:
+        page = source.changes(since, exclude_origin=target_id, limit=batch_size)
+        applied += target.apply(page['changes'])
+        since = page['last_seq']
+        target.record_peer(source_id, since)
+        if progress is not None:
+            progress(applied)
+        if not page['more']:
+            return applied
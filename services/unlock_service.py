@@ -0,0 +1,76 @@
+import threading
+import time
+from typing import Optional
+from services.encryption_service import EncryptionService
+from services.database_service import DatabaseService
+
+class UnlockTask:
+    """Derives the vault key on a background thread.
+    
+    The work factor is read from the vault (or calibrated for a new one) on
+    the same thread, so the caller can build its UI and open the database
+    while PBKDF2 runs. Poll done()/progress() from the UI and call result()
+    once done.
+    
+    Only new vaults pay for a timing probe. For existing ones progress is
+    estimated from the rate of the last derivation in this process, or
+    else from the unlock time vaults are calibrated to.
+    """
+    
+    # PBKDF2 iterations per second seen by the last derivation, once there has been one
+    _measured_rate: Optional[float] = None
+    
+    def __init__(self, master_password: str, db_path: Optional[str] = None):
+        self.master_password = master_password
+        self.db_path = db_path or DatabaseService.default_db_path()
+        self.iterations: Optional[int] = None
+        self._estimated_seconds: Optional[float] = None
+        self._started = time.perf_counter()
+        self._result: Optional[EncryptionService] = None
+        self._error: Optional[BaseException] = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="unlock", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        try:
+            iterations, salt = DatabaseService.read_kdf_params(self.db_path)
+            if iterations is None:
+                # New vault: calibrated to this host, with its own random salt
+                rate = EncryptionService.measure_iteration_rate()
+                iterations = EncryptionService.calibrate_iterations(rate=rate)
+                salt = EncryptionService.generate_salt()
+                self._estimated_seconds = iterations / rate
+            elif UnlockTask._measured_rate:
+                self._estimated_seconds = iterations / UnlockTask._measured_rate
+            else:
+                self._estimated_seconds = EncryptionService.target_unlock_seconds()
+            self.iterations = iterations
+            self._started = time.perf_counter()
+            self._result = EncryptionService(self.master_password, iterations, salt=salt)
+            UnlockTask._measured_rate = iterations / max(time.perf_counter() - self._started, 1e-6)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self.master_password = None
+            self._done.set()
+    
+    def done(self) -> bool:
+        return self._done.is_set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+    
+    def progress(self) -> float:
+        # Estimated fraction of the key derivation completed, for a progress bar
+        if self._done.is_set():
+            return 1.0
+        if not self._estimated_seconds:
+            return 0.0
+        return min(0.99, (time.perf_counter() - self._started) / self._estimated_seconds)
+    
+    def result(self) -> EncryptionService:
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
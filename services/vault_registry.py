@@ -0,0 +1,104 @@
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+# Kept free of the database and crypto imports: the login window reads the
+# registry before those have loaded
+
+REGISTRY_FILE = "vaults.json"
+
+# The vault at DatabaseService.default_db_path(); always registered
+DEFAULT_VAULT = "personal"
+
+VAULT_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+def app_folder() -> str:
+    # Same folder as DatabaseService.default_db_path()
+    folder = os.path.join(os.path.expanduser("~"), "PasswordManager")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+class VaultRegistry:
+    """Named vaults, each in its own database file.
+    
+    The names and paths are kept as JSON next to the default vault, which
+    is always registered as DEFAULT_VAULT. Vaults added without a path get
+    a file in the vaults folder; removing a vault only forgets it and
+    leaves its file alone.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(app_folder(), REGISTRY_FILE)
+        self._vaults: Dict[str, str] = {}
+        self.reload()
+    
+    def reload(self):
+        vaults = {}
+        try:
+            with open(self.path, encoding='utf-8') as registry:
+                vaults = json.load(registry)
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            print(f"Error reading vault registry: {e}")
+        self._vaults = {DEFAULT_VAULT: os.path.join(app_folder(), "passwords.db")}
+        self._vaults.update((str(name), str(path)) for name, path in vaults.items())
+    
+    def _save(self):
+        # Written next to the registry and moved into place, so it is never half written
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as registry:
+            json.dump(self._vaults, registry, indent=2)
+        os.replace(tmp_path, self.path)
+    
+    def names(self) -> List[str]:
+        # The default vault first, then the others by name
+        return sorted(self._vaults, key=lambda name: (name != DEFAULT_VAULT, name))
+    
+    def items(self) -> List[tuple]:
+        return [(name, self._vaults[name]) for name in self.names()]
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._vaults
+    
+    def __len__(self) -> int:
+        return len(self._vaults)
+    
+    def path_of(self, name: str) -> str:
+        try:
+            return self._vaults[name]
+        except KeyError:
+            raise LookupError(f"No vault named {name!r}; known vaults: {', '.join(self.names())}")
+    
+    def name_of(self, path: str) -> Optional[str]:
+        path = os.path.abspath(path)
+        for name, vault_path in self._vaults.items():
+            if os.path.abspath(vault_path) == path:
+                return name
+        return None
+    
+    def add(self, name: str, path: Optional[str] = None) -> str:
+        """Register a vault and return its path; the file is created when first unlocked."""
+        if not VAULT_NAME.match(name):
+            raise ValueError(f"Invalid vault name {name!r}: use letters, digits, '.', '_' and '-'")
+        if name in self._vaults:
+            raise ValueError(f"A vault named {name!r} already exists")
+        if path is None:
+            folder = os.path.join(app_folder(), "vaults")
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f"{name}.db")
+        path = os.path.abspath(os.path.expanduser(path))
+        other = self.name_of(path)
+        if other is not None:
+            raise ValueError(f"{path} is already registered as {other!r}")
+        self._vaults[name] = path
+        self._save()
+        return path
+    
+    def remove(self, name: str):
+        if name == DEFAULT_VAULT:
+            raise ValueError("The default vault cannot be removed")
+        self.path_of(name)
+        del self._vaults[name]
+        self._save()
@@ -0,0 +1,76 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+from models.password_entry import PasswordEntry
+from services.database_service import DatabaseService
+from services.unlock_service import UnlockTask
+
+class VaultSet:
+    """Several vaults unlocked side by side and searched together.
+    
+    unlock() starts an UnlockTask per vault before opening any database, so
+    the key derivations run in parallel (PBKDF2 releases the GIL) instead
+    of one after another. Queries fan out to every vault on its own thread,
+    each vault on its own connection, and the per-vault results, already
+    sorted by SQLite, are merged with heapq.merge.
+    """
+    
+    def __init__(self, vaults: Dict[str, DatabaseService]):
+        self.vaults = vaults
+    
+    @classmethod
+    def unlock(cls, paths: Dict[str, str], passwords: Dict[str, str]
+               ) -> Tuple['VaultSet', Dict[str, Exception]]:
+        """Unlock the named vaults; returns the set and the errors of those that failed."""
+        tasks = {name: UnlockTask(passwords[name], path) for name, path in paths.items()}
+        vaults, errors = {}, {}
+        for name, task in tasks.items():
+            db_service = None
+            try:
+                db_service = DatabaseService(db_path=task.db_path)
+                db_service.attach_encryption_service(task.result())
+                vaults[name] = db_service
+            except Exception as e:
+                if db_service is not None:
+                    db_service.close()
+                errors[name] = e
+        return cls(vaults), errors
+    
+    def add(self, name: str, db_service: DatabaseService):
+        self.vaults[name] = db_service
+    
+    def close(self):
+        for db_service in self.vaults.values():
+            db_service.close()
+        self.vaults = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def query_entries(self, limit: Optional[int] = None, order_by: str = 'website', descending: bool = False,
+                      **filters) -> List[Tuple[str, PasswordEntry]]:
+        """Run DatabaseService.query_entries on every vault; returns (vault name, entry) pairs.
+        
+        The merged list is in the requested order, ties broken by vault name
+        and id, and cut to `limit`; each vault is asked for at most `limit`
+        rows.
+        """
+        if not self.vaults:
+            return []
+        with ThreadPoolExecutor(max_workers=len(self.vaults), thread_name_prefix="vault-query") as pool:
+            futures = {name: pool.submit(db_service.query_entries, limit=limit, order_by=order_by,
+                                         descending=descending, **filters)
+                       for name, db_service in self.vaults.items()}
+            results = {name: future.result() for name, future in futures.items()}
+        
+        streams = [[(name, entry) for entry in entries] for name, entries in sorted(results.items())]
+        merged = heapq.merge(*streams, reverse=descending,
+                             key=lambda item: (getattr(item[1], order_by), item[0], item[1].id))
+        return list(islice(merged, limit))
+    
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[str, PasswordEntry]]:
+        return self.query_entries(search=query, limit=limit)